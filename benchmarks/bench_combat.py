@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : bench_combat.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from omnissiah.combat import COMBAT_ACTIONS, get_hit_loc_table, player_attack
+from omnissiah.rng import DiceRNG
+from omnissiah.weapons import WeaponClass
+
+from .common import SEED, make_instance
+
+
+# actions that need a melee weapon to make sense
+MELEE_ACTIONS = {'All Out Attack', 'Charge'}
+
+
+class PlayerAttack:
+
+    params = sorted(COMBAT_ACTIONS)
+    param_names = ['action']
+
+    def setup(self, action):
+        weapon_class = WeaponClass.Melee if action in MELEE_ACTIONS else WeaponClass.Basic
+        self.instance = make_instance(weapon_class)
+        self.actions = [COMBAT_ACTIONS[action]]
+        self.rng = DiceRNG(SEED)
+
+    def time_player_attack(self, action):
+        player_attack(self.instance, 45, actions=self.actions,
+                      target_range=30, rng=self.rng)
+
+
+class HitLocation:
+
+    params = [1, 2, 4, 10]
+    param_names = ['n_hits']
+
+    def setup(self, n_hits):
+        self.table = get_hit_loc_table()
+        rng = DiceRNG(SEED).generator
+        self.rolls = rng.integers(1, 101, size=10000)
+        self.hits = rng.integers(1, n_hits + 1, size=10000)
+
+    def time_get_location(self, n_hits):
+        for roll in range(1, 101):
+            self.table.get_location(roll, n_hits)
+
+    def time_get_locations_batch(self, n_hits):
+        self.table.get_locations_batch(self.rolls, self.hits)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : bench_simulate.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from omnissiah.combat import COMBAT_ACTIONS
+from omnissiah.simulate import simulate_attack, simulate_attack_summary
+
+from .common import SEED, make_instance
+
+
+class SimulateAttack:
+
+    params = ([1000, 10000, 100000], ['vector', 'scalar'])
+    param_names = ['N', 'engine']
+    timeout = 120
+
+    def setup(self, N, engine):
+        if engine == 'scalar' and N > 10000:
+            # seconds per sample; the smaller N already tracks the scalar path
+            raise NotImplementedError
+        self.instance = make_instance()
+        self.actions = [COMBAT_ACTIONS['Semi Auto Burst']]
+
+    def time_simulate_attack(self, N, engine):
+        simulate_attack(self.instance, 45, 30, self.actions, N=N,
+                        engine=engine, seed=SEED)
+
+    def peakmem_simulate_attack_summary(self, N, engine):
+        simulate_attack_summary(self.instance, 45, 30, self.actions, N=N,
+                                engine=engine, seed=SEED)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : bench_tables.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import shutil
+import tempfile
+
+from omnissiah.rng import DiceRNG
+from omnissiah.ztable import get_tables, load_crit_tables
+
+from .common import SEED
+
+
+class RollTableLookup:
+
+    params = ['rt_hit_loc', 'warp_perils']
+    param_names = ['table']
+
+    def setup(self, table):
+        self.table = get_tables()[table]
+        self.rng = DiceRNG(SEED)
+        low = self.table.rolls[0]['range'][0]
+        high = max(option['range'][1] for option in self.table.rolls)
+        self.values = list(range(low, high + 1))
+
+    def time_get(self, table):
+        for value in self.values:
+            self.table.get(value)
+
+    def time_roll(self, table):
+        self.table.roll(rng=self.rng)
+
+
+class LoadTables:
+
+    params = [True, False]
+    param_names = ['use_cache']
+
+    def setup(self, use_cache):
+        self.cache_dir = tempfile.mkdtemp()
+        # warm the cache, so the cached case times a load rather than a build
+        load_crit_tables(cache_dir=self.cache_dir, use_cache=use_cache)
+
+    def teardown(self, use_cache):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def time_load_crit_tables(self, use_cache):
+        load_crit_tables(cache_dir=self.cache_dir, use_cache=use_cache)
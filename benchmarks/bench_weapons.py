@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : bench_weapons.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import dataclasses
+import pickle
+
+from omnissiah.items import Craftsmanship
+from omnissiah.weapons import (PlayerWeapon, PlayerWeaponInstance, get_weapon_registry,
+                               pack_weapons, unpack_weapons)
+
+from .common import make_weapon
+
+
+class WeaponSerialization:
+
+    def setup(self):
+        self.weapon = make_weapon()
+        self.data = self.weapon.to_dict()
+        self.packed = self.weapon.to_bytes()
+        self.pickled = pickle.dumps(self.weapon)
+
+    def time_to_dict(self):
+        self.weapon.to_dict()
+
+    def time_from_dict(self):
+        PlayerWeapon.from_dict(self.data)
+
+    def time_to_bytes(self):
+        self.weapon.to_bytes()
+
+    def time_from_bytes(self):
+        PlayerWeapon.from_bytes(self.packed)
+
+    def time_pickle_roundtrip(self):
+        pickle.loads(pickle.dumps(self.weapon))
+
+    def time_instance(self):
+        PlayerWeaponInstance(self.weapon, craftsmanship=Craftsmanship.Common)
+
+
+class WeaponInterning:
+
+    def setup(self):
+        # an equal but distinct copy, as each request builds
+        self.weapon = make_weapon()
+        get_weapon_registry().intern(make_weapon())
+        self.packed = self.weapon.to_bytes()
+
+    def time_intern(self):
+        get_weapon_registry().intern(self.weapon)
+
+    def time_registry_from_bytes(self):
+        get_weapon_registry().from_bytes(self.packed)
+
+
+class ArmourySerialization:
+
+    params = [10, 500]
+    param_names = ['n_weapons']
+
+    def setup(self, n_weapons):
+        weapon = make_weapon()
+        self.weapons = [dataclasses.replace(weapon, name=f'{weapon.name} {i}')
+                        for i in range(n_weapons)]
+        self.data = [weapon.to_dict() for weapon in self.weapons]
+        self.packed = pack_weapons(self.weapons)
+
+    def time_from_dicts(self, n_weapons):
+        [PlayerWeapon.from_dict(data) for data in self.data]
+
+    def time_unpack(self, n_weapons):
+        unpack_weapons(self.packed)
+
+    def time_to_dicts(self, n_weapons):
+        [weapon.to_dict() for weapon in self.weapons]
+
+    def time_pack(self, n_weapons):
+        pack_weapons(self.weapons)
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : common.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from omnissiah.items import Craftsmanship, ItemAvailability
+from omnissiah.weapons import (DamageType, PlayerWeapon, PlayerWeaponInstance,
+                               WeaponClass, WeaponType)
+
+
+SEED = 1337
+
+
+def make_weapon(weapon_class=WeaponClass.Basic):
+    """A bolter-ish weapon that supports every firing mode."""
+    return PlayerWeapon(name='Godwyn-Deaz Bolter',
+                        availability=ItemAvailability.Rare,
+                        mass=7.0,
+                        weapon_class=weapon_class,
+                        weapon_type=WeaponType.Bolt,
+                        weapon_range=100,
+                        rof=(True, 2, 4),
+                        damage_roll=1,
+                        damage_bonus=5,
+                        damage_type=DamageType.Explosive,
+                        pen=4,
+                        clip=24,
+                        reload_time=1.0)
+
+
+def make_instance(weapon_class=WeaponClass.Basic):
+    return PlayerWeaponInstance(make_weapon(weapon_class),
+                                craftsmanship=Craftsmanship.Common)
@@ -7,6 +7,7 @@
 # Date   : 18.08.2021
 
 import argparse
+import importlib
 import json
 import os
 from pathlib import Path
@@ -14,8 +15,6 @@ import sys
 import textwrap
 
 from . import __version__, __splash__, __about__, __testing__
-from .app import run_app
-from .simulate import simulate
 from .utils import EnumAction, default_log_file, default_database_dir
 
 
@@ -24,9 +23,27 @@ class CustomFormatter(argparse.ArgumentDefaultsHelpFormatter,
     pass
 
 
-def main():
+def lazy_command(module, name):
+    """A subcommand func that only imports its implementation when run.
+
+    Keeps each subcommand from paying for the others' imports: simulate
+    shouldn't have to load quart and discord to start.
+    """
+    def command(args):
+        return getattr(importlib.import_module(module, __package__), name)(args)
+    command.__name__ = name
+    return command
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if '--profile-import' in argv:
+        from .importtime import profile_imports
+        sys.exit(profile_imports([arg for arg in argv if arg != '--profile-import']))
+
     from .combat import COMBAT_ACTIONS
     from .items import ItemAvailability
+    from .logging import parse_logger_option, parse_sampling_option
     from .weapons import (WeaponClass, WeaponType, DamageType,
                          Craftsmanship)
 
@@ -34,6 +51,13 @@ def main():
         description=f'{__splash__}\n{__about__}',
         formatter_class=CustomFormatter
     )
+    parser.add_argument(
+        '--profile-import',
+        action='store_true',
+        default=False,
+        help='Run the command under -X importtime and report '\
+             'import costs to stderr.'
+    )
     subparsers = parser.add_subparsers()
 
     app_parser = subparsers.add_parser('app')
@@ -58,6 +82,22 @@ def main():
         help='Path to the log file. Default follows the '\
              'XDG specifiction.'
     )
+    app_parser.add_argument(
+        '--log-level',
+        nargs='+',
+        type=parse_logger_option,
+        metavar='LOGGER=LEVEL',
+        help='Per-logger levels, ie. discord=DEBUG omnissiah.rolls=INFO; '\
+             'an empty LOGGER sets the root level.'
+    )
+    app_parser.add_argument(
+        '--log-sample',
+        nargs='+',
+        type=parse_sampling_option,
+        metavar='LOGGER=N',
+        help='Keep one in N INFO and DEBUG records from each call site '\
+             'of LOGGER, ie. quart.serving=10.'
+    )
     app_parser.add_argument(
         '--credentials-file',
         type=lambda p: Path(p).absolute()
@@ -72,7 +112,26 @@ def main():
     app_parser.add_argument(
         '--secret-key'
     )
-    app_parser.set_defaults(func=run_app)
+    app_parser.add_argument(
+        '--sim-workers',
+        type=int,
+        default=2,
+        help='Worker processes for simulations, kept off the event loop '\
+             'shared by the app and the bot.'
+    )
+    app_parser.add_argument(
+        '--sim-queue-depth',
+        type=int,
+        default=16,
+        help='Maximum simulation jobs queued or running at once.'
+    )
+    app_parser.add_argument(
+        '--sim-user-limit',
+        type=int,
+        default=2,
+        help='Maximum simulation jobs queued or running per user.'
+    )
+    app_parser.set_defaults(func=lazy_command('.app', 'run_app'))
 
 
     simulate_parser = subparsers.add_parser('simulate')
@@ -187,9 +246,117 @@ def main():
         default='text',
         choices = ['text', 'image']
     )
-    simulate_parser.set_defaults(func=simulate)
+    simulate_parser.add_argument(
+        '--engine',
+        default='vector',
+        choices=['vector', 'scalar'],
+        help='vector runs trials as batched array operations, '\
+             'scalar calls player_attack once per trial.'
+    )
+    simulate_parser.add_argument(
+        '--sr-precision',
+        type=float,
+        help='Run batches of --n-trials until the success-rate CI '\
+             'half-width is at most this, ie. 0.005.'
+    )
+    simulate_parser.add_argument(
+        '--damage-precision',
+        type=float,
+        help='Run batches of --n-trials until the mean-damage CI '\
+             'half-width is at most this, ie. 0.2.'
+    )
+    simulate_parser.add_argument(
+        '--confidence',
+        default=.95,
+        type=float,
+        help='Confidence level for the precision targets.'
+    )
+    simulate_parser.add_argument(
+        '--max-trials',
+        default=10000000,
+        type=int,
+        help='Upper bound on trials when running to a precision target.'
+    )
+    simulate_parser.add_argument(
+        '--chunk-size',
+        type=int,
+        help='Trials per chunk folded into the running summary; '\
+             'bounds memory use regardless of --n-trials.'
+    )
+    simulate_parser.add_argument(
+        '--exact',
+        action='store_true',
+        default=False,
+        help='Compute the exact damage distribution instead of sampling.'
+    )
+    simulate_parser.add_argument(
+        '--seed',
+        type=int,
+        help='Seed for the simulation RNG. Only seeded runs are cached; '\
+             'without a seed every run draws fresh samples.'
+    )
+    simulate_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        default=False,
+        help='Always run the simulation, instead of reusing a cached '\
+             'result for the same weapon profile, query and seed.'
+    )
+    simulate_parser.set_defaults(func=lazy_command('.simulate', 'simulate'))
+
+    sweep_parser = subparsers.add_parser('sweep')
+    sweep_parser.add_argument(
+        '--weapons',
+        type=lambda p: Path(p).absolute(),
+        required=True,
+        help='YAML list of weapons, in PlayerWeapon.to_dict layout '\
+             'with an optional craftsmanship name.'
+    )
+    sweep_parser.add_argument(
+        '-BS',
+        '--ballistic-skill',
+        nargs='+',
+        default=[20, 30, 40, 50, 60, 70],
+        type=int
+    )
+    sweep_parser.add_argument(
+        '--target-range',
+        nargs='+',
+        default=[2, 10, 30, 60, 100, 200],
+        type=int
+    )
+    sweep_parser.add_argument(
+        '--action-sets',
+        nargs='+',
+        help='Action sets to sweep, with actions in a set joined by +, '\
+             'ie. "Aim Half+Semi Auto Burst". Default is every valid '\
+             'combination of COMBAT_ACTIONS.'
+    )
+    sweep_parser.add_argument(
+        '--n-trials',
+        '-N',
+        default=10000,
+        type=int
+    )
+    sweep_parser.add_argument(
+        '--seed',
+        type=int,
+        help='Root seed; each grid point gets its own stream spawned from it.'
+    )
+    sweep_parser.add_argument(
+        '--processes',
+        type=int,
+        help='Number of worker processes. Default is the number of CPUs.'
+    )
+    sweep_parser.add_argument(
+        '--output',
+        '-o',
+        help='Write the results table to this CSV (or .tsv) file '\
+             'instead of printing it.'
+    )
+    sweep_parser.set_defaults(func=lazy_command('.sweep', 'run_sweep'))
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     args.func(args)
 
 
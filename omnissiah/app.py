@@ -15,6 +15,7 @@ import quart.flask_patch
 from quart.flask_patch import request, session
 from quart import Quart, Blueprint, redirect, url_for, render_template, g, flash, current_app
 from quart_motor import Motor
+from pymongo.errors import PyMongoError
 
 from zardoz.cli import build_bot
 
@@ -22,6 +23,10 @@ import flask_discord
 from flask_discord import DiscordOAuth2Session, requires_authorization, Unauthorized
 
 from . import __version__
+from .cache import SimulationCache
+from .database import MONGO_CLIENT_OPTIONS, ArmouryCache, ensure_indexes
+from .jobs import JobStore
+from .workers import SimulationPool
 
 
 def callback(self):
@@ -58,8 +63,9 @@ def build_app(args):
     discord = DiscordOAuth2Session(app)
     app.discord = discord
 
-    mongo = Motor(app)
+    mongo = Motor(app, **MONGO_CLIENT_OPTIONS)
     app.mongo = mongo
+    app.armoury_cache = ArmouryCache()
 
     return app
 
@@ -74,17 +80,24 @@ def run_app(args):
             args.client_secret = creds['discord_client_secret']
             args.secret_key = creds['app_secret_key']
 
+    from .logging import setup as setup_logging
+    log_queue = setup_logging(args.log,
+                              levels=dict(args.log_level or ()),
+                              sampling=dict(args.log_sample or ()))
+
     app = build_app(args)
     # register blueprints
     from .blueprints.home import home
     from .blueprints.sheets import sheets
     from .blueprints.rolls import rolls
     from .blueprints.armoury import armoury
+    from .blueprints.simulate import simulate
 
     app.register_blueprint(home)
     app.register_blueprint(sheets)
     app.register_blueprint(rolls)
     app.register_blueprint(armoury)
+    app.register_blueprint(simulate)
 
     @app.before_serving
     async def startup():
@@ -95,6 +108,8 @@ def run_app(args):
                             token_name='OMNISSIAH_TOKEN',
                             prefix='o',
                             loop=loop)
+        # zardoz sets up its own handlers; keep everything on the queue
+        log_queue.claim_root()
 
         @bot.event
         async def on_ready():
@@ -116,13 +131,36 @@ def run_app(args):
                 if not bot.is_closed():
                     await bot.close()
 
+        from .channels import ChannelIndex
+        from .cogs import ChannelCommands
+
+        app.channel_index = ChannelIndex(DB)
+        bot.add_cog(ChannelCommands(bot, DB, index=app.channel_index))
+
         app.bot = bot
         loop.create_task(bot.start(args.secret_token))
 
+        try:
+            await ensure_indexes(app.mongo.db)
+        except PyMongoError:
+            logging.getLogger().exception('Could not create MongoDB indexes')
+
+        app.simulation_pool = SimulationPool(max_workers=args.sim_workers,
+                                             max_pending=args.sim_queue_depth,
+                                             per_user_limit=args.sim_user_limit).start()
+        app.simulation_jobs = JobStore(app.simulation_pool,
+                                       cache=SimulationCache(args.database_dir.joinpath('simulations.sqlite')),
+                                       max_active_per_user=args.sim_user_limit)
+
     @app.after_serving
     async def shutdown():
+        app.simulation_jobs.cancel_all()
+        app.simulation_pool.shutdown()
+        app.simulation_jobs.cache.close()
+        logging.getLogger().info(f'Armoury cache: {app.armoury_cache.stats}')
         if not app.bot.is_closed():
             await app.bot.close()
+        log_queue.stop()
 
     app.run('0.0.0.0', 5000, use_reloader=True, debug=True)
  
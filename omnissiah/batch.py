@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : batch.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import numpy as np
+
+from .combat import (AttackContext, instance_attack_plan, get_hit_loc_table, validate_attack,
+                     range_modifier)
+from .rng import as_generator
+
+
+# keep the (trials, hits, dice) damage block around this many elements
+CHUNK_ELEMENTS = 2 ** 22
+
+
+def prepare_batch_attack(weapon_instance, char_val, actions=None, target_range: int = 10):
+    """Resolve everything about an attack that doesn't depend on the dice.
+
+    Runs the same validation and compiled `combat.AttackPlan` as
+    `player_attack`, then tabulates the after-effects over every possible
+    DoS, so the batch engine only needs array lookups per trial.
+
+    Returns the final test value and an array mapping DoS to number of hits.
+    """
+    actions = validate_attack(weapon_instance, actions, target_range)
+    plan = instance_attack_plan(weapon_instance, actions)
+    ctx = AttackContext(weapon_instance, char_val, target_range, actions=actions, plan=plan)
+
+    plan.apply_before(ctx)
+    bonus, _ = range_modifier(ctx.weapon, ctx.target_range)
+    if bonus:
+        ctx.add_test_bonus(bonus)
+    test = ctx.test
+
+    # successes roll at least 1, so this is the largest reachable DoS
+    max_degrees = max(test - 1, 0) // 10
+    hits_by_degrees = []
+    for degrees in range(max_degrees + 1):
+        ctx.hits_base = 1
+        ctx.hits_extra = 0
+        ctx.attack_degrees = degrees
+        plan.apply_after(ctx)
+        hits_by_degrees.append(max(ctx.hits, 0))
+
+    return test, np.array(hits_by_degrees, dtype=np.int64)
+
+
+def iter_batch_player_attack(weapon_instance, char_val, char_bonus=None,
+                             actions=None, target_range: int = 10,
+                             N: int = 10000, rng=None, chunk_size=None,
+                             with_locations: bool = False):
+    """Run N attacks as array operations, yielding results chunk by chunk.
+
+    Follows the rules of `combat.player_attack`: d100 against the test,
+    DoS replacing the lowest damage die, hits from DoS capped by RoF, and
+    fury chains on a 10 confirmed against the test. Each chunk is a dict
+    of arrays with keys damage, test, attack_roll, degrees, hits, success.
+
+    rng may be a DiceRNG or numpy Generator; defaults to the global dice stream.
+    With with_locations, chunks also have a locations array of hit location
+    codes from `HitLocTable.get_locations_batch`.
+    """
+    rng = as_generator(rng)
+    if char_bonus is None:
+        char_bonus = char_val // 10
+
+    test, hits_by_degrees = prepare_batch_attack(weapon_instance, char_val,
+                                                 actions=actions,
+                                                 target_range=target_range)
+    max_degrees = len(hits_by_degrees) - 1
+    max_hits = int(hits_by_degrees.max())
+    n_dice = weapon_instance.damage_roll
+    damage_bonus = weapon_instance.damage_bonus
+    melee_bonus = char_bonus if weapon_instance.melee_or_thrown else 0
+
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_ELEMENTS // max(1, max_hits * n_dice))
+
+    done = 0
+    while done < N:
+        n = min(chunk_size, N - done)
+        done += n
+
+        attack_roll = rng.integers(1, 101, size=n)
+        success = attack_roll <= test
+        degrees = np.abs(test - attack_roll) // 10
+        hits = np.where(success, hits_by_degrees[np.minimum(degrees, max_degrees)], 0)
+        damage = np.where(success, melee_bonus, 0)
+
+        if max_hits > 0 and n_dice > 0:
+            damage += _batch_damage(rng, test, degrees, hits, max_hits,
+                                    n_dice, damage_bonus)
+
+        chunk = {'damage': damage,
+                 'test': np.full(n, test),
+                 'attack_roll': attack_roll,
+                 'degrees': degrees,
+                 'hits': hits,
+                 'success': success}
+        if with_locations:
+            chunk['locations'] = get_hit_loc_table().get_locations_batch(attack_roll, hits)
+        yield chunk
+
+
+def _batch_damage(rng, test, degrees, hits, max_hits, n_dice, damage_bonus):
+    n = len(degrees)
+    dice = rng.integers(1, 11, size=(n, max_hits, n_dice), dtype=np.int16)
+
+    # replace the (first) lowest die with the DoS if it's lower
+    lowest_idx = dice.argmin(axis=2)[..., np.newaxis]
+    lowest = np.take_along_axis(dice, lowest_idx, axis=2)
+    dos = degrees[:, np.newaxis, np.newaxis]
+    np.put_along_axis(dice, lowest_idx, np.where(lowest < dos, dos, lowest), axis=2)
+
+    active = np.arange(max_hits)[np.newaxis, :] < hits[:, np.newaxis]
+    per_hit = dice.sum(axis=2) + damage_bonus
+
+    # fury chains: confirm against the test, keep going on a 10
+    pending = (dice == 10).any(axis=2) & active
+    while pending.any():
+        trials, hit_idx = np.nonzero(pending)
+        confirmed = rng.integers(1, 101, size=len(trials)) <= test
+        fury_damage = rng.integers(1, 11, size=len(trials))
+        per_hit[trials, hit_idx] += np.where(confirmed, fury_damage, 0)
+        pending[trials, hit_idx] = confirmed & (fury_damage == 10)
+
+    # a negative damage bonus can't take a hit below 0
+    return np.where(active, np.maximum(per_hit, 0), 0).sum(axis=1)
+
+
+def batch_player_attack(weapon_instance, char_val, char_bonus=None,
+                        actions=None, target_range: int = 10,
+                        N: int = 10000, rng=None, chunk_size=None,
+                        with_locations: bool = False):
+    """Run N attacks as array operations; see `iter_batch_player_attack`.
+
+    Returns a single dict of concatenated result arrays.
+    """
+    chunks = list(iter_batch_player_attack(weapon_instance, char_val,
+                                           char_bonus=char_bonus,
+                                           actions=actions,
+                                           target_range=target_range,
+                                           N=N, rng=rng, chunk_size=chunk_size,
+                                           with_locations=with_locations))
+    if not chunks:
+        return {}
+    if with_locations:
+        width = max(c['locations'].shape[1] for c in chunks)
+        for c in chunks:
+            pad = width - c['locations'].shape[1]
+            c['locations'] = np.pad(c['locations'], ((0, 0), (0, pad)), constant_values=-1)
+    return {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
@@ -8,33 +8,98 @@
 
 import logging
 import os
+import tempfile
 
 from quart import (Blueprint, current_app, redirect, url_for, 
-                   render_template, request, session, g)
+                   render_template, request, session, g, abort, flash,
+                   make_response)
+from quart.utils import run_sync
 from flask_discord import requires_authorization, Unauthorized
 
 from ... import database
+from ...bulk import (EXPORT_FORMATS, IMPORT_MIMETYPES, iter_entries,
+                     parse_weapons, stream_export, take)
 from ...combat import player_attack, COMBAT_ACTIONS
 from ...items import ItemAvailability
 from ...utils import redirect_url, SUCCESS, FAILURE
 from ...weapons import (Craftsmanship, PlayerWeapon, PlayerWeaponInstance)
 
-from ...forms import WeaponForm
+from ...forms import ArmouryFilterForm, WeaponForm, WeaponImportForm
 
 
 armoury = Blueprint('armoury', __name__, template_folder='templates')
 
+# weapons per insert_many, the most one import may add, and how many
+# rejected entries are reported back
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_WEAPONS = 5000
+MAX_IMPORT_ERRORS = 20
+# raw uploads past this size spool to disk instead of memory
+IMPORT_SPOOL_SIZE = 1 << 20
+
+
+async def import_weapons(user_id, fp, fmt=None):
+    """Parse, validate and insert the weapons in fp, a batch at a time.
+
+    Parsing runs in the default executor, a batch per call, so neither the
+    loop nor memory sees the whole upload at once. Returns the number of
+    weapons imported and a list of error messages.
+    """
+    n_imported, errors = 0, []
+    try:
+        results = parse_weapons(iter_entries(fp, fmt))
+        while n_imported < MAX_IMPORT_WEAPONS:
+            batch = await run_sync(take)(results, IMPORT_BATCH_SIZE)
+            if not batch:
+                break
+            weapons = [weapon for _, weapon, _ in batch if weapon is not None]
+            errors.extend(error if number is None else f'Entry {number}: {error}'
+                          for number, _, error in batch if error is not None)
+            weapons = weapons[:MAX_IMPORT_WEAPONS - n_imported]
+            if weapons:
+                await database.insert_armoury_player_weapons(user_id, weapons)
+                n_imported += len(weapons)
+        else:
+            if await run_sync(take)(results, 1):
+                errors.append(f'Stopped after {MAX_IMPORT_WEAPONS} weapons.')
+    except ValueError as e:
+        errors.append(str(e))
+    finally:
+        if n_imported:
+            current_app.armoury_cache.invalidate(user_id)
+    return n_imported, errors
+
 
 @armoury.route("/armoury/player/weapons")
 @requires_authorization
 async def player_weapons():
-    log = logging.getLogger()
+    """One page of the armoury, filtered and sorted in Mongo; ?after= pages on.
+
+    Pages come through the armoury cache until the user's next write.
+    """
     form = WeaponForm()
-    player_weapons = [(d, _id) async for d, _id in database.query_armoury_player_weapons(session['user-id'])]
-    log.info(f'player weapons: {player_weapons}')
+    filter_form = ArmouryFilterForm(request.args)
+    if not filter_form.validate():
+        abort(400)
+    try:
+        player_weapons, next_cursor = \
+            await current_app.armoury_cache.get_player_weapon_page(session['user-id'],
+                                                                   filters=filter_form.get_filters(),
+                                                                   sort=filter_form.sort.data,
+                                                                   after=request.args.get('after'))
+    except ValueError:
+        abort(400)
+
+    query = {k: v for k, v in request.args.items() if k != 'after' and v}
     return await render_template('weapons.html',
                                  player_weapons=player_weapons,
-                                 weapon_form=form)
+                                 weapon_form=form,
+                                 filter_form=filter_form,
+                                 first_page_url=url_for('.player_weapons', **query)
+                                                if 'after' in request.args else None,
+                                 next_page_url=url_for('.player_weapons', after=next_cursor, **query)
+                                               if next_cursor else None,
+                                 import_form=WeaponImportForm())
 
 
 @armoury.route("/armoury/player/weapons/add", methods=['POST'])
@@ -45,9 +110,9 @@ async def player_add_weapon():
     log.info(f'Add weapon: {form.data}')
     if form.validate():
         weapon_model = form.get_weapon_model()
-        result = await database.add_armoury_player_weapons(session['user-id'], weapon_model)
+        result = await current_app.armoury_cache.add_player_weapons(session['user-id'], weapon_model)
 
-        log.info(f'{session.get("user-full-name")} added to armoury: {result.inserted_ids}')
+        log.info(f'{session.get("user-full-name")} added {result.inserted_count} weapons to armoury')
     else:
         log.warning(f'Form failed validation: {form.errors}')
 
@@ -60,6 +125,60 @@ async def player_delete_weapon():
     log = logging.getLogger()
     form = await request.form
     weapon_id = form['weapon-id']
-    result = await database.delete_armoury_player_weapons(session['user-id'], weapon_id)
+    result = await current_app.armoury_cache.delete_player_weapons(session['user-id'], weapon_id)
 
     return redirect(redirect_url())
+
+
+@armoury.route("/armoury/player/weapons/import", methods=['POST'])
+@requires_authorization
+async def player_import_weapons():
+    """Bulk import from an uploaded export, or from a raw JSON or YAML body."""
+    log = logging.getLogger()
+    fmt = IMPORT_MIMETYPES.get(request.mimetype)
+    if fmt is not None:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as fp:
+            async for chunk in request.body:
+                fp.write(chunk)
+            fp.seek(0)
+            n_imported, errors = await import_weapons(session['user-id'], fp, fmt)
+        log.info(f'{session.get("user-full-name")} imported {n_imported} weapons, '
+                 f'{len(errors)} errors')
+        return {'imported': n_imported, 'errors': errors[:MAX_IMPORT_ERRORS]}, \
+               200 if n_imported or not errors else 400
+
+    form = WeaponImportForm()
+    if form.validate():
+        upload = form.weapons_file.data
+        n_imported, errors = await import_weapons(session['user-id'], upload.stream)
+        log.info(f'{session.get("user-full-name")} imported {n_imported} weapons '
+                 f'from {upload.filename}, {len(errors)} errors')
+        await flash(f'Imported {n_imported} weapons.', 'success' if n_imported else 'warning')
+        for error in errors[:MAX_IMPORT_ERRORS]:
+            await flash(error, 'danger')
+        if len(errors) > MAX_IMPORT_ERRORS:
+            await flash(f'... and {len(errors) - MAX_IMPORT_ERRORS} more problems.', 'danger')
+    else:
+        log.warning(f'Form failed validation: {form.errors}')
+        for messages in form.errors.values():
+            for message in messages:
+                await flash(message, 'danger')
+
+    return redirect(url_for('.player_weapons'))
+
+
+@armoury.route("/armoury/player/weapons/export")
+@requires_authorization
+async def player_export_weapons():
+    """Stream the user's armoury as JSON or YAML, straight from the cursor."""
+    fmt = request.args.get('format', 'yaml')
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+
+    documents = database.stream_armoury_player_weapon_documents(session['user-id'],
+                                                                db=current_app.mongo.db)
+    response = await make_response(stream_export(documents, fmt),
+                                   {'Content-Type': EXPORT_FORMATS[fmt],
+                                    'Content-Disposition': f'attachment; filename="armoury.{fmt}"'})
+    response.timeout = None
+    return response
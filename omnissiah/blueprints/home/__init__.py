@@ -9,7 +9,9 @@
 import logging
 import os
 
-from quart import Blueprint, current_app, redirect, url_for, render_template, request, session
+from quart import (Blueprint, current_app, redirect, url_for, render_template, request, session,
+                   abort)
+from quart.utils import run_sync
 from flask_discord import requires_authorization, Unauthorized
 
 from ...utils import fetch_valid_guilds, redirect_url
@@ -39,15 +41,21 @@ async def callback():
     log = logging.getLogger()
     log.info('Discord callback')
     discord = current_app.discord
-    discord.callback()
-
-    valid_guilds = await fetch_valid_guilds()
-    session['valid-guilds'] = valid_guilds
-    session['user-avatar-url'] = discord.fetch_user().avatar_url 
-    session['user-name' ] = discord.fetch_user().name
-    session['user-id'] = discord.fetch_user().id
-    session['user-disc'] = discord.fetch_user().discriminator
-    session['user-full-name'] = str(discord.fetch_user())
+    await run_sync(discord.callback)()
+
+    # one call each for the user and their guilds, off the loop. They run one
+    # after the other in the same thread: flask_discord keeps the OAuth token
+    # and its caches in the session, and isn't safe to call concurrently.
+    def fetch_user_and_guilds():
+        return discord.fetch_user(), discord.fetch_guilds()
+
+    user, user_guilds = await run_sync(fetch_user_and_guilds)()
+    await fetch_valid_guilds(user_guilds=user_guilds, refresh=True)
+    session['user-avatar-url'] = user.avatar_url
+    session['user-name' ] = user.name
+    session['user-id'] = user.id
+    session['user-disc'] = user.discriminator
+    session['user-full-name'] = str(user)
 
     return redirect(url_for(".index"))
 
@@ -62,10 +70,14 @@ async def set_server():
     log = logging.getLogger()
     log.info('Do set-server')
     form = await request.form
+    valid = await fetch_valid_guilds()
+    if form['server-id'] not in valid:
+        valid = await fetch_valid_guilds(refresh=True)
+        if form['server-id'] not in valid:
+            abort(403)
     session['active-server-id'] = int(form['server-id'])
-    valid = session.get('valid-guilds')
     session['active-server-name'] = valid[form['server-id']]
-    log.info(f'{current_app.discord.fetch_user()} set server to {session["active-server-id"]}')
+    log.info(f'{session.get("user-full-name")} set server to {session["active-server-id"]}')
     return redirect(redirect_url())
 
 
@@ -32,14 +32,14 @@ async def roll():
 @rolls.route("/roll/weapon/submit", methods=['POST'])
 @requires_authorization
 async def submit_roll_weapon():
-    log = logging.getLogger()
+    log = logging.getLogger('omnissiah.rolls')
     form = WeaponAttackForm()
-    log.info(f'Weapon Form: {form.data}')
+    log.debug('Weapon Form: %s', form.data)
     if form.validate():
         weapon_model = form.weapon.get_weapon_model()
         weapon_instance = PlayerWeaponInstance(weapon_model, craftsmanship=Craftsmanship.Good)
         actions = [form.player_action.action.data]
-        log.info(f'Weapon model: {weapon_model}')
+        log.debug('Weapon model: %s', weapon_model)
 
         status, attack_ctx = player_attack(weapon_instance,
                                            form.test_characteristic.data,
@@ -47,28 +47,29 @@ async def submit_roll_weapon():
                                            target_range=form.target_range.data)
         g.prev_attack = attack_ctx
 
-        channels = current_app.bot.get_guild(session['active_server_id']).channels
-        for c in channels:
-            if c.name == 'dice':
-                status_str = SUCCESS if status else FAILURE
-                result = (
-                    f'{current_app.discord.fetch_user().name} attacked using {weapon_model.name}: \n'
-                    f'**Char value**: {form.test_characteristic.data}\n'
-                    f'**Target range**: {form.target_range.data}\n'
-                    f'**Weapon range**: {weapon_model.weapon_range}\n'
-                    f'**Attack action**: {actions[0].name}\n'
-                    f'**Attack roll**: {status_str}  {attack_ctx.test_str}\n'
+        channel = await current_app.channel_index.roll_channel(session.get('active-server-id'))
+        if channel is None:
+            log.warning(f'No roll channel for server {session.get("active-server-id")}')
+        else:
+            status_str = SUCCESS if status else FAILURE
+            result = (
+                f'{session["user-name"]} attacked using {weapon_model.name}: \n'
+                f'**Char value**: {form.test_characteristic.data}\n'
+                f'**Target range**: {form.target_range.data}\n'
+                f'**Weapon range**: {weapon_model.weapon_range}\n'
+                f'**Attack action**: {actions[0].name}\n'
+                f'**Attack roll**: {status_str}  {attack_ctx.test_str}\n'
+            )
+            if status:
+                result += (
+                    f'**Total damage**: {attack_ctx.total_damage} {weapon_model.damage_type.value} @ pen {weapon_model.pen}\n'
+                    f'**DoS**: {attack_ctx.attack_degrees}\n'
+                    f'**Hits**: {attack_ctx.hits}\n'
+                    f'**Locations**: {", ".join(attack_ctx.locations)}\n'
+                    f'**Rolls**:\n'
+                    f'{attack_ctx.damage_str}'
                 )
-                if status:
-                    result += (
-                        f'**Total damage**: {attack_ctx.total_damage} {weapon_model.damage_type.value} @ pen {weapon_model.pen}\n'
-                        f'**DoS**: {attack_ctx.attack_degrees}\n'
-                        f'**Hits**: {attack_ctx.hits}\n'
-                        f'**Locations**: {", ".join(attack_ctx.locations)}\n'
-                        f'**Rolls**:\n'
-                        f'{attack_ctx.damage_str}'
-                    )
-                await c.send(result)
+            await channel.send(result)
     else:
         log.warning(f'Form failed validation: {form.errors}')
 
@@ -78,10 +79,19 @@ async def submit_roll_weapon():
 @rolls.route("/roll/weapon")
 @requires_authorization
 async def roll_weapon():
-    log = logging.getLogger()
+    log = logging.getLogger('omnissiah.rolls')
     if g.get('prev_attack', False):
-        log.info(f'Prev attack: {g["prev_attack"]}')
+        log.debug('Prev attack: %s', g['prev_attack'])
     form = WeaponAttackForm()
+    player_weapons = await current_app.armoury_cache.get_player_weapons(session['user-id'])
+    weapon_id = request.args.get('weapon')
+    if weapon_id is not None:
+        weapon_model = await current_app.armoury_cache.get_player_weapon(session['user-id'],
+                                                                         weapon_id)
+        if weapon_model is not None:
+            form.weapon.set_weapon_model(weapon_model)
     return await render_template('roll_weapon.html',
                                  form=form,
-                                 weapon_form=form.weapon)
+                                 weapon_form=form.weapon,
+                                 player_weapons=player_weapons,
+                                 weapon_id=weapon_id)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : __init__.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import json
+import logging
+
+from quart import (Blueprint, current_app, redirect, url_for, abort,
+                   render_template, make_response, session)
+from flask_discord import requires_authorization
+
+from ...combat import COMBAT_ACTIONS, validate_attack
+from ...weapons import PlayerWeaponInstance
+from ...workers import SimulationRejected
+
+from ...forms import SimulationForm
+
+
+simulate = Blueprint('simulate', __name__, template_folder='templates')
+
+
+def get_user_job(job_id):
+    job = current_app.simulation_jobs.get(job_id, user=session['user-id'])
+    if job is None:
+        abort(404)
+    return job
+
+
+@simulate.route("/simulate")
+@requires_authorization
+async def simulation():
+    form = SimulationForm()
+    jobs = current_app.simulation_jobs.user_jobs(session['user-id'])
+    return await render_template('simulate.html',
+                                 form=form,
+                                 weapon_form=form.weapon,
+                                 jobs=jobs)
+
+
+@simulate.route("/simulate/submit", methods=['POST'])
+@requires_authorization
+async def submit_simulation():
+    log = logging.getLogger()
+    form = SimulationForm()
+    errors = []
+    if form.validate():
+        try:
+            weapon_model = form.weapon.get_weapon_model()
+            validate_attack(PlayerWeaponInstance(weapon_model,
+                                                 craftsmanship=form.craftsmanship.data),
+                            [COMBAT_ACTIONS[name] for name in form.actions.data],
+                            form.target_range.data)
+            job = current_app.simulation_jobs.submit(session['user-id'],
+                                                     weapon_model,
+                                                     form.craftsmanship.data,
+                                                     form.ballistic_skill.data,
+                                                     form.target_range.data,
+                                                     form.actions.data,
+                                                     form.n_trials.data,
+                                                     seed=form.seed.data,
+                                                     sr_precision=form.sr_precision.data,
+                                                     damage_precision=form.damage_precision.data,
+                                                     confidence=form.confidence.data)
+        except (TypeError, ValueError, SimulationRejected) as e:
+            errors.append(str(e))
+        else:
+            log.info(f'{session.get("user-full-name")} submitted simulation {job.id}')
+            return redirect(url_for('.simulation_job', job_id=job.id))
+    else:
+        log.warning(f'Form failed validation: {form.errors}')
+        errors.extend(f'{field}: {", ".join(map(str, messages))}'
+                      for field, messages in form.errors.items())
+
+    jobs = current_app.simulation_jobs.user_jobs(session['user-id'])
+    return await render_template('simulate.html',
+                                 form=form,
+                                 weapon_form=form.weapon,
+                                 jobs=jobs,
+                                 errors=errors), 400
+
+
+@simulate.route("/simulate/jobs/<job_id>")
+@requires_authorization
+async def simulation_job(job_id):
+    job = get_user_job(job_id)
+    return await render_template('simulation_job.html', job=job)
+
+
+@simulate.route("/simulate/jobs/<job_id>/status")
+@requires_authorization
+async def simulation_job_status(job_id):
+    return get_user_job(job_id).to_dict()
+
+
+@simulate.route("/simulate/jobs/<job_id>/events")
+@requires_authorization
+async def simulation_job_events(job_id):
+    """Server-sent events with the job state on every update, until it finishes."""
+    job = get_user_job(job_id)
+
+    async def events():
+        version = -1
+        while True:
+            await job.wait_for_update(version)
+            if job.version != version:
+                version = job.version
+                yield f'event: update\ndata: {json.dumps(job.to_dict())}\n\n'.encode('utf-8')
+            else:
+                # keep proxies from closing an idle stream
+                yield b': keep-alive\n\n'
+            if job.done:
+                break
+
+    response = await make_response(events(), {'Content-Type': 'text/event-stream',
+                                               'Cache-Control': 'no-cache',
+                                               'X-Accel-Buffering': 'no'})
+    response.timeout = None
+    return response
+
+
+@simulate.route("/simulate/jobs/<job_id>/cancel", methods=['POST'])
+@requires_authorization
+async def cancel_simulation_job(job_id):
+    job = get_user_job(job_id)
+    current_app.simulation_jobs.cancel(job.id, user=session['user-id'])
+    return redirect(url_for('.simulation_job', job_id=job.id))
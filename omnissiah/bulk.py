@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : bulk.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import io
+import itertools
+import json
+
+import yaml
+
+
+# read size for incremental JSON parsing
+JSON_CHUNK_SIZE = 1 << 16
+# a single weapon entry bigger than this is rejected rather than buffered
+MAX_ENTRY_SIZE = 1 << 20
+
+EXPORT_FORMATS = {'json': 'application/json',
+                  'yaml': 'application/yaml'}
+IMPORT_MIMETYPES = {'application/json': 'json',
+                    'application/yaml': 'yaml',
+                    'application/x-yaml': 'yaml',
+                    'text/yaml': 'yaml',
+                    'text/x-yaml': 'yaml'}
+
+
+def iter_json_array(fp, chunk_size: int = JSON_CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array from text file fp.
+
+    The array is read chunk by chunk, so only the current element is
+    buffered, never the whole document.
+    """
+    decoder = json.JSONDecoder()
+    # what may come next: None before the array opens, then FIRST (an
+    # element or the end), AFTER (a comma or the end) or ELEMENT
+    FIRST, AFTER, ELEMENT = range(3)
+    buf, pos, expect = '', 0, None
+    while True:
+        chunk = fp.read(chunk_size)
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos == len(buf):
+                break
+            if expect is None:
+                if buf[pos] != '[':
+                    raise ValueError('Expected a JSON array of weapons.')
+                expect = FIRST
+                pos += 1
+            elif buf[pos] == ']':
+                if expect == ELEMENT:
+                    raise ValueError('Invalid JSON: trailing comma before ].')
+                return
+            elif buf[pos] == ',':
+                if expect != AFTER:
+                    raise ValueError('Invalid JSON: expected an array element before ,.')
+                expect = ELEMENT
+                pos += 1
+            elif expect == AFTER:
+                raise ValueError('Invalid JSON: expected , or ] after an array element.')
+            else:
+                try:
+                    element, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError as e:
+                    if not chunk:
+                        raise ValueError(f'Invalid JSON: {e}')
+                    if len(buf) - pos > MAX_ENTRY_SIZE:
+                        raise ValueError(f'Invalid JSON, or an entry over {MAX_ENTRY_SIZE} bytes.')
+                    # element continues in the next chunk
+                    break
+                if end == len(buf) and chunk and not isinstance(element, (dict, list)):
+                    # a scalar at the end of the buffer may be cut off
+                    break
+                yield element
+                expect = AFTER
+                pos = end
+        if not chunk:
+            raise ValueError('Truncated JSON: the array is never closed.')
+
+
+def iter_yaml_sequence(fp):
+    """Yield the items of a YAML sequence from fp, one constructed item at a time.
+
+    Each document in the stream may be a sequence of entries or a single
+    entry. Only the current item's node tree is held in memory.
+    """
+    # the C loader doesn't expose compose_node, which this needs
+    loader = yaml.SafeLoader(fp)
+    try:
+        loader.get_event()
+        while not loader.check_event(yaml.StreamEndEvent):
+            loader.get_event()
+            if loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    yield loader.construct_document(loader.compose_node(None, None))
+                loader.get_event()
+            elif not loader.check_event(yaml.DocumentEndEvent):
+                yield loader.construct_document(loader.compose_node(None, None))
+            loader.get_event()
+    except yaml.YAMLError as e:
+        raise ValueError(f'Invalid YAML: {e}')
+    finally:
+        loader.dispose()
+
+
+def sniff_format(fp):
+    """'json' if the buffered binary stream fp starts like a JSON array, else 'yaml'."""
+    head = fp.peek(64) if hasattr(fp, 'peek') else b''
+    return 'json' if head.lstrip().startswith(b'[') else 'yaml'
+
+
+def iter_entries(fp, fmt: str = None):
+    """Yield the raw entries of a binary JSON or YAML upload.
+
+    fmt is 'json' or 'yaml'; if None, it's guessed from the first bytes.
+    """
+    if not hasattr(fp, 'peek'):
+        fp = io.BufferedReader(fp)
+    if fmt is None:
+        fmt = sniff_format(fp)
+    text = io.TextIOWrapper(fp, encoding='utf-8-sig')
+    if fmt == 'json':
+        return iter_json_array(text)
+    elif fmt == 'yaml':
+        return iter_yaml_sequence(text)
+    raise ValueError(f'Unknown import format: {fmt}')
+
+
+def validate_weapon_entry(entry):
+    """Build a PlayerWeapon from an exported entry, with the add-form's checks.
+
+    Raises ValueError describing the first problem.
+    """
+    from .weapons import PlayerWeapon, get_weapon_registry
+
+    if not isinstance(entry, dict):
+        raise ValueError('not a mapping of weapon fields')
+    try:
+        weapon = PlayerWeapon.from_dict(entry)
+    except (LookupError, TypeError, ValueError) as e:
+        raise ValueError(str(e))
+
+    if not isinstance(weapon.name, str) or not weapon.name:
+        raise ValueError('weapon needs a name')
+    minimums = {'weapon_range': 1, 'damage_roll': 1, 'damage_bonus': 0,
+                'pen': 0, 'clip': 1}
+    for field, minimum in minimums.items():
+        value = getattr(weapon, field)
+        if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+            raise ValueError(f'{field} must be an integer of at least {minimum}')
+    if len(weapon.rof) != 3 or any(not isinstance(rof, int) or rof < 0 for rof in weapon.rof):
+        raise ValueError('rof must be [single, semi, auto]')
+
+    # also checks every field fits the binary layout
+    weapon.to_bytes()
+    return get_weapon_registry().intern(weapon)
+
+
+def parse_weapons(entries, start: int = 1):
+    """Validate entries, yielding (number, PlayerWeapon, None) or (number, None, error).
+
+    A malformed stream ends the results with (None, None, error), after
+    every entry read before the problem.
+    """
+    entries = iter(entries)
+    number = start
+    while True:
+        try:
+            entry = next(entries)
+        except StopIteration:
+            return
+        except ValueError as e:
+            yield None, None, str(e)
+            return
+        try:
+            yield number, validate_weapon_entry(entry), None
+        except ValueError as e:
+            yield number, None, str(e)
+        number += 1
+
+
+def take(iterable, n: int):
+    return list(itertools.islice(iterable, n))
+
+
+async def stream_export(documents, fmt: str):
+    """Encode an async iterable of weapon documents as it's consumed.
+
+    Yields utf-8 chunks of a JSON array or a YAML sequence, one document
+    at a time, for a streamed response.
+    """
+    if fmt == 'json':
+        first = True
+        yield b'[\n'
+        async for document in documents:
+            yield (('' if first else ',\n') + json.dumps(document)).encode('utf-8')
+            first = False
+        yield b'\n]\n'
+    elif fmt == 'yaml':
+        async for document in documents:
+            yield yaml.safe_dump([document], sort_keys=False,
+                                 allow_unicode=True).encode('utf-8')
+    else:
+        raise ValueError(f'Unknown export format: {fmt}')
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : cache.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from collections import OrderedDict
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from .utils import default_database_dir
+
+
+# bump when simulation results for the same key would change, ie. a rules fix
+SIMULATION_CACHE_VERSION = 1
+
+# the PlayerWeapon fields that feed into an attack; name, mass and the like
+# don't, so weapons that only differ in those share results
+SIMULATION_WEAPON_FIELDS = ('weapon_class', 'weapon_type', 'weapon_range', 'rof',
+                            'damage_roll', 'damage_bonus', 'damage_type', 'pen')
+
+
+def simulation_key(weapon_model, craftsmanship, BS, target_range, actions,
+                   N, seed=None, **params):
+    """Canonical content hash for a simulation query.
+
+    actions may be CombatActions or their names, in any order. Extra
+    keyword params (engine, precision targets, ...) are hashed as well.
+    """
+    weapon = weapon_model.to_dict()
+    query = {'version': SIMULATION_CACHE_VERSION,
+             'weapon': {field: weapon[field] for field in SIMULATION_WEAPON_FIELDS},
+             'craftsmanship': craftsmanship.name,
+             'BS': BS,
+             'range': target_range,
+             'actions': sorted(getattr(action, 'name', action) for action in actions or ()),
+             'N': N,
+             'seed': seed,
+             'params': params}
+    canonical = json.dumps(query, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """A small least-recently-used mapping with hit and miss counters.
+
+    With a ttl, entries also expire that many seconds after they're put.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._data = OrderedDict()
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if self.ttl is not None and self._expires[key] <= time.monotonic():
+                del self._data[key], self._expires[key]
+                self.expired += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.ttl is not None:
+                self._expires[key] = time.monotonic() + self.ttl
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._expires.pop(evicted, None)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            self._expires.pop(key, None)
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    @property
+    def stats(self):
+        stats = {'size': len(self._data), 'maxsize': self.maxsize,
+                 'hits': self.hits, 'misses': self.misses}
+        if self.ttl is not None:
+            stats.update(ttl=self.ttl, expired=self.expired)
+        return stats
+
+
+class SimulationCache:
+    """Two-tier cache of `stats.AttackSummary` results by `simulation_key`.
+
+    Recent summaries stay in an in-memory LRU; every summary is also
+    written to a SQLite database, so results survive restarts and are
+    shared between the CLI and the app.
+    """
+
+    def __init__(self, path=None, maxsize: int = 256):
+        if path is None:
+            from . import __testing__
+            path = default_database_dir(debug=__testing__).joinpath('simulations.sqlite')
+        self.path = path
+        self.memory = LRUCache(maxsize=maxsize)
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute('CREATE TABLE IF NOT EXISTS simulations ('
+                               'key TEXT PRIMARY KEY, '
+                               'summary TEXT NOT NULL, '
+                               'created REAL NOT NULL)')
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        """The cached summary for key, or None."""
+        from .stats import AttackSummary
+
+        summary = self.memory.get(key)
+        if summary is not None:
+            return summary
+
+        with self._lock:
+            row = self._connect().execute('SELECT summary FROM simulations WHERE key = ?',
+                                          (key,)).fetchone()
+        if row is None:
+            self.disk_misses += 1
+            return None
+        self.disk_hits += 1
+        summary = AttackSummary.from_dict(json.loads(row[0]))
+        self.memory.put(key, summary)
+        return summary
+
+    def put(self, key, summary):
+        self.memory.put(key, summary)
+        with self._lock:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO simulations (key, summary, created) '
+                         'VALUES (?, ?, ?)',
+                         (key, json.dumps(summary.to_dict()), time.time()))
+            conn.commit()
+
+    def get_or_compute(self, key, compute):
+        """The cached summary for key; on a miss, call compute() and store its result.
+
+        Returns (summary, cached).
+        """
+        summary = self.get(key)
+        if summary is not None:
+            return summary, True
+        summary = compute()
+        self.put(key, summary)
+        return summary, False
+
+    def clear(self):
+        self.memory.clear()
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM simulations')
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def stats(self):
+        return {'memory': self.memory.stats,
+                'disk_hits': self.disk_hits,
+                'disk_misses': self.disk_misses}
+
+
+@functools.lru_cache(maxsize=None)
+def get_simulation_cache():
+    """The process-wide simulation cache, opened on first use."""
+    return SimulationCache()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : channels.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import logging
+
+
+# where rolls go in guilds that haven't configured a channel
+DEFAULT_ROLL_CHANNEL = 'dice'
+# setting holding the configured roll channel's id
+ROLL_CHANNEL_SETTING = 'roll_channel'
+
+# Omnissiah's per-guild settings get their own table in the guild's zardoz
+# database: zardoz's var commands can set or delete any guild_vars key,
+# and would silently break routing.
+GUILD_SETTINGS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS omnissiah_guild_settings (
+    setting TEXT NOT NULL PRIMARY KEY,
+    member_id INTEGER NOT NULL,
+    val INTEGER NOT NULL
+);'''
+GET_GUILD_SETTING = 'SELECT val FROM omnissiah_guild_settings WHERE setting = ?;'
+SET_GUILD_SETTING = '''
+INSERT INTO omnissiah_guild_settings (setting, member_id, val) VALUES (?, ?, ?)
+ON CONFLICT (setting) DO UPDATE SET member_id = excluded.member_id, val = excluded.val;'''
+DEL_GUILD_SETTING = 'DELETE FROM omnissiah_guild_settings WHERE setting = ?;'
+
+
+class ChannelIndex:
+    """Guild id -> text channels by name and id, for constant-time routing.
+
+    Kept current by `cogs.ChannelCommands` from the bot's guild and channel
+    events; a guild is re-indexed whenever one of its channels changes.
+    Each guild's configured roll channel is read from the settings table
+    in its zardoz database on first use and cached here.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.log = logging.getLogger('omnissiah.channels')
+        self._by_name = {}
+        self._by_id = {}
+        self._roll_channels = {}
+        self._settings_ready = set()
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __contains__(self, guild_id):
+        return guild_id in self._by_name
+
+    def index_guild(self, guild):
+        by_name = {}
+        # by position, so a duplicated name resolves to the top-most channel
+        for channel in sorted(guild.text_channels, key=lambda c: c.position, reverse=True):
+            by_name[channel.name] = channel
+        self._by_name[guild.id] = by_name
+        self._by_id[guild.id] = {channel.id: channel for channel in guild.text_channels}
+
+    def index_guilds(self, guilds):
+        for guild in guilds:
+            self.index_guild(guild)
+        self.log.info(f'Indexed channels for {len(self)} guilds.')
+
+    def remove_guild(self, guild_id):
+        self._by_name.pop(guild_id, None)
+        self._by_id.pop(guild_id, None)
+        self._roll_channels.pop(guild_id, None)
+        self._settings_ready.discard(guild_id)
+
+    def channel_names(self, guild_id):
+        return list(self._by_name.get(guild_id, ()))
+
+    def get(self, guild_id, name):
+        """The guild's text channel with the given name, or None."""
+        return self._by_name.get(guild_id, {}).get(name)
+
+    def get_by_id(self, guild_id, channel_id):
+        return self._by_id.get(guild_id, {}).get(channel_id)
+
+    async def _guild_settings(self, guild_id):
+        """The guild database's connection, with the settings table in place."""
+        guild_db = await self.db.get_guild_db(guild_id)
+        if guild_id not in self._settings_ready:
+            await guild_db.con.execute(GUILD_SETTINGS_SCHEMA)
+            await guild_db.con.commit()
+            self._settings_ready.add(guild_id)
+        return guild_db.con
+
+    async def _roll_channel_id(self, guild_id):
+        try:
+            return self._roll_channels[guild_id]
+        except KeyError:
+            pass
+        channel_id = None
+        if self.db is not None:
+            con = await self._guild_settings(guild_id)
+            async with con.execute(GET_GUILD_SETTING, (ROLL_CHANNEL_SETTING,)) as cursor:
+                row = await cursor.fetchone()
+            channel_id = None if row is None else row[0]
+        self._roll_channels[guild_id] = channel_id
+        return channel_id
+
+    async def roll_channel(self, guild_id):
+        """Where the guild's rolls are posted: its configured channel if it
+        still exists, otherwise the one named DEFAULT_ROLL_CHANNEL, or None.
+        """
+        if guild_id not in self:
+            return None
+        channel_id = await self._roll_channel_id(guild_id)
+        if channel_id is not None:
+            channel = self.get_by_id(guild_id, channel_id)
+            if channel is not None:
+                return channel
+        return self.get(guild_id, DEFAULT_ROLL_CHANNEL)
+
+    async def set_roll_channel(self, guild_id, channel_id, member_id: int = 0):
+        """Route the guild's rolls to channel_id; None restores the default."""
+        if self.db is not None:
+            con = await self._guild_settings(guild_id)
+            if channel_id is None:
+                await con.execute(DEL_GUILD_SETTING, (ROLL_CHANNEL_SETTING,))
+            else:
+                await con.execute(SET_GUILD_SETTING, (ROLL_CHANNEL_SETTING, member_id, channel_id))
+            await con.commit()
+        self._roll_channels[guild_id] = channel_id
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : cogs.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import typing
+
+from discord import Embed, TextChannel
+from discord.ext import commands
+from disputils import BotEmbedPaginator
+
+from .channels import DEFAULT_ROLL_CHANNEL, ChannelIndex
+from .logging import LoggingMixin
+from zardoz.rolls import SimpleRollConvert
+from .ztable import get_tables
+
+
+class TableConvert(commands.Converter):
+
+    async def convert(self, ctx, argument):
+        try:
+            table = get_tables()[argument]
+        except KeyError:
+            raise commands.BadArgument(f'{argument} is not a valid table.')
+        return table
+
+
+class TableCommands(commands.Cog, LoggingMixin):
+
+    def __init__(self, bot, db):
+        self.bot = bot
+        self.db = db
+        super().__init__()
+
+        self.log.info(f'Loaded tables: {get_tables()}')
+
+    @commands.group(name='table', help='Roll on a table.')
+    async def table(self, ctx):
+        if ctx.invoked_subcommand is not None:
+            return
+
+    @table.command(name='get', help='Get or roll a table entry.')
+    async def table_get(self, ctx,
+                           table: TableConvert = None,
+                           val: typing.Union[int, SimpleRollConvert] = None,
+                           *, cmd=''):
+
+        if table is None:
+            header = '**Available Tables:**'
+            body = []
+            for slug, table in get_tables().items():
+                body.append(f'`{slug:15}` {table.full_name} ({table.game}, {table.book})')
+            body = '\n'.join(body)
+            await ctx.message.reply(f'{header}\n{body}')
+
+            self.log.info(f'/ztable: {table.slug}, {val}')
+            return
+
+        try:
+            if val is None:
+                val, name, effect = table.roll()
+                result = f'{table.die} ⤳ {val}'
+            else:
+                name, effect = table.get(int(val))
+                result = f'{val}'
+        except ValueError:
+            await ctx.message.reply(f'Bad table value. Perils be upon ye.')
+        else:
+            msg = [f'**Roll:** {result}',
+                   f'**Table:** {table.full_name} ({table.game}, {table.book})']
+            if name:
+                msg.append(f'**Name:** {name}')
+            msg.append(f'**Effect:** {effect}')
+
+            await ctx.message.reply('\n'.join(msg))
+
+    @table.command(name='show', help='Show the given table.')
+    async def table_show(self, ctx, table: TableConvert):
+        chunks = [Embed(title=f'{table.full_name} ({table.game}, {table.book})',
+                        description=d) for d in table.paginate()]
+        paginator = BotEmbedPaginator(ctx, chunks)
+        await paginator.run()
+
+
+class ChannelCommands(commands.Cog, LoggingMixin):
+
+    def __init__(self, bot, db, index=None):
+        self.bot = bot
+        self.db = db
+        self.index = ChannelIndex(db) if index is None else index
+        super().__init__()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.index.index_guilds(self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.index.index_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        self.index.index_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.index.remove_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.index.index_guild(channel.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.index.index_guild(channel.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.name != after.name or before.position != after.position:
+            self.index.index_guild(after.guild)
+
+    @commands.group(name='channel', help='Get or set the channel web rolls are posted to.')
+    @commands.guild_only()
+    async def channel(self, ctx):
+        if ctx.invoked_subcommand is not None:
+            return
+
+        channel = await self.index.roll_channel(ctx.guild.id)
+        if channel is None:
+            await ctx.message.reply(f'No roll channel: set one, or create #{DEFAULT_ROLL_CHANNEL}.')
+        else:
+            await ctx.message.reply(f'**Roll channel:** {channel.mention}')
+
+    @channel.command(name='set', help='Post web rolls to the given channel.')
+    @commands.has_guild_permissions(manage_guild=True)
+    async def channel_set(self, ctx, channel: TextChannel):
+        await self.index.set_roll_channel(ctx.guild.id, channel.id, member_id=ctx.author.id)
+        await ctx.message.reply(f'**Set roll channel:** {channel.mention}')
+
+    @channel.command(name='reset', help=f'Post web rolls to #{DEFAULT_ROLL_CHANNEL} again.')
+    @commands.has_guild_permissions(manage_guild=True)
+    async def channel_reset(self, ctx):
+        await self.index.set_roll_channel(ctx.guild.id, None)
+        await ctx.message.reply(f'**Reset roll channel:** #{DEFAULT_ROLL_CHANNEL}')
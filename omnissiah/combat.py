@@ -6,19 +6,24 @@
 # Author : Camille Scott <camille.scott.w@gmail.com>
 # Date   : 25.02.2021
 
-from abc import ABC, abstractmethod
 import collections
-from enum import Enum
-import os
+import collections.abc
+import functools
+
+import numpy as np
 
 from .character import Characteristic
-from .weapons import WeaponClass
-from .utils import GAMEDATA_DIR, reverse_number, d10, d100, Nd10
-from .ztable import RollTable
+from .items import Craftsmanship
+from .rng import get_rng
+from .utils import reverse_number, d100
+from .weapons import PlayerWeaponInstance
+from .ztable import get_tables
 
 
 class CharacteristicBonus:
 
+    __slots__ = ('characteristic', 'bonus')
+
     def __init__(self, characteristic: Characteristic, bonus: int):
         self.characteristic = characteristic
         self.bonus = bonus
@@ -36,8 +41,10 @@ class CharacteristicBonus:
 
 class ExtraHitsBonus:
 
+    __slots__ = ('dos_div',)
+
     def __init__(self, dos_div: int = 1):
-        self.dos_div = 1
+        self.dos_div = dos_div
 
     def __call__(self, ctx, **kwargs):
         ctx.add_hits(ctx.attack_degrees  // self.dos_div)
@@ -48,6 +55,7 @@ class ExtraHitsBonus:
 
 COMBAT_ACTIONS = {}
 
+
 class CombatAction:
 
     def __init__(self, name: str, before_effects = None, after_effects = None, special='', type=1):
@@ -126,17 +134,127 @@ SemiAutoBurst = CombatAction('Semi Auto Burst',
 StandardAttack = CombatAction('Standard Attack',
                               type=.5)
 
+
+class AttackPlan:
+    """The effects of an action set, compiled against a weapon model.
+
+    Characteristic bonuses are folded into per-characteristic totals and
+    extra-hit bonuses into their DoS divisors, so applying the plan skips
+    the per-effect dispatch. Effects of any other type are kept and called
+    as before, after the compiled ones.
+    """
+
+    __slots__ = ('weapon_model', 'actions', 'before_effects', 'after_effects',
+                 'test_bonuses', 'test_modifiers', 'characteristic', 'test_bonus',
+                 'test_modifier', 'hits_max', 'dos_divs', 'before_dynamic',
+                 'after_dynamic')
+
+    def __init__(self, weapon_model, actions):
+        self.weapon_model = weapon_model
+        self.actions = frozenset(actions)
+        self.before_effects = tuple(effect for action in self.actions
+                                    for effect in action.before_effects)
+        self.after_effects = tuple(effect for action in self.actions
+                                   for effect in action.after_effects)
+
+        test_bonuses = collections.defaultdict(list)
+        before_dynamic = []
+        for effect in self.before_effects:
+            if type(effect) is CharacteristicBonus:
+                test_bonuses[effect.characteristic].append(effect.bonus)
+            else:
+                before_dynamic.append(effect)
+        self.test_bonuses = {characteristic: tuple(bonuses)
+                             for characteristic, bonuses in test_bonuses.items()}
+        self.test_modifiers = {characteristic: sum(bonuses)
+                               for characteristic, bonuses in test_bonuses.items()}
+        self.before_dynamic = tuple(before_dynamic)
+
+        dos_divs = []
+        after_dynamic = []
+        for effect in self.after_effects:
+            if type(effect) is ExtraHitsBonus:
+                dos_divs.append(effect.dos_div)
+            else:
+                after_dynamic.append(effect)
+        self.dos_divs = tuple(dos_divs)
+        self.after_dynamic = tuple(after_dynamic)
+
+        weapon = PlayerWeaponInstance(weapon_model, craftsmanship=Craftsmanship.Common)
+        self.hits_max = attack_hits_max(weapon, self.actions)
+        # the bonuses for the characteristic this weapon tests against
+        self.characteristic = weapon.test_characteristic
+        self.test_bonus = self.test_bonuses.get(self.characteristic, ())
+        self.test_modifier = self.test_modifiers.get(self.characteristic, 0)
+
+    def extra_hits(self, degrees):
+        hits = 0
+        for dos_div in self.dos_divs:
+            hits += degrees // dos_div
+        return hits
+
+    def apply_before(self, ctx):
+        if ctx.characteristic is self.characteristic:
+            if self.test_bonus:
+                ctx.add_test_bonuses(self.test_bonus, self.test_modifier)
+        else:
+            bonuses = self.test_bonuses.get(ctx.characteristic)
+            if bonuses:
+                ctx.add_test_bonuses(bonuses, self.test_modifiers[ctx.characteristic])
+        if self.before_dynamic:
+            for effect in self.before_dynamic:
+                effect(ctx)
+
+    def apply_after(self, ctx):
+        if self.dos_divs:
+            ctx.hits_extra += self.extra_hits(ctx.attack_degrees)
+        if self.after_dynamic:
+            for effect in self.after_dynamic:
+                effect(ctx)
+
+
+@functools.lru_cache(maxsize=1024)
+def get_attack_plan(weapon_model, actions: frozenset):
+    """The compiled AttackPlan for a weapon model and set of actions."""
+    return AttackPlan(weapon_model, actions)
+
+
+def instance_attack_plan(weapon_instance, actions: frozenset):
+    """`get_attack_plan`, memoized on the weapon instance.
+
+    Saves hashing the whole weapon model on every attack.
+    """
+    try:
+        return weapon_instance.attack_plans[actions]
+    except KeyError:
+        plan = get_attack_plan(weapon_instance.weapon_model, actions)
+        weapon_instance.attack_plans[actions] = plan
+        return plan
+
+
 class HitLocTable:
 
-    def __init__(self):
+    # follow-up sequences repeat their last entry past this many hits
+    SEQUENCE_LENGTH = 6
 
-        self.base = RollTable(os.path.join(GAMEDATA_DIR, 'tables', 'hit_loc.yaml'))
+    def __init__(self, base=None):
+
+        self.base = get_tables()['rt_hit_loc'] if base is None else base
         self.table = {'Head': ['Head', 'Arm', 'Body', 'Arm', 'Body'],
                       'Arm':  ['Arm', 'Body', 'Head', 'Body', 'Arm'],
                       'Body': ['Body', 'Arm', 'Head', 'Arm', 'Body'],
                       'Leg':  ['Leg', 'Body', 'Arm', 'Head', 'Body']}
 
-    def get_location(self, init_roll, n_hits):
+        # precompute the full location sequence for every d100 attack roll
+        self.sequences = [None] + [tuple(self._compute_location(roll, self.SEQUENCE_LENGTH))
+                                   for roll in range(1, 101)]
+        self.location_names = sorted(set(loc for seq in self.sequences[1:] for loc in seq))
+        codes = {name: code for code, name in enumerate(self.location_names)}
+        self.location_codes = np.full((101, self.SEQUENCE_LENGTH), -1, dtype=np.int8)
+        for roll in range(1, 101):
+            self.location_codes[roll] = [codes[loc] for loc in self.sequences[roll]]
+
+    def _compute_location(self, init_roll, n_hits):
         table_val = reverse_number(init_roll)
         locs = []
         _, init_loc = self.base.get(table_val)
@@ -156,12 +274,51 @@ class HitLocTable:
                 locs.extend([subtable[-1]] * (x_hits - len(subtable)))
 
         return locs
-    
-HIT_LOC_TABLE = HitLocTable()
+
+    def get_location(self, init_roll, n_hits):
+        try:
+            seq = self.sequences[init_roll]
+        except (IndexError, TypeError):
+            seq = None
+        if seq is None:
+            return self._compute_location(init_roll, n_hits)
+
+        if n_hits <= len(seq):
+            return list(seq[:max(n_hits, 1)])
+        return list(seq) + [seq[-1]] * (n_hits - len(seq))
+
+    def get_locations_batch(self, attack_rolls, n_hits):
+        """Map arrays of d100 attack rolls and hit counts to location codes.
+
+        Returns an int8 array of shape (len(attack_rolls), max(n_hits)),
+        indexing into location_names, padded with -1 past each trial's hits.
+        """
+        attack_rolls = np.asarray(attack_rolls)
+        n_hits = np.asarray(n_hits)
+        width = int(n_hits.max()) if len(n_hits) else 0
+        hit_idx = np.arange(width)
+        columns = np.minimum(hit_idx, self.SEQUENCE_LENGTH - 1)
+        codes = self.location_codes[attack_rolls[:, np.newaxis], columns[np.newaxis, :]]
+        return np.where(hit_idx[np.newaxis, :] < n_hits[:, np.newaxis], codes, -1).astype(np.int8)
+
+
+@functools.lru_cache(maxsize=None)
+def get_hit_loc_table():
+    """The hit location table, built on first use."""
+    return HitLocTable()
+
+
+def __getattr__(name):
+    # HIT_LOC_TABLE used to be built at import; keep it as a lazy alias
+    if name == 'HIT_LOC_TABLE':
+        return get_hit_loc_table()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 class DamageRoll:
 
+    __slots__ = ('bonus', 'fury_bonus', 'dice', 'die')
+
     def __init__(self, dice, bonus, die='d10'):
         self.bonus = bonus
         self.fury_bonus = 0
@@ -173,7 +330,8 @@ class DamageRoll:
             self.dice[self.dice.index(min(self.dice))] = replacement
 
     def __int__(self):
-        return sum(self.dice) + self.bonus + self.fury_bonus
+        # a negative damage bonus can't take a hit below 0
+        return max(sum(self.dice) + self.bonus + self.fury_bonus, 0)
 
     def add_fury(self, extra_fury):
         self.fury_bonus += extra_fury
@@ -190,14 +348,23 @@ class DamageRoll:
 
 class AttackContext:
 
-    def __init__(self, weapon, test_base, target_range, actions = [], quiet: bool = True):
+    __slots__ = ('characteristic', 'test_base', 'weapon', '_test_bonus',
+                 '_test_bonus_total', 'target_range', 'hits_base', 'hits_extra',
+                 'hits_max', 'actions', 'attack_roll', 'attack_degrees', 'damage',
+                 'damage_bonus', 'damage_rolls')
+
+    def __init__(self, weapon, test_base, target_range, actions = [], quiet: bool = True,
+                 plan = None):
         self.characteristic = weapon.test_characteristic
         self.test_base = test_base
         self.weapon = weapon
         self._test_bonus = []
+        self._test_bonus_total = 0
         self.target_range = target_range
         self.hits_base = 0
         self.hits_extra = 0
+        self.hits_max = plan.hits_max if plan is not None \
+                        else attack_hits_max(weapon, actions)
         self.actions = actions
 
         self.attack_roll = 0
@@ -209,6 +376,11 @@ class AttackContext:
 
     def add_test_bonus(self, extra):
         self._test_bonus.append(extra)
+        self._test_bonus_total += extra
+
+    def add_test_bonuses(self, extras, total):
+        self._test_bonus.extend(extras)
+        self._test_bonus_total += total
 
     def add_hits(self, extra):
         self.hits_extra += extra
@@ -218,7 +390,7 @@ class AttackContext:
 
     @property
     def test_bonus(self):
-        return min(60, sum(self._test_bonus))
+        return min(60, self._test_bonus_total)
 
     @property
     def test_str(self):
@@ -235,15 +407,7 @@ class AttackContext:
 
     @property
     def hits(self):
-        if SemiAutoBurst in self.actions:
-            hits_max = self.weapon.rof_semi
-        elif FullAutoBurst in self.actions:
-            hits_max = self.weapon.rof_auto
-        elif self.weapon.weapon_class == WeaponClass.Melee:
-            hits_max = 1
-        else:
-            hits_max = int(self.weapon.rof_single)
-        return min(self.hits_base + self.hits_extra, hits_max)
+        return min(self.hits_base + self.hits_extra, self.hits_max)
 
     @property
     def success(self):
@@ -262,42 +426,85 @@ class AttackContext:
     @property
     def locations(self):
         if self.attack_roll:
-            return HIT_LOC_TABLE.get_location(self.attack_roll, self.hits)
+            return get_hit_loc_table().get_location(self.attack_roll, self.hits)
         else:
             return []
 
 
-def player_attack_test(ctx, quiet: bool = True):
+def attack_hits_max(weapon, actions):
+    """Maximum number of hits the weapon can land with the given actions."""
+    if SemiAutoBurst in actions:
+        return weapon.rof_semi
+    elif FullAutoBurst in actions:
+        return weapon.rof_auto
+    else:
+        return weapon.single_hits_max
+
+
+def range_modifier(weapon, target_range):
+    """Test modifier and description for firing at target_range.
+
+    Melee and thrown weapons get no range modifier: (0, None).
+    """
+    if weapon.melee_or_thrown:
+        return 0, None
+
+    if target_range <= 2:
+        # point blank
+        return 30, 'Point blank: +30'
+    elif target_range <= weapon.short_range:
+        # short range
+        return 10, 'Close: +10'
+    elif target_range >= weapon.extreme_range:
+        # extreme range
+        return -30, 'Extreme: -30'
+    elif target_range >= weapon.long_range:
+        # long range
+        return -10, 'Long: -10'
+    else:
+        return 0, 'Normal range.'
+
+
+def validate_attack(weapon_instance, actions, target_range):
+    """Sanitize the attack actions into a frozenset and check them against the weapon.
+
+    Raises ValueError if the weapon can't perform the actions or reach the target.
+    """
+    if actions is None:
+        actions = frozenset()
+    elif not isinstance(actions, collections.abc.Collection):
+        actions = frozenset([actions])
+    else:
+        actions = frozenset(actions)
+
+    assert len(actions) < 3
+
+    if SemiAutoBurst in actions and not weapon_instance.rof_semi:
+        raise ValueError(f'{weapon_instance.name} does not support semi-auto')
+    if FullAutoBurst in actions and not weapon_instance.rof_auto:
+        raise ValueError(f'{weapon_instance.name} does not support full-auto')
+    if target_range > weapon_instance.range * 4:
+        raise ValueError(f'{weapon_instance.name} cannot fire more than {weapon_instance.range * 4}m')
+
+    return actions
+
+
+def player_attack_test(ctx, quiet: bool = True, rng=None):
 
     def _print(*args, **kwargs):
         if not quiet:
             print(*args, **kwargs)
 
-    if ctx.weapon.weapon_class not in [WeaponClass.Melee, WeaponClass.Thrown]:
-        # figure ranges
-        if ctx.target_range <= 2:
-            # point blank
-            _print('Point blank: +30')
-            ctx.add_test_bonus(30)
-        elif ctx.target_range <= (ctx.weapon.range / 2):
-            # short range
-            ctx.add_test_bonus(10)
-            _print('Close: +10')
-        elif ctx.target_range >= (ctx.weapon.range * 3):
-            # extreme range
-            ctx.add_test_bonus(-30)
-            _print('Extreme: -30')
-        elif ctx.target_range >= (ctx.weapon.range * 2):
-            # long range
-            ctx.add_test_bonus(-10)
-            _print('Long: -10')
-        else:
-            _print('Normal range.')
+    bonus, msg = range_modifier(ctx.weapon, ctx.target_range)
+    if bonus:
+        ctx.add_test_bonus(bonus)
+    if msg:
+        _print(msg)
 
     _print(f'final test: {ctx.test_base} + {ctx.test_bonus}')
 
     # roll it
-    ctx.attack_roll = d100()
+    ctx.attack_roll = d100(rng)
     delta = abs(ctx.test - ctx.attack_roll)
     ctx.attack_degrees = delta // 10
 
@@ -308,7 +515,7 @@ def player_attack_test(ctx, quiet: bool = True):
 
 def player_attack(weapon_instance, char_val, char_bonus = None,
                   actions=None, misc_bonus=0, target_range: int = 10,
-                  quiet: bool = True):
+                  quiet: bool = True, rng=None):
 
     def _print(*args, **kwargs):
         if not quiet:
@@ -318,37 +525,27 @@ def player_attack(weapon_instance, char_val, char_bonus = None,
     # Sanitize parameters
     #
 
-    if actions is None:
-        actions = []
-    elif not isinstance(actions, collections.Sequence):
-        actions = set([actions])
-    else:
-        actions = set(actions)
-
-    assert len(actions) < 3
-
-    if SemiAutoBurst in actions and not weapon_instance.rof_semi:
-        raise ValueError(f'{weapon_instance.name} does not support semi-auto')
-    if FullAutoBurst in actions and not weapon_instance.rof_auto:
-        raise ValueError(f'{weapon_instance.name} does not support full-auto')
-    if target_range / weapon_instance.range > 4:
-        raise ValueError(f'{weapon_instance.name} cannot fire more than {weapon_instance.range * 4}m')
+    actions = validate_attack(weapon_instance, actions, target_range)
 
     if char_bonus is None:
         char_bonus = char_val // 10
+    if rng is None:
+        rng = get_rng()
 
     # setup the attack context
-    ctx = AttackContext(weapon_instance, char_val, target_range, actions=actions, quiet=quiet)
+    plan = instance_attack_plan(weapon_instance, actions)
+    ctx = AttackContext(weapon_instance, char_val, target_range, actions=actions,
+                        quiet=quiet, plan=plan)
 
     # apply characteristic bonuses
-    for action in ctx.actions:
-        for bonus in action.before_effects:
-            bonus(ctx)
+    plan.apply_before(ctx)
+    if not quiet:
+        for bonus in plan.before_effects:
             _print(bonus)
     # now we'd apply specials from the weapon itself in the same way
 
     # test for hit
-    player_attack_test(ctx, quiet=quiet)
+    player_attack_test(ctx, quiet=quiet, rng=rng)
 
     if not ctx.success:
         # damage, effective_char, degrees, hits, locations, message
@@ -358,9 +555,9 @@ def player_attack(weapon_instance, char_val, char_bonus = None,
         ctx.hits_base = 1
 
     # apply action after-test bonuses
-    for action in ctx.actions:
-        for bonus in action.after_effects:
-            bonus(ctx)
+    plan.apply_after(ctx)
+    if not quiet:
+        for bonus in plan.after_effects:
             _print(bonus)
 
     _print(f'hits after bonus: {ctx.hits}')
@@ -369,10 +566,11 @@ def player_attack(weapon_instance, char_val, char_bonus = None,
     # for multiple hits 
 
     # roll for damage
+    damage_dice, damage_bonus = weapon_instance.damage_roll, weapon_instance.damage_bonus
     for hit_counter in range(ctx.hits):
         _print(f'roll hit {hit_counter + 1}')
 
-        roll = DamageRoll(Nd10(n=weapon_instance.damage_roll), weapon_instance.damage_bonus)
+        roll = DamageRoll(rng.Nd10(damage_dice), damage_bonus)
 
         _print(f'initial damage roll: {roll.dice}')
 
@@ -388,10 +586,10 @@ def player_attack(weapon_instance, char_val, char_bonus = None,
 
         fury = 10 in roll.dice
         while (fury):
-            fury_roll = d100() <= ctx.test
+            fury_roll = rng.d100() <= ctx.test
 
             if fury_roll:
-                fury_damage = d10()
+                fury_damage = rng.d10()
 
                 _print(f'fury! rolled {fury_damage}')
 
@@ -400,7 +598,7 @@ def player_attack(weapon_instance, char_val, char_bonus = None,
             else:
                 fury = False
 
-    if weapon_instance.weapon_class in [WeaponClass.Melee, WeaponClass.Thrown]:
+    if weapon_instance.melee_or_thrown:
         ctx.damage_bonus += char_bonus
 
     _print(f'final damage: {ctx.total_damage}')
@@ -6,73 +6,356 @@
 # Author : Camille Scott <camille.scott.w@gmail.com>
 # Date   : 27.08.2021
 
+from collections import OrderedDict
+import asyncio
+import base64
 import functools
-import inspect
+import json
 import logging
-import types
 
 from quart import current_app
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, DeleteMany, IndexModel, InsertOne
 
+from .cache import LRUCache
 from .utils import is_iterable
 
 
+ARMOURY_PLAYER_WEAPONS = 'armoury-player-weapons'
+
+# passed through quart_motor to the AsyncIOMotorClient; the app and the bot
+# share one loop, so a modest pool is plenty and idle sockets are reaped
+MONGO_CLIENT_OPTIONS = {'maxPoolSize': 32,
+                        'minPoolSize': 2,
+                        'maxIdleTimeMS': 5 * 60 * 1000,
+                        'serverSelectionTimeoutMS': 5000}
+
+# armoury fields the listing filters on by equality
+ARMOURY_FILTERS = ('weapon_class', 'weapon_type', 'damage_type')
+# armoury listing orders; each ends in _id so the order is total, which
+# keyset pagination needs
+ARMOURY_SORTS = {
+    'name': [('name', ASCENDING), ('_id', ASCENDING)],
+    'damage': [('damage_roll', DESCENDING), ('damage_bonus', DESCENDING), ('_id', DESCENDING)],
+}
+ARMOURY_PAGE_SIZE = 25
+
+# collection -> indexes created at startup. The armoury is always read by
+# user, listed by name or by damage; each listing has one index on user_id
+# followed by its full sort, so pages come off the index in order, without
+# a sort stage. The ARMOURY_FILTERS fields and min_damage are checked on
+# the documents that scan fetches, which never leave the user's own
+# weapons; more indexes would only slow every import's bulk insert.
+INDEXES = {
+    ARMOURY_PLAYER_WEAPONS: [IndexModel([('user_id', ASCENDING)] + spec, name=f'user_id_{sort}_id')
+                             for sort, spec in ARMOURY_SORTS.items()],
+}
+# collection -> names of indexes INDEXES once created; ensure_indexes drops them
+SUPERSEDED_INDEXES = {
+    ARMOURY_PLAYER_WEAPONS: ['user_id_name', 'user_id_name_id_damage',
+                             *(f'user_id_{field}_{suffix}' for field in ARMOURY_FILTERS
+                               for suffix in ('name_id', 'name_id_damage', 'damage_id'))],
+}
+
+# armoury documents are read back into PlayerWeapons; the owner is implied
+WEAPON_PROJECTION = {'user_id': False}
+# exported documents are bare PlayerWeapon.to_dict layouts
+EXPORT_PROJECTION = {'_id': False, 'user_id': False}
+# documents per round trip when streaming an export
+EXPORT_BATCH_SIZE = 200
+
+
 def use_mongo(func):
+    """Pass the app's database as the first argument, unless given as db=.
+
+    Works for coroutine and async generator functions alike: the wrapper
+    returns whatever func returns, to be awaited or iterated.
+    """
 
     @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        log = logging.getLogger() 
-        log.info(f'wrapper: {func}')
-
-        db = kwargs.get('db', current_app.mongo.db)
- 
-        func_instance = func(db, *args, **kwargs)
-        if isinstance(func_instance, types.AsyncGeneratorType):
-            log.info(f'{func}: AsyncGeneratorType')
-            async def inner():
-                async for result in func_instance:
-                    yield result
-        else:
-            log.info(f'{func}: awaitable')
-            async def inner():
-                return await func_instance
-        return inner()
+    def wrapper(*args, db=None, **kwargs):
+        return func(current_app.mongo.db if db is None else db, *args, **kwargs)
 
     return wrapper
 
 
+async def ensure_indexes(db):
+    """Create any missing INDEXES and drop the SUPERSEDED_INDEXES still there.
+
+    Existing INDEXES are left as they are.
+    """
+    log = logging.getLogger()
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in SUPERSEDED_INDEXES.get(collection, ()):
+            if name in existing:
+                await db[collection].drop_index(name)
+                log.info(f'Dropped superseded index {name} on {collection}')
+        names = await db[collection].create_indexes(indexes)
+        log.info(f'Indexes on {collection}: {names}')
+
+
 @use_mongo
-async def query_armoury_player_weapons(db, user_id, **filters):
-    from .weapons import PlayerWeapon
+async def query_armoury_player_weapons(db, user_id, projection=WEAPON_PROJECTION, **filters):
+    from .weapons import get_weapon_registry
 
-    weapons = db['armoury-player-weapons']
+    registry = get_weapon_registry()
+    weapons = db[ARMOURY_PLAYER_WEAPONS]
     query = {**{'user_id': int(user_id)}, **filters}
-    cursor = weapons.find(query)
-    
+    cursor = weapons.find(query, projection).sort('name', ASCENDING)
+
     async for weapon_data in cursor:
         _id = weapon_data.pop('_id')
-        yield PlayerWeapon.from_dict(weapon_data), _id
+        yield registry.from_dict(weapon_data), _id
+
+
+def encode_page_cursor(document, sort: str = 'name') -> str:
+    """An opaque token for the position just past document in the sort order.
+
+    A missing sort key is encoded as null, which is where Mongo sorts it.
+    """
+    values = [document.get(key) for key, _ in ARMOURY_SORTS[sort]]
+    values[-1] = str(values[-1])
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_page_cursor(token: str, sort: str = 'name'):
+    """The sort key values in token; raises ValueError if it's malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(ARMOURY_SORTS[sort]):
+            raise ValueError
+        values[-1] = ObjectId(values[-1])
+    except (ValueError, TypeError, InvalidId, UnicodeError):
+        raise ValueError(f'Invalid page cursor: {token!r}')
+    return values
+
+
+def keyset_filter(sort: str, values):
+    """Match the documents after values in the sort order.
+
+    For keys k1..kn that's an $or of k1 beyond v1, or k1 equal and k2
+    beyond v2, and so on: each branch is an equality prefix and a range on
+    the listing's index.
+
+    Null sorts before every other value, and a range compared against null
+    matches nothing, so beyond a null is any non-null value ascending, and
+    nothing descending.
+    """
+    spec = ARMOURY_SORTS[sort]
+    branches = []
+    for i, (key, direction) in enumerate(spec):
+        branch = {k: v for (k, _), v in zip(spec[:i], values)}
+        if values[i] is not None:
+            branch[key] = {'$gt' if direction == ASCENDING else '$lt': values[i]}
+        elif direction == ASCENDING:
+            branch[key] = {'$ne': None}
+        else:
+            continue
+        branches.append(branch)
+    return {'$or': branches}
 
 
 @use_mongo
-async def add_armoury_player_weapons(db, user_id, new_weapons):
-    new_weapons = [new_weapons] if not is_iterable(new_weapons) else new_weapons
-    data = (dict(user_id=int(user_id), **w.to_dict()) for w in new_weapons)
+async def page_armoury_player_weapons(db, user_id, filters=None, sort: str = 'name',
+                                      after: str = None, limit: int = ARMOURY_PAGE_SIZE):
+    """One page of the user's armoury: ([(PlayerWeapon, _id)], next cursor or None).
 
-    weapons = db['armoury-player-weapons']
-    result = await weapons.insert_many(data)
-    
-    return result
+    filters maps ARMOURY_FILTERS fields to a value, plus min_damage for a
+    floor on damage_roll. after is the cursor from the previous page. Pages
+    are read off the sort's index starting from the cursor, so a deep page
+    doesn't re-read the ones before it.
+    """
+    from .weapons import get_weapon_registry
+
+    if sort not in ARMOURY_SORTS:
+        raise ValueError(f'Unknown sort: {sort}')
+    query = {'user_id': int(user_id)}
+    for field, value in (filters or {}).items():
+        if field == 'min_damage':
+            query['damage_roll'] = {'$gte': int(value)}
+        elif field in ARMOURY_FILTERS:
+            query[field] = value
+        else:
+            raise ValueError(f'Unknown filter: {field}')
+    if after is not None:
+        query = {'$and': [query, keyset_filter(sort, decode_page_cursor(after, sort))]}
+
+    registry = get_weapon_registry()
+    cursor = db[ARMOURY_PLAYER_WEAPONS].find(query, WEAPON_PROJECTION) \
+                                       .sort(ARMOURY_SORTS[sort]).limit(limit + 1)
+    documents = await cursor.to_list(length=limit + 1)
+
+    next_cursor = encode_page_cursor(documents[limit - 1], sort) if len(documents) > limit else None
+    weapons = []
+    for document in documents[:limit]:
+        _id = document.pop('_id')
+        weapons.append((registry.from_dict(document), _id))
+    return weapons, next_cursor
 
 
 @use_mongo
-async def delete_armoury_player_weapons(db, user_id, weapon_ids):
-    weapon_ids = [ObjectId(weapon_ids)] if not is_iterable(weapon_ids) else \
-                 [ObjectId(_id) for _id in weapon_ids]
-    query = {'user_id': user_id, '_id': { '$in': weapon_ids }}
-    
-    weapons = db['armoury-player-weapons']
-    result = await weapons.delete_many(query)
+async def stream_armoury_player_weapon_documents(db, user_id, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield the user's raw weapon documents by name, batch_size per round trip."""
+    weapons = db[ARMOURY_PLAYER_WEAPONS]
+    cursor = weapons.find({'user_id': int(user_id)}, EXPORT_PROJECTION,
+                          batch_size=batch_size).sort('name', ASCENDING)
+    async for document in cursor:
+        yield document
+
+
+@use_mongo
+async def insert_armoury_player_weapons(db, user_id, new_weapons):
+    """Insert a batch of PlayerWeapons with one unordered insert_many."""
+    user_id = int(user_id)
+    weapons = db[ARMOURY_PLAYER_WEAPONS]
+    return await weapons.insert_many([dict(user_id=user_id, **w.to_dict()) for w in new_weapons],
+                                     ordered=False)
+
+
+@use_mongo
+async def write_armoury_player_weapons(db, user_id, add=(), delete=()):
+    """Add the PlayerWeapons in add and delete the ids in delete, in one round trip.
+
+    The operations are unordered, so one failed insert doesn't stop the rest.
+    """
+    user_id = int(user_id)
+    operations = [InsertOne(dict(user_id=user_id, **w.to_dict())) for w in add]
+    if delete:
+        operations.append(DeleteMany({'user_id': user_id,
+                                      '_id': {'$in': [ObjectId(_id) for _id in delete]}}))
+    if not operations:
+        return None
+
+    weapons = db[ARMOURY_PLAYER_WEAPONS]
+    return await weapons.bulk_write(operations, ordered=False)
+
+
+async def add_armoury_player_weapons(user_id, new_weapons, **kwargs):
+    new_weapons = [new_weapons] if not is_iterable(new_weapons) else new_weapons
+    return await write_armoury_player_weapons(user_id, add=new_weapons, **kwargs)
+
+
+async def delete_armoury_player_weapons(user_id, weapon_ids, **kwargs):
+    weapon_ids = [weapon_ids] if not is_iterable(weapon_ids) else weapon_ids
+    return await write_armoury_player_weapons(user_id, delete=weapon_ids, **kwargs)
+
+
+class ArmouryCache:
+    """Per-user cache of deserialized armoury weapons, in front of Mongo.
+
+    Each user's (PlayerWeapon, _id) list is kept for ttl seconds, for up to
+    maxsize users, as are the last pages_per_user listing pages they
+    viewed. Writes made through the cache invalidate the user's entry and
+    pages; a read that raced a write doesn't store what it read.
+    Concurrent misses for one user share a single query.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 5 * 60, pages_per_user: int = 32):
+        self.entries = LRUCache(maxsize=maxsize, ttl=ttl)
+        # user_id -> {(filters, sort, after, limit): page}, oldest page first.
+        # invalidate drops the whole dict, so a page load that started
+        # before then stores into one nobody reads any more.
+        self.pages = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.pages_per_user = pages_per_user
+        self.page_hits = 0
+        self.page_misses = 0
+        # user_id -> the task loading their armoury; only while it runs
+        self._loading = {}
+        # loads that an invalidate overtook; only while they run
+        self._stale = set()
+
+    async def _load(self, user_id, db=None):
+        weapons = tuple([(weapon, _id) async for weapon, _id in
+                         query_armoury_player_weapons(user_id, db=db)])
+        if asyncio.current_task() not in self._stale:
+            self.entries.put(user_id, weapons)
+        return weapons
+
+    async def get_player_weapons(self, user_id, db=None):
+        """The user's armoury as a tuple of (PlayerWeapon, _id), sorted by name."""
+        user_id = int(user_id)
+        weapons = self.entries.get(user_id)
+        if weapons is not None:
+            return weapons
+
+        task = self._loading.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(user_id, db=db))
+            task.add_done_callback(functools.partial(self._loaded, user_id))
+            self._loading[user_id] = task
+        # shielded, so one cancelled page view doesn't fail the others waiting
+        return await asyncio.shield(task)
+
+    def _loaded(self, user_id, task):
+        self._stale.discard(task)
+        if self._loading.get(user_id) is task:
+            del self._loading[user_id]
+
+    async def get_player_weapon(self, user_id, weapon_id, db=None):
+        """The user's PlayerWeapon with the given _id, or None."""
+        weapon_id = str(weapon_id)
+        for weapon, _id in await self.get_player_weapons(user_id, db=db):
+            if str(_id) == weapon_id:
+                return weapon
+        return None
+
+    async def get_player_weapon_page(self, user_id, filters=None, sort: str = 'name',
+                                     after: str = None, limit: int = ARMOURY_PAGE_SIZE, db=None):
+        """A page of `page_armoury_player_weapons`, as a (weapons tuple, cursor) pair."""
+        user_id = int(user_id)
+        key = (tuple(sorted((filters or {}).items())), sort, after, limit)
+        pages = self.pages.get(user_id)
+        if pages is None:
+            pages = OrderedDict()
+            self.pages.put(user_id, pages)
+        try:
+            page = pages[key]
+        except KeyError:
+            pass
+        else:
+            pages.move_to_end(key)
+            self.page_hits += 1
+            return page
+
+        self.page_misses += 1
+        weapons, next_cursor = await page_armoury_player_weapons(user_id, filters=filters, sort=sort,
+                                                                 after=after, limit=limit, db=db)
+        page = tuple(weapons), next_cursor
+        pages[key] = page
+        while len(pages) > self.pages_per_user:
+            pages.popitem(last=False)
+        return page
+
+    def invalidate(self, user_id):
+        user_id = int(user_id)
+        task = self._loading.pop(user_id, None)
+        if task is not None:
+            # it may have read before the write; later reads start afresh
+            self._stale.add(task)
+        self.entries.pop(user_id)
+        self.pages.pop(user_id)
+
+    async def add_player_weapons(self, user_id, new_weapons, **kwargs):
+        try:
+            return await add_armoury_player_weapons(user_id, new_weapons, **kwargs)
+        finally:
+            self.invalidate(user_id)
+
+    async def delete_player_weapons(self, user_id, weapon_ids, **kwargs):
+        try:
+            return await delete_armoury_player_weapons(user_id, weapon_ids, **kwargs)
+        finally:
+            self.invalidate(user_id)
 
-    return result
+    def clear(self):
+        self._stale.update(self._loading.values())
+        self._loading.clear()
+        self.entries.clear()
+        self.pages.clear()
 
+    @property
+    def stats(self):
+        return {**self.entries.stats,
+                'pages': {'users': len(self.pages), 'hits': self.page_hits, 'misses': self.page_misses}}
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : exact.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from dataclasses import dataclass
+import functools
+
+import numpy as np
+
+from .batch import prepare_batch_attack
+from .weapons import get_weapon_registry
+
+
+# fury chains are unbounded; stop once a link is less likely than this
+FURY_TOLERANCE = 1e-14
+
+
+@dataclass(frozen=True)
+class AttackDistribution:
+
+    test: int
+    hit_probability: float
+    hits_pmf: np.ndarray
+    damage_pmf: np.ndarray
+
+    @property
+    def truncated_mass(self):
+        """Probability lost from cutting off the fury tail."""
+        return max(0.0, 1.0 - self.damage_pmf.sum())
+
+    @property
+    def success_rate(self):
+        """Probability that the attack does any damage."""
+        return float(self.damage_pmf[1:].sum())
+
+    @property
+    def mean(self):
+        return float(np.dot(np.arange(len(self.damage_pmf)), self.damage_pmf))
+
+    @property
+    def variance(self):
+        values = np.arange(len(self.damage_pmf))
+        return float(np.dot(values ** 2, self.damage_pmf) - self.mean ** 2)
+
+    def quantile(self, q, damaging_only=True):
+        """Smallest damage value whose cumulative probability reaches q.
+
+        With damaging_only, the quantile is taken over attacks that did damage.
+        """
+        pmf = self.damage_pmf.copy()
+        if damaging_only:
+            pmf[0] = 0.0
+        total = pmf.sum()
+        if total == 0:
+            return 0
+        cdf = np.cumsum(pmf) / total
+        return int(min(np.searchsorted(cdf, q), len(pmf) - 1))
+
+    @property
+    def median_damage(self):
+        return self.quantile(.5)
+
+
+def fury_pmf(test):
+    """Distribution of the extra damage from a fury chain that has triggered.
+
+    Each link confirms with d100 <= test, then adds a d10; a 10 continues
+    the chain.
+    """
+    q = min(max(test, 0), 100) / 100
+    link = q / 10
+    pmf = [1.0 - q]
+    chain = 1.0
+    while chain > FURY_TOLERANCE:
+        # confirmed, rolled 1-9: chain ends
+        pmf.extend([chain * q / 10] * 9)
+        chain *= link
+        # confirmed and rolled 10, then failed the next confirmation
+        pmf.append(chain * (1.0 - q))
+    return np.array(pmf)
+
+
+@functools.lru_cache(maxsize=None)
+def dice_states(n_dice):
+    """Joint distribution of sum, lowest die and number of 10s (capped at 2).
+
+    Returns an array indexed as [sum, lowest, n_tens] for n_dice d10.
+    """
+    states = np.zeros((10 * n_dice + 1, 11, 3))
+    for value in range(1, 11):
+        states[value, value, int(value == 10)] = .1
+
+    for _ in range(n_dice - 1):
+        rolled = np.zeros_like(states)
+        for value in range(1, 11):
+            tens = 1 if value == 10 else 0
+            for lowest in range(1, 11):
+                new_lowest = min(lowest, value)
+                for n_tens in range(3):
+                    rolled[value:, new_lowest, min(n_tens + tens, 2)] += \
+                        states[:-value, lowest, n_tens] * .1
+        states = rolled
+    return states
+
+
+def _add_pmf(total, pmf, weight):
+    if len(pmf) > len(total):
+        total = np.concatenate([total, np.zeros(len(pmf) - len(total))])
+    total[:len(pmf)] += weight * pmf
+    return total
+
+
+def _shift_pmf(pmf, offset):
+    """The distribution of max(X + offset, 0) for X distributed as pmf."""
+    if offset >= 0:
+        return np.concatenate([np.zeros(offset), pmf])
+    shifted = pmf[-offset:].copy()
+    if len(shifted) == 0:
+        return np.array([pmf.sum()])
+    shifted[0] += pmf[:-offset].sum()
+    return shifted
+
+
+def hit_damage_pmf(n_dice, damage_bonus, degrees, fury):
+    """Damage distribution of a single hit, with the lowest die replaced by DoS.
+
+    A negative damage_bonus can't take a hit below 0 damage.
+    """
+    states = dice_states(n_dice)
+    size = 10 * n_dice + max(degrees, 10) + 1
+    plain = np.zeros(size)
+    furious = np.zeros(size)
+
+    for lowest in range(1, 11):
+        replaced = lowest < degrees
+        for n_tens in range(3):
+            column = states[:, lowest, n_tens]
+            if not column.any():
+                continue
+            shift = degrees - lowest if replaced else 0
+            tens_left = n_tens - (1 if replaced and lowest == 10 else 0)
+            has_ten = tens_left > 0 or (replaced and degrees == 10)
+            target = furious if has_ten else plain
+            target[shift:shift + len(column)] += column
+
+    pmf = _add_pmf(plain, np.convolve(furious, fury), 1.0)
+    return _shift_pmf(pmf, damage_bonus)
+
+
+def attack_distribution(weapon_instance, char_val, char_bonus=None,
+                        actions=None, target_range: int = 10):
+    """Exact hit and damage distributions for a single attack.
+
+    Solves the rules of `combat.player_attack` by convolving discrete
+    distributions instead of sampling. The fury tail is truncated once a
+    chain link is less likely than FURY_TOLERANCE.
+    """
+    if char_bonus is None:
+        char_bonus = char_val // 10
+
+    test, hits_by_degrees = prepare_batch_attack(weapon_instance, char_val,
+                                                 actions=actions,
+                                                 target_range=target_range)
+    melee_bonus = char_bonus if weapon_instance.melee_or_thrown else 0
+    profile = get_weapon_registry().profile(weapon_instance.weapon_model)
+
+    # each d100 roll r <= test succeeds with (test - r) // 10 DoS
+    rolls = np.arange(1, min(test, 100) + 1)
+    degrees_pmf = np.bincount((test - rolls) // 10, minlength=len(hits_by_degrees)) / 100
+    hit_probability = degrees_pmf.sum()
+
+    hits_pmf = np.zeros(int(hits_by_degrees.max()) + 1)
+    hits_pmf[0] = 1.0 - hit_probability
+    damage_pmf = np.zeros(1)
+    damage_pmf[0] = 1.0 - hit_probability
+
+    for degrees, p in enumerate(degrees_pmf):
+        if p == 0:
+            continue
+        hits = hits_by_degrees[degrees]
+        hits_pmf[hits] += p
+
+        total = np.zeros(1)
+        total[0] = 1.0
+        if weapon_instance.damage_roll > 0 and hits > 0:
+            per_hit = profile.hit_damage_pmf(degrees, test)
+            for _ in range(hits):
+                total = np.convolve(total, per_hit)
+        total = np.concatenate([np.zeros(melee_bonus), total]) if melee_bonus > 0 else total
+        damage_pmf = _add_pmf(damage_pmf, total, p)
+
+    return AttackDistribution(test=test,
+                              hit_probability=float(hit_probability),
+                              hits_pmf=hits_pmf,
+                              damage_pmf=np.trim_zeros(damage_pmf, 'b'))
@@ -8,14 +8,16 @@
 
 
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import (Form, StringField, FormField, SubmitField, IntegerField, 
-                     SelectField, BooleanField, DecimalField, validators)
+                     SelectField, SelectMultipleField, BooleanField, DecimalField,
+                     FloatField, validators)
 from wtforms.validators import DataRequired, ValidationError
 
 from .combat import COMBAT_ACTIONS
 from .items import ItemAvailability
 from .weapons import (WeaponClass, WeaponType, DamageType, Craftsmanship,
-                      PlayerWeapon, PlayerWeaponInstance)
+                      PlayerWeapon, PlayerWeaponInstance, get_weapon_registry)
 
 
 class WeaponForm(FlaskForm):
@@ -33,7 +35,8 @@ class WeaponForm(FlaskForm):
                                default='Common',
                                choices=[ia.name for ia in ItemAvailability],
                                coerce=lambda v: ItemAvailability[v])
-    weapon_range = IntegerField('Weapon Range')
+    weapon_range = IntegerField('Weapon Range', [validators.InputRequired(),
+                                                 validators.NumberRange(min=1)])
     rof_single = BooleanField('RoF Single', default=True)
     rof_semi = IntegerField('RoF Semi', [validators.NumberRange(min=0)])
     rof_auto = IntegerField('RoF Auto', [validators.NumberRange(min=0)])
@@ -45,7 +48,7 @@ class WeaponForm(FlaskForm):
     mass = DecimalField('Mass')
 
     def get_weapon_model(self):
-        return PlayerWeapon(
+        return get_weapon_registry().intern(PlayerWeapon(
             name = self.weapon_name.data,
             availability = self.availability.data,
             weapon_class = self.weapon_class.data,
@@ -59,7 +62,53 @@ class WeaponForm(FlaskForm):
             clip = self.clip.data,
             reload_time = self.reload_time.data,
             mass = self.mass.data
-        )
+        ))
+
+    def set_weapon_model(self, weapon_model: PlayerWeapon):
+        """Fill the fields from weapon_model; the inverse of get_weapon_model."""
+        self.weapon_name.data = weapon_model.name
+        self.availability.data = weapon_model.availability
+        self.weapon_class.data = weapon_model.weapon_class
+        self.weapon_type.data = weapon_model.weapon_type
+        self.weapon_range.data = weapon_model.weapon_range
+        self.rof_single.data, self.rof_semi.data, self.rof_auto.data = weapon_model.rof
+        self.damage_roll.data = weapon_model.damage_roll
+        self.damage_bonus.data = weapon_model.damage_bonus
+        self.damage_type.data = weapon_model.damage_type
+        self.penetration.data = weapon_model.pen
+        self.clip.data = weapon_model.clip
+        self.reload_time.data = weapon_model.reload_time
+        self.mass.data = weapon_model.mass
+
+
+class WeaponImportForm(FlaskForm):
+    weapons_file = FileField('Weapons File',
+                             [FileRequired(), FileAllowed(['json', 'yaml', 'yml'],
+                                                          'Upload a .json or .yaml export.')])
+
+
+class ArmouryFilterForm(Form):
+    """The armoury listing's query string; a plain Form, as it's a GET."""
+
+    weapon_class = SelectField('Weapon Class', default='',
+                               choices=[('', 'Any class')] + [(wc.value, wc.value) for wc in WeaponClass])
+    weapon_type = SelectField('Weapon Type', default='',
+                              choices=[('', 'Any type')] + [(wt.value, wt.value) for wt in WeaponType])
+    damage_type = SelectField('Damage Type', default='',
+                              choices=[('', 'Any damage')] + [(dt.value, dt.value) for dt in DamageType])
+    min_damage = IntegerField('Min Damage Roll', [validators.Optional(),
+                                                  validators.NumberRange(min=1)])
+    sort = SelectField('Sort', default='name',
+                       choices=[('name', 'Name'), ('damage', 'Damage')])
+
+    def get_filters(self):
+        """The non-empty filters, for ArmouryCache.get_player_weapon_page."""
+        filters = {field: getattr(self, field).data
+                   for field in ('weapon_class', 'weapon_type', 'damage_type')
+                   if getattr(self, field).data}
+        if self.min_damage.data is not None:
+            filters['min_damage'] = self.min_damage.data
+        return filters
 
 
 class PlayerActionsForm(FlaskForm):
@@ -74,3 +123,37 @@ class WeaponAttackForm(FlaskForm):
     player_action = FormField(PlayerActionsForm)
     target_range = IntegerField('Target Range')
     test_characteristic = IntegerField('Test Characteristic')
+
+
+# a million full auto trials of a 3d10, RoF 10 weapon take about 1.3s on
+# one worker; ten million took 13s, too long with per_user_limit jobs queued
+MAX_SIMULATION_TRIALS = 1000000
+
+
+class SimulationForm(FlaskForm):
+    weapon = FormField(WeaponForm)
+    craftsmanship = SelectField('Craftsmanship',
+                                default='Common',
+                                choices=[c.name for c in Craftsmanship],
+                                coerce=lambda v: Craftsmanship[v])
+    actions = SelectMultipleField('Actions',
+                                  choices=[k for k in COMBAT_ACTIONS])
+    ballistic_skill = IntegerField('BS / WS', [validators.NumberRange(min=1, max=100)],
+                                   default=40)
+    target_range = IntegerField('Target Range', [validators.NumberRange(min=0)],
+                                default=10)
+    n_trials = IntegerField('Trials',
+                            [validators.NumberRange(min=1000, max=MAX_SIMULATION_TRIALS)],
+                            default=100000)
+    seed = IntegerField('Seed', [validators.Optional()])
+    # with either target set, Trials is only the cap
+    sr_precision = FloatField('Success Rate ±', [validators.Optional(),
+                                                 validators.NumberRange(min=.0005, max=.5)])
+    damage_precision = FloatField('Mean Damage ±', [validators.Optional(),
+                                                    validators.NumberRange(min=.01)])
+    confidence = FloatField('Confidence', [validators.NumberRange(min=.5, max=.999)],
+                            default=.95)
+
+    def validate_actions(self, field):
+        if len(field.data) > 2:
+            raise ValidationError('Choose at most two actions.')
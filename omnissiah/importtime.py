@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : importtime.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from collections import defaultdict
+import subprocess
+import sys
+import time
+
+
+IMPORTTIME_PREFIX = 'import time:'
+# run the CLI itself rather than -m, so the package isn't imported twice
+CLI_COMMAND = 'from omnissiah.__main__ import main; main()'
+
+
+def parse_importtime(lines):
+    """Parse `python -X importtime` output into (module, self_us, cumulative_us, depth)."""
+    records = []
+    for line in lines:
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        fields = line[len(IMPORTTIME_PREFIX):].split('|')
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # the header line
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), self_us, cumulative_us, depth))
+    return records
+
+
+def format_report(records, wall_time, top=15):
+    """Summarize import costs: totals per top-level package and the slowest imports."""
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in records:
+        by_package[name.split('.')[0]] += self_us
+    total_us = sum(by_package.values())
+
+    lines = [f'Imported {len(records)} modules in {total_us / 1000:.1f}ms '
+             f'(process wall time {wall_time * 1000:.1f}ms)',
+             '',
+             f'{"self (ms)":>10}  package']
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f'{self_us / 1000:10.1f}  {package}')
+
+    lines.extend(['', f'{"cumul (ms)":>10}  module'])
+    for name, _, cumulative_us, depth in sorted(records, key=lambda r: -r[2])[:top]:
+        lines.append(f'{cumulative_us / 1000:10.1f}  {"  " * depth}{name}')
+    return '\n'.join(lines)
+
+
+def profile_imports(argv, top=15):
+    """Run the CLI with argv under -X importtime and report import costs to stderr.
+
+    The command's own output passes through untouched; returns its exit code.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', CLI_COMMAND, *argv],
+                            stderr=subprocess.PIPE, text=True)
+    timings = []
+    for line in proc.stderr:
+        if line.startswith(IMPORTTIME_PREFIX):
+            timings.append(line)
+        else:
+            sys.stderr.write(line)
+    returncode = proc.wait()
+    wall_time = time.perf_counter() - start
+
+    print(format_report(parse_importtime(timings), wall_time, top=top), file=sys.stderr)
+    return returncode
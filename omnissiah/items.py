@@ -9,7 +9,7 @@
 from dataclasses import dataclass, field
 from enum import IntEnum
 
-from .utils import require_kwargs
+from .utils import require_kwargs, d100
 
 
 class Craftsmanship(IntEnum):
@@ -72,14 +72,17 @@ class Item:
                          quantity: int,
                          profit_factor: int,
                          craftsmanship: Craftsmanship = Craftsmanship.Common,
-                         modifier: int = 0):
+                         modifier: int = 0,
+                         rng=None):
 
-        roll = dice.roll('1d100')
-        return int(roll) <= profit_factor + quantity + self.availability + craftsmanship + modifier
+        roll = d100(rng)
+        return roll <= profit_factor + quantity + self.availability + craftsmanship + modifier
 
 
 class InstanceMixin:
 
+    __slots__ = ('craftsmanship', 'quantity')
+
     def __init__(self, *,
                  craftsmanship: Craftsmanship,
                  quantity: int = 1,
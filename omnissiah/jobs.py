@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : jobs.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import asyncio
+from collections import defaultdict
+import logging
+import time
+import uuid
+
+import numpy as np
+
+from .cache import simulation_key
+from .stats import AttackSummary
+from .workers import SimulationRejected, simulation_job
+
+
+# trials per pool job; bounds how long a cancel or a progress update waits
+JOB_BATCH_TRIALS = 250000
+# with precision targets, the first batch sizes up the variances, and later
+# ones are never smaller than this
+JOB_MIN_ADAPTIVE_TRIALS = 10000
+# how long to back off when the pool queue is full
+JOB_RETRY_DELAY = 0.5
+# finished jobs are kept this long for polling, in seconds
+JOB_TTL = 24 * 60 * 60
+
+
+class SimulationJob:
+    """A background simulation of one weapon profile, run in batches.
+
+    The running AttackSummary is merged batch by batch, so progress and
+    the partial damage histogram can be read at any point. Given
+    sr_precision or damage_precision, the job stops as soon as those
+    confidence interval half-widths are reached, and N is only the cap.
+    """
+
+    def __init__(self, user, weapon_model, craftsmanship, BS, target_range,
+                 action_names, N, seed=None, engine='vector',
+                 sr_precision=None, damage_precision=None, confidence=.95):
+        self.id = uuid.uuid4().hex
+        self.user = user
+        self.weapon_model = weapon_model
+        self.craftsmanship = craftsmanship
+        self.BS = BS
+        self.target_range = target_range
+        self.action_names = sorted(action_names)
+        self.N = N
+        self.seed = seed
+        self.engine = engine
+        self.sr_precision = sr_precision
+        self.damage_precision = damage_precision
+        self.confidence = confidence
+        # fixed-size jobs keep the keys they were cached under before
+        targets = dict(sr_precision=sr_precision, damage_precision=damage_precision,
+                       confidence=confidence) if self.adaptive else {}
+        self.key = simulation_key(weapon_model, craftsmanship, BS, target_range,
+                                  self.action_names, N, seed=seed, engine=engine,
+                                  batch_size=JOB_BATCH_TRIALS, **targets)
+
+        self.status = 'queued'
+        self.error = None
+        self.cached = False
+        self.summary = AttackSummary()
+        self.created = time.time()
+        self.finished = None
+        self.task = None
+
+        self.version = 0
+        self._updated = asyncio.Event()
+
+    @property
+    def adaptive(self):
+        return self.sr_precision is not None or self.damage_precision is not None
+
+    @property
+    def precision_targets(self):
+        return dict(sr_precision=self.sr_precision,
+                    damage_precision=self.damage_precision,
+                    confidence=self.confidence)
+
+    def _next_batch(self):
+        """Trials in the next batch, or 0 if the job is finished."""
+        from .simulate import precision_reached, projected_trials
+
+        remaining = self.N - self.summary.n
+        if not self.adaptive or remaining <= 0:
+            return min(JOB_BATCH_TRIALS, max(remaining, 0))
+        if not self.summary.n:
+            return min(JOB_MIN_ADAPTIVE_TRIALS, remaining)
+        if precision_reached(self.summary, **self.precision_targets):
+            return 0
+        needed = projected_trials(self.summary, **self.precision_targets) - self.summary.n
+        return min(max(needed, JOB_MIN_ADAPTIVE_TRIALS), JOB_BATCH_TRIALS, remaining)
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed', 'cancelled')
+
+    @property
+    def progress(self):
+        # precision targets can finish a job well short of N
+        if self.status == 'done':
+            return 1.0
+        return min(1.0, self.summary.n / self.N) if self.N else 1.0
+
+    def _notify(self):
+        self.version += 1
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def wait_for_update(self, version, timeout=15.0):
+        """Wait until the job changes from the given version, or timeout passes."""
+        if self.version != version or self.done:
+            return
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def to_dict(self, histogram: bool = True):
+        summary = self.summary
+        data = {'id': self.id,
+                'status': self.status,
+                'error': self.error,
+                'cached': self.cached,
+                'weapon': self.weapon_model.name,
+                'craftsmanship': self.craftsmanship.name,
+                'BS': self.BS,
+                'range': self.target_range,
+                'actions': self.action_names,
+                'N': self.N,
+                'seed': self.seed,
+                'sr_precision': self.sr_precision,
+                'damage_precision': self.damage_precision,
+                'confidence': self.confidence,
+                'n': summary.n,
+                'progress': self.progress,
+                'created': self.created,
+                'finished': self.finished}
+        if summary.n:
+            data.update({'hit_rate': summary.hit_rate,
+                         'success_rate': summary.success_rate,
+                         'mean_damage': summary.mean,
+                         'median_damage': summary.median_damage,
+                         'max_damage': summary.max_damage})
+            if histogram:
+                data['histogram'] = summary.damage_hist.tolist()
+        return data
+
+    async def run(self, pool, cache=None):
+        """Run the batches through pool, merging results as they come back.
+
+        If cache (a `cache.SimulationCache`) has this query, the job finishes
+        at once; otherwise the final summary is stored there.
+        """
+        log = logging.getLogger('omnissiah.jobs')
+        loop = asyncio.get_running_loop()
+        try:
+            if cache is not None:
+                summary = await loop.run_in_executor(None, cache.get, self.key)
+                if summary is not None:
+                    self.summary = summary
+                    self.cached = True
+                    self._finish('done')
+                    return
+
+            self.status = 'running'
+            self._notify()
+            # one independent stream per batch, so seeded jobs replay exactly
+            seed_seq = np.random.SeedSequence(self.seed)
+            while True:
+                N = self._next_batch()
+                if not N:
+                    break
+                stream, = seed_seq.spawn(1)
+                while True:
+                    try:
+                        result = await pool.run(simulation_job, self.weapon_model,
+                                                self.craftsmanship, self.BS,
+                                                self.target_range, self.action_names,
+                                                N=N, seed=stream, engine=self.engine,
+                                                user=self.user)
+                        break
+                    except SimulationRejected:
+                        await asyncio.sleep(JOB_RETRY_DELAY)
+                self.summary.merge(result)
+                self._notify()
+
+            if cache is not None:
+                await loop.run_in_executor(None, cache.put, self.key, self.summary)
+            self._finish('done')
+        except asyncio.CancelledError:
+            self._finish('cancelled')
+            raise
+        except Exception as e:
+            log.exception(f'Simulation job {self.id} failed')
+            self.error = str(e)
+            self._finish('failed')
+
+    def _finish(self, status):
+        self.status = status
+        self.finished = time.time()
+        self._notify()
+
+
+class JobStore:
+    """In-memory registry of simulation jobs, by id and by user.
+
+    Each user may have at most max_active_per_user unfinished jobs.
+    Finished jobs are pruned after ttl seconds; their results stay in the
+    simulation cache.
+    """
+
+    def __init__(self, pool, cache=None, max_active_per_user: int = 2, ttl: float = JOB_TTL):
+        self.pool = pool
+        self.cache = cache
+        self.max_active_per_user = max_active_per_user
+        self.ttl = ttl
+        self._jobs = {}
+        self._by_user = defaultdict(list)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def get(self, job_id, user=None):
+        """The job with job_id, or None if it doesn't exist or isn't user's."""
+        job = self._jobs.get(job_id)
+        if job is None or (user is not None and job.user != user):
+            return None
+        return job
+
+    def user_jobs(self, user):
+        return [self._jobs[job_id] for job_id in reversed(self._by_user.get(user, ()))
+                if job_id in self._jobs]
+
+    def submit(self, user, *args, **kwargs):
+        """Create a SimulationJob and start it in the background.
+
+        Raises SimulationRejected if the user already has too many active jobs.
+        """
+        self.prune()
+        active = sum(1 for job in self.user_jobs(user) if not job.done)
+        if active >= self.max_active_per_user:
+            raise SimulationRejected(f'You already have {active} simulations running.')
+
+        job = SimulationJob(user, *args, **kwargs)
+        self._jobs[job.id] = job
+        self._by_user[user].append(job.id)
+        job.task = asyncio.ensure_future(job.run(self.pool, cache=self.cache))
+        return job
+
+    def cancel(self, job_id, user=None):
+        job = self.get(job_id, user=user)
+        if job is None or job.done:
+            return False
+        job.task.cancel()
+        return True
+
+    def cancel_all(self):
+        for job in self._jobs.values():
+            if not job.done and job.task is not None:
+                job.task.cancel()
+
+    def prune(self, now=None):
+        """Forget finished jobs older than the ttl."""
+        now = time.time() if now is None else now
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and now - job.finished > self.ttl]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            self._by_user[job.user].remove(job_id)
+            if not self._by_user[job.user]:
+                del self._by_user[job.user]
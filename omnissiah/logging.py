@@ -6,25 +6,187 @@
 # Author : Camille Scott <camille.scott.w@gmail.com>
 # Date   : 22.02.2021
 
+from collections import defaultdict
+import datetime
+import json
 import logging
+import logging.handlers
+import queue
+import threading
 
-from rich.logging import RichHandler
 
+# logger name -> level, '' being the root. Discord's gateway chatter and
+# the Mongo driver stay quiet unless asked for.
+DEFAULT_LOG_LEVELS = {'': 'INFO',
+                      'discord.gateway': 'WARNING',
+                      'discord.http': 'WARNING',
+                      'websockets': 'WARNING',
+                      'pymongo': 'WARNING'}
+# logger name -> keep one in this many records from each call site
+DEFAULT_LOG_SAMPLING = {'quart.serving': 10,
+                        'omnissiah.rolls': 10}
 
-def setup(log_file):
+# attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+
+
+def parse_logger_option(value: str):
+    """Split a NAME=VALUE command line option; NAME may be empty for the root."""
+    name, sep, setting = value.rpartition('=')
+    if not sep or not setting:
+        raise ValueError(f'Expected NAME=VALUE, got {value!r}')
+    return name, setting
+
+
+def parse_sampling_option(value: str):
+    """Split a NAME=N command line option, N being a positive integer."""
+    name, n = parse_logger_option(value)
+    if not n.isdigit() or int(n) < 1:
+        raise ValueError(f'Expected a positive sampling rate, got {n!r}')
+    return name, int(n)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any extra= fields alongside."""
+
+    def format(self, record):
+        entry = {'time': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+                 'level': record.levelname,
+                 'logger': record.name,
+                 'message': record.getMessage(),
+                 'where': f'{record.module}:{record.funcName}:{record.lineno}'}
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass one in every n records per call site for the configured loggers.
+
+    rates maps a logger name to n, and covers its children too. Warnings
+    and above always pass; sampled records carry `sampled=n`.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._counts = defaultdict(int)
+        self._rate_cache = {}
+        self._lock = threading.Lock()
+
+    def rate(self, name):
+        try:
+            return self._rate_cache[name]
+        except KeyError:
+            pass
+        n, logger = 1, name
+        while True:
+            if logger in self.rates:
+                n = self.rates[logger]
+                break
+            if not logger:
+                break
+            logger = logger.rpartition('.')[0]
+        self._rate_cache[name] = n
+        return n
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        n = self.rate(record.name)
+        if n <= 1:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts[key]
+            self._counts[key] = count + 1
+        if count % n:
+            return False
+        record.sampled = n
+        return True
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records for the listener thread, doing as little as possible.
+
+    The message is rendered here, so later changes to its arguments don't
+    show up in the log; exceptions are formatted by the listener.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class LogQueue:
+    """The root logger's one handler, and the thread that does the writing.
+
+    Records go onto an in-process queue from whichever thread logs them;
+    the QueueListener's thread formats them and writes the file and the
+    console, so nothing on the event loop waits on I/O.
+    """
+
+    def __init__(self, *handlers, sampling=None):
+        self.queue = queue.SimpleQueue()
+        self.handler = LocalQueueHandler(self.queue)
+        self.handler.addFilter(SamplingFilter(sampling))
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers,
+                                                       respect_handler_level=True)
+
+    def start(self):
+        self.listener.start()
+        self.claim_root()
+        return self
+
+    def claim_root(self):
+        """Make the queue the root's only handler.
+
+        Libraries that configure logging themselves (zardoz's setup adds
+        its own file and console handlers) would otherwise write a second
+        copy of every record, synchronously.
+        """
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if handler is not self.handler:
+                root.removeHandler(handler)
+                handler.close()
+        if self.handler not in root.handlers:
+            root.addHandler(self.handler)
+
+    def stop(self):
+        """Flush what's queued and stop the listener thread."""
+        logging.getLogger().removeHandler(self.handler)
+        if self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def setup(log_file, levels=None, sampling=None, console=True):
+    """Log to log_file as JSON lines, and to the console, off the calling thread.
+
+    levels and sampling are merged over DEFAULT_LOG_LEVELS and
+    DEFAULT_LOG_SAMPLING. Returns the started LogQueue; stop it on shutdown.
+    """
     log_file.parent.mkdir(parents=True, exist_ok=True)
 
-    logging.basicConfig(
-        filename=log_file,
-        level=logging.DEBUG,
-        format='%(asctime)s %(levelname)10s [%(filename)s:%(lineno)s - %(funcName)20s()] %(message)s',
-        datefmt="[%x %X]"
-    )
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(JSONFormatter())
+    handlers = [file_handler]
+    if console:
+        from rich.logging import RichHandler
+        handlers.append(RichHandler())
 
-    logger = logging.getLogger()
-    logger.addHandler(RichHandler())
+    for name, level in {**DEFAULT_LOG_LEVELS, **(levels or {})}.items():
+        logging.getLogger(name or None).setLevel(level.upper() if isinstance(level, str) else level)
 
-    return logger
+    return LogQueue(*handlers, sampling={**DEFAULT_LOG_SAMPLING, **(sampling or {})}).start()
 
 
 class LoggingMixin:
@@ -32,13 +194,19 @@ class LoggingMixin:
     def __init__(self, *args, **kwargs):
         self.log = self.get_logger()
         self.register_decos()
-        
+
     def register_decos(self):
 
         try:
             @self.bot.before_invoke
             async def log_cmd_invoke(ctx):
-                self.log.info(f'CMD: [{ctx.invoked_with} {ctx.message.content}] from {ctx.author}:{ctx.guild}')
+                logging.getLogger('omnissiah.commands').info(
+                    'CMD: [%s %s] from %s:%s', ctx.invoked_with, ctx.message.content,
+                    ctx.author, ctx.guild,
+                    extra={'event': 'command',
+                           'command': ctx.invoked_with,
+                           'author_id': ctx.author.id,
+                           'guild_id': ctx.guild.id if ctx.guild else None})
         except AttributeError:
             pass
 
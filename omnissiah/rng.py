@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : rng.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import os
+import re
+
+import numpy as np
+
+
+DICE_EXPR = re.compile(r'^\s*(\d*)\s*d\s*(\d+)\s*(?:([+-])\s*(\d+))?\s*$')
+
+
+def parse_dice(expr):
+    """Parse a simple dice expression like 1d100, d10 or 2d10+3.
+
+    Returns (n_dice, sides, modifier); raises ValueError otherwise.
+    """
+    match = DICE_EXPR.match(expr)
+    if match is None:
+        raise ValueError(f'Unsupported dice expression: {expr}')
+    n_dice, sides, sign, modifier = match.groups()
+    n_dice = int(n_dice) if n_dice else 1
+    modifier = int(modifier) if modifier else 0
+    if sign == '-':
+        modifier = -modifier
+    return n_dice, int(sides), modifier
+
+
+class DiceRNG:
+    """A seedable, splittable stream of dice rolls.
+
+    Rolls are drawn from a numpy Generator a block at a time and handed out
+    from a per-die buffer, so single rolls in hot loops don't pay for a
+    generator call each. Streams made with `spawn` are statistically
+    independent, and any stream can be replayed from its seed_seq.
+    """
+
+    def __init__(self, seed=None, block_size: int = 4096):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_seq = seed
+        else:
+            self.seed_seq = np.random.SeedSequence(seed)
+        self.generator = np.random.default_rng(self.seed_seq)
+        self.block_size = block_size
+        self._buffers = {}
+
+    def __repr__(self):
+        return f'DiceRNG(entropy={self.seed_seq.entropy}, spawn_key={self.seed_seq.spawn_key})'
+
+    def spawn(self, n):
+        """Split off n independent child streams."""
+        return [DiceRNG(child, block_size=self.block_size)
+                for child in self.seed_seq.spawn(n)]
+
+    def _refill(self, sides, k):
+        size = max(self.block_size, k)
+        # stored reversed so single rolls can pop off the end
+        block = self.generator.integers(1, sides + 1, size=size).tolist()
+        block.reverse()
+        buffer = self._buffers.get(sides, [])
+        block.extend(buffer)
+        self._buffers[sides] = block
+        return block
+
+    def roll(self, sides: int):
+        """Roll a single die with the given number of sides."""
+        try:
+            return self._buffers[sides].pop()
+        except (KeyError, IndexError):
+            return self._refill(sides, 1).pop()
+
+    def rolls(self, sides: int, k: int):
+        """Roll k dice with the given number of sides, as a list."""
+        buffer = self._buffers.get(sides)
+        if buffer is None or len(buffer) < k:
+            buffer = self._refill(sides, k)
+        result = buffer[-k:] if k else []
+        del buffer[len(buffer) - k:]
+        result.reverse()
+        return result
+
+    def d10(self):
+        return self.roll(10)
+
+    def d100(self):
+        return self.roll(100)
+
+    def Nd10(self, n=1):
+        return self.rolls(10, n)
+
+    def Nd100(self, n=1):
+        return self.rolls(100, n)
+
+    def roll_expr(self, expr):
+        """Roll a simple dice expression like 1d100 or 2d10+3 and return the total."""
+        n_dice, sides, modifier = parse_dice(expr)
+        return sum(self.rolls(sides, n_dice)) + modifier
+
+
+_RNG = DiceRNG()
+# whether _RNG was chosen by the caller, rather than seeded from entropy
+_RNG_EXPLICIT = False
+
+
+def get_rng():
+    """The process-wide default dice stream."""
+    return _RNG
+
+
+def set_rng(rng):
+    """Replace the process-wide default dice stream; returns the old one."""
+    global _RNG, _RNG_EXPLICIT
+    old, _RNG = _RNG, rng
+    _RNG_EXPLICIT = True
+    return old
+
+
+def seed(seed=None):
+    """Reseed the process-wide default dice stream.
+
+    With no seed it's drawn from fresh entropy, and reseeded again in
+    forked children like the default stream.
+    """
+    global _RNG_EXPLICIT
+    set_rng(DiceRNG(seed))
+    _RNG_EXPLICIT = seed is not None
+    return _RNG
+
+
+def _reseed_after_fork():
+    # forked children would otherwise all roll the parent's dice; an
+    # explicitly seeded stream is left alone, so it stays reproducible
+    global _RNG
+    if not _RNG_EXPLICIT:
+        _RNG = DiceRNG(block_size=_RNG.block_size)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reseed_after_fork)
+
+
+def as_generator(rng):
+    """A numpy Generator for rng, which may be a DiceRNG, Generator or None."""
+    if rng is None:
+        return get_rng().generator
+    if isinstance(rng, DiceRNG):
+        return rng.generator
+    return rng
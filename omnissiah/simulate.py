@@ -15,9 +15,9 @@ def simulate(args):
     from .combat import player_attack, COMBAT_ACTIONS
     from .items import ItemAvailability
     from .weapons import (WeaponClass, WeaponType, DamageType, Craftsmanship,
-                      PlayerWeapon, PlayerWeaponInstance)
+                      PlayerWeapon, PlayerWeaponInstance, get_weapon_registry)
 
-    weapon_model = PlayerWeapon(
+    weapon_model = get_weapon_registry().intern(PlayerWeapon(
         name=args.name,
         availability=args.availability,
         weapon_class=args.weapon_class,
@@ -31,46 +31,237 @@ def simulate(args):
         clip=args.clip,
         reload_time=args.reload_time,
         mass=args.mass
-    )
+    ))
 
     weapon_instance = PlayerWeaponInstance(weapon_model, craftsmanship=args.craftsmanship)
     combat_actions = [COMBAT_ACTIONS.get(action) for action in args.actions] \
                      if args.actions is not None else []
 
-    results = simulate_attack(weapon_instance, args.ballistic_skill,
-                              args.target_range, combat_actions, N=args.n_trials)
-    sr = sum(results.damage > 0) / args.n_trials
-    maxd = results.damage.max()
-    medd = int(results.damage[results['damage'] > 0].median())
-
     actions_str = ', '.join([action.name for action in combat_actions])
+
+    if args.exact:
+        from .exact import attack_distribution
+
+        dist = attack_distribution(weapon_instance, args.ballistic_skill,
+                                   actions=combat_actions,
+                                   target_range=args.target_range)
+        title = f'{weapon_instance.name} @ {actions_str}: SR={dist.success_rate:.3f}, '\
+                f'Mean={dist.mean:.2f}, Med={dist.median_damage}, P99={dist.quantile(.99)}\n'\
+                f'BS={args.ballistic_skill}, Range={args.target_range}, exact '
+        if args.plot is not None:
+            # the fury tail is unbounded, so cut the plot off at the 99.9th percentile
+            upper = dist.quantile(.999) + 1
+            damage = range(1, upper)
+            if args.plot == 'text':
+                plot_pmf_plottile(damage, dist.damage_pmf[1:upper], title=title)
+            else:
+                plot_pmf_mpl(damage, dist.damage_pmf[1:upper], title=title)
+        return dist
+
+    adaptive = args.sr_precision is not None or args.damage_precision is not None
+    if adaptive:
+        params = dict(sr_precision=args.sr_precision,
+                      damage_precision=args.damage_precision,
+                      confidence=args.confidence,
+                      max_trials=args.max_trials)
+
+        def run():
+            return simulate_attack_adaptive(weapon_instance, args.ballistic_skill,
+                                            args.target_range, combat_actions,
+                                            batch_size=args.n_trials,
+                                            engine=args.engine, seed=args.seed,
+                                            chunk_size=args.chunk_size, **params)
+    else:
+        params = {}
+
+        def run():
+            return simulate_attack_summary(weapon_instance, args.ballistic_skill,
+                                           args.target_range, combat_actions,
+                                           N=args.n_trials, engine=args.engine,
+                                           seed=args.seed, chunk_size=args.chunk_size)
+
+    cached = False
+    # an unseeded run is meant to be a fresh draw, so only seeded runs are cached
+    if args.no_cache or args.seed is None:
+        summary = run()
+    else:
+        from .cache import get_simulation_cache, simulation_key
+
+        key = simulation_key(weapon_model, args.craftsmanship, args.ballistic_skill,
+                             args.target_range, combat_actions, args.n_trials,
+                             seed=args.seed, engine=args.engine,
+                             chunk_size=args.chunk_size, **params)
+        summary, cached = get_simulation_cache().get_or_compute(key, run)
+
+    sr = summary.success_rate
+    maxd = summary.max_damage
+    medd = summary.median_damage
+
     title = f'{weapon_instance.name} @ {actions_str}: SR={sr:.3f}, Max={maxd}, Med={medd}\n'\
-            f'BS={args.ballistic_skill}, Range={args.target_range}, N={args.n_trials:,} '
+            f'BS={args.ballistic_skill}, Range={args.target_range}, N={summary.n:,} '
+    if cached:
+        title += '(cached) '
+    if adaptive:
+        sr_low, sr_high = summary.success_rate_interval(args.confidence)
+        mean_low, mean_high = summary.mean_interval(args.confidence)
+        title += f'\n{args.confidence:.0%} CI: SR=[{sr_low:.4f}, {sr_high:.4f}], '\
+                 f'Mean={summary.mean:.2f} [{mean_low:.2f}, {mean_high:.2f}]'
 
     if args.plot is not None:
         if args.plot == 'text':
-            plot_simulation_plottile(results)
+            plot_simulation_plottile(summary, title=title)
         else:
-            plot_simulation_mpl(results, title=title)
+            plot_simulation_mpl(summary, title=title)
 
+    return summary
 
-def simulate_attack(instance, BS, target_range, actions, N=10000):
-    from alive_progress import alive_bar
-    import pandas as pd
 
+def iter_simulate_attack(instance, BS, target_range, actions, N=10000,
+                         engine='vector', rng=None, chunk_size=None):
+    """Simulate N attacks, yielding chunks of damage, test and success arrays.
+
+    The vector engine runs the attacks as batched array operations; the
+    scalar engine calls `combat.player_attack` once per trial.
+    """
+    import numpy as np
+
+    if engine == 'vector':
+        from .batch import iter_batch_player_attack
+
+        yield from iter_batch_player_attack(instance, BS, actions=actions,
+                                            target_range=target_range, N=N,
+                                            rng=rng, chunk_size=chunk_size)
+        return
+    elif engine != 'scalar':
+        raise ValueError(f'Unknown simulation engine: {engine}')
+
+    from alive_progress import alive_bar
     from .combat import player_attack
 
-    damages, tests = [], []
+    if chunk_size is None:
+        chunk_size = 10000
+
+    damages, tests, successes = [], [], []
     with alive_bar(N, title=f'{instance}') as bar:
-        for _ in range(N):
-            dmg, test, _, _, _, _ = player_attack(instance, BS, actions=actions, target_range=target_range)
-            damages.append(dmg)
-            tests.append(test)
+        for trial in range(N):
+            status, ctx = player_attack(instance, BS, actions=actions,
+                                        target_range=target_range, rng=rng)
+            damages.append(ctx.total_damage if status else 0)
+            tests.append(ctx.test)
+            successes.append(status)
             bar()
-    return pd.DataFrame({'damage': damages, 'test': tests})
+            if len(damages) == chunk_size or trial == N - 1:
+                yield {'damage': np.array(damages),
+                       'test': np.array(tests),
+                       'success': np.array(successes)}
+                damages, tests, successes = [], [], []
+
+
+def simulate_attack(instance, BS, target_range, actions, N=10000,
+                    engine='vector', seed=None):
+    """Simulate N attacks, returning a DataFrame with damage and test columns."""
+    import numpy as np
+    import pandas as pd
+
+    from .rng import DiceRNG
+
+    chunks = list(iter_simulate_attack(instance, BS, target_range, actions, N=N,
+                                       engine=engine, rng=DiceRNG(seed)))
+    return pd.DataFrame({'damage': np.concatenate([c['damage'] for c in chunks]),
+                         'test': np.concatenate([c['test'] for c in chunks])})
+
+
+def simulate_attack_summary(instance, BS, target_range, actions, N=10000,
+                            engine='vector', seed=None, chunk_size=None):
+    """Simulate N attacks into a fixed-memory `stats.AttackSummary`.
+
+    Trials are generated and folded in chunk by chunk, so memory doesn't
+    grow with N.
+    """
+    from .rng import DiceRNG
+    from .stats import AttackSummary
+
+    summary = AttackSummary()
+    for chunk in iter_simulate_attack(instance, BS, target_range, actions, N=N,
+                                      engine=engine, rng=DiceRNG(seed),
+                                      chunk_size=chunk_size):
+        summary.update(chunk['damage'], test=chunk['test'], success=chunk['success'])
+    return summary
+
+
+def precision_reached(summary, sr_precision=None, damage_precision=None, confidence=.95):
+    """Whether summary's confidence intervals are within every given half-width."""
+    if sr_precision is not None:
+        low, high = summary.success_rate_interval(confidence)
+        if (high - low) / 2 > sr_precision:
+            return False
+    if damage_precision is not None:
+        low, high = summary.mean_interval(confidence)
+        if (high - low) / 2 > damage_precision:
+            return False
+    return True
+
+
+def projected_trials(summary, sr_precision=None, damage_precision=None, confidence=.95):
+    """Total trials the precision targets need, projected from summary's variances."""
+    from .stats import z_score
+
+    z = z_score(confidence)
+    needed = 0
+    if sr_precision is not None:
+        p = summary.success_rate
+        needed = max(needed, z ** 2 * p * (1 - p) / sr_precision ** 2)
+    if damage_precision is not None:
+        needed = max(needed, (z * summary.std / damage_precision) ** 2)
+    return int(needed)
+
+
+def simulate_attack_adaptive(instance, BS, target_range, actions,
+                             sr_precision=None, damage_precision=None,
+                             confidence=.95, batch_size=10000,
+                             max_trials=10000000, engine='vector', seed=None,
+                             chunk_size=None):
+    """Simulate batches of attacks until the requested precision is reached.
+
+    sr_precision and damage_precision are the target half-widths of the
+    success-rate and mean-damage confidence intervals. Stops once every
+    given target is met or max_trials have been run; returns the
+    `stats.AttackSummary`, whose n is the number of trials used.
+    """
+    from .rng import DiceRNG
+    from .stats import AttackSummary
+
+    if sr_precision is None and damage_precision is None:
+        raise ValueError('Need at least one of sr_precision or damage_precision')
+    targets = dict(sr_precision=sr_precision, damage_precision=damage_precision,
+                   confidence=confidence)
+
+    rng = DiceRNG(seed)
+    summary = AttackSummary()
+    N = batch_size
+    while summary.n < max_trials:
+        N = min(N, max_trials - summary.n)
+        for chunk in iter_simulate_attack(instance, BS, target_range, actions, N=N,
+                                          engine=engine, rng=rng,
+                                          chunk_size=chunk_size):
+            summary.update(chunk['damage'], test=chunk['test'], success=chunk['success'])
+        if precision_reached(summary, **targets):
+            break
+        N = max(projected_trials(summary, **targets) - summary.n, batch_size // 10, 1)
+    return summary
+
+
+def plot_simulation_mpl(summary, title='', filename=None, **kwargs):
+    pmf = summary.damage_pmf(damaging_only=True)
+    plot_pmf_mpl(range(1, len(pmf)), pmf[1:], title=title)
+
+
+def plot_simulation_plottile(summary, title='', **kwargs):
+    pmf = summary.damage_pmf(damaging_only=True)
+    plot_pmf_plottile(range(1, len(pmf)), pmf[1:], title=title)
 
 
-def plot_simulation_mpl(results_df, title='', filename=None, **kwargs):
+def plot_pmf_mpl(values, probabilities, title='', **kwargs):
     import matplotlib as mpl
     if os.environ['TERM'] == 'xterm-kitty':
         mpl.use('module://zardoz.mpl-kitty')
@@ -78,29 +269,34 @@ def plot_simulation_mpl(results_df, title='', filename=None, **kwargs):
         mpl.use('module://zardoz.mpl-sixel')
     import matplotlib.pyplot as plt
     plt.ioff()
-    #import ficus
     import seaborn as sns
 
-    #filename=f'BS{BS}_{weapon_instance.name}_R{target_range}_.png'
     sns.set_style('ticks')
     sns.set_context('talk')
 
     with mpl_dark_mode():
         fig, ax = plt.subplots(figsize=(12,8))
-        sns.kdeplot(data=results_df[results_df['damage'] != 0], x='damage', fill=True, ax=ax)
+        ax.fill_between(values, probabilities, step='mid', alpha=.5)
+        ax.step(values, probabilities, where='mid')
         sns.despine(ax=ax, offset=10)
         ax.set_xlabel('Damage')
+        ax.set_ylabel('Probability')
         ax.set_title(title)
         plt.show()
 
 
-def plot_simulation_plottile(results_df, title='', **kwargs):
+def plot_pmf_plottile(values, probabilities, title='', **kwargs):
     import plotille
+    fig = plotille.Figure()
+    fig.width = 80
+    fig.height = 30
+    fig.x_label = 'Damage'
+    fig.y_label = 'P'
+    fig.set_x_limits(min_=0)
+    fig.set_y_limits(min_=0)
+    fig.plot(list(values), list(probabilities))
     print(title)
-    print(plotille.histogram(results_df.damage[results_df.damage > 0],
-                             X_label='Damage',
-                             x_min=0,
-                             height=30))
+    print(fig.show())
 
 
 @contextmanager
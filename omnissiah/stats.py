@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : stats.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from statistics import NormalDist
+
+import numpy as np
+
+
+def z_score(confidence):
+    """Two-sided standard normal critical value for the given confidence."""
+    return NormalDist().inv_cdf(.5 + confidence / 2)
+
+
+class AttackSummary:
+    """Fixed-memory running summary of simulated attacks.
+
+    Keeps counts, running moments (merged chunk-wise with Chan's parallel
+    update) and an exact histogram of the integer damage values. Damage
+    is a small non-negative integer, so the histogram doubles as an exact
+    quantile sketch: its size tracks the largest damage seen, not the
+    number of trials.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.n_success = 0
+        self.n_damaging = 0
+        self.damage_mean = 0.0
+        self.damage_m2 = 0.0
+        self.damage_hist = np.zeros(0, dtype=np.int64)
+        self.test_min = None
+        self.test_max = None
+
+    def __repr__(self):
+        return f'AttackSummary(n={self.n}, success_rate={self.success_rate:.3f}, '\
+               f'mean={self.mean:.2f}, max={self.max_damage})'
+
+    def _update_moments(self, n, mean, m2):
+        total = self.n + n
+        delta = mean - self.damage_mean
+        self.damage_mean += delta * n / total
+        self.damage_m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+
+    def _update_hist(self, hist):
+        if len(hist) > len(self.damage_hist):
+            self.damage_hist = np.concatenate([self.damage_hist,
+                                               np.zeros(len(hist) - len(self.damage_hist),
+                                                        dtype=np.int64)])
+        self.damage_hist[:len(hist)] += hist
+
+    def _update_test(self, test_min, test_max):
+        self.test_min = test_min if self.test_min is None else min(self.test_min, test_min)
+        self.test_max = test_max if self.test_max is None else max(self.test_max, test_max)
+
+    def update(self, damage, test=None, success=None):
+        """Add a chunk of trials: arrays of damage, and optionally test and success."""
+        damage = np.asarray(damage, dtype=np.int64)
+        if len(damage) == 0:
+            return self
+        if damage.min() < 0:
+            raise ValueError('AttackSummary only tracks non-negative damage')
+
+        mean = damage.mean()
+        self._update_moments(len(damage), mean, float(((damage - mean) ** 2).sum()))
+        self._update_hist(np.bincount(damage))
+        self.n_damaging += int((damage > 0).sum())
+        self.n_success += int(np.sum(success)) if success is not None \
+                          else int((damage > 0).sum())
+        if test is not None:
+            test = np.asarray(test)
+            self._update_test(int(test.min()), int(test.max()))
+        return self
+
+    def merge(self, other):
+        """Fold another summary (ie. from a different worker) into this one."""
+        if other.n == 0:
+            return self
+        self.n_success += other.n_success
+        self.n_damaging += other.n_damaging
+        self._update_moments(other.n, other.damage_mean, other.damage_m2)
+        self._update_hist(other.damage_hist)
+        if other.test_min is not None:
+            self._update_test(other.test_min, other.test_max)
+        return self
+
+    @property
+    def hit_rate(self):
+        return self.n_success / self.n if self.n else 0.0
+
+    @property
+    def success_rate(self):
+        """Fraction of attacks that did any damage."""
+        return self.n_damaging / self.n if self.n else 0.0
+
+    @property
+    def mean(self):
+        return self.damage_mean
+
+    @property
+    def variance(self):
+        return self.damage_m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** .5
+
+    @property
+    def max_damage(self):
+        nonzero = np.flatnonzero(self.damage_hist)
+        return int(nonzero[-1]) if len(nonzero) else 0
+
+    def damage_pmf(self, damaging_only=False):
+        """Empirical damage distribution, indexed by damage value."""
+        hist = self.damage_hist.astype(float)
+        if damaging_only and len(hist):
+            hist[0] = 0.0
+        total = hist.sum()
+        return hist / total if total else hist
+
+    def quantile(self, q, damaging_only=True):
+        """Exact damage quantile; with damaging_only, over attacks that did damage."""
+        pmf = self.damage_pmf(damaging_only=damaging_only)
+        if not pmf.sum():
+            return 0
+        return int(min(np.searchsorted(np.cumsum(pmf), q), len(pmf) - 1))
+
+    @property
+    def median_damage(self):
+        return self.quantile(.5)
+
+    def success_rate_interval(self, confidence=.95):
+        """Wilson score interval for the success rate, as (low, high)."""
+        if not self.n:
+            return 0.0, 1.0
+        z = z_score(confidence)
+        p = self.success_rate
+        denom = 1 + z ** 2 / self.n
+        center = (p + z ** 2 / (2 * self.n)) / denom
+        half = z * ((p * (1 - p) + z ** 2 / (4 * self.n)) / self.n) ** .5 / denom
+        return max(0.0, center - half), min(1.0, center + half)
+
+    def mean_interval(self, confidence=.95):
+        """Normal-approximation interval for the mean damage, as (low, high)."""
+        if self.n < 2:
+            return float('-inf'), float('inf')
+        half = z_score(confidence) * self.std / self.n ** .5
+        return self.mean - half, self.mean + half
+
+    def to_dict(self):
+        return {'n': self.n,
+                'n_success': self.n_success,
+                'n_damaging': self.n_damaging,
+                'damage_mean': self.damage_mean,
+                'damage_m2': self.damage_m2,
+                'damage_hist': self.damage_hist.tolist(),
+                'test_min': self.test_min,
+                'test_max': self.test_max}
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        summary.n = data['n']
+        summary.n_success = data['n_success']
+        summary.n_damaging = data['n_damaging']
+        summary.damage_mean = data['damage_mean']
+        summary.damage_m2 = data['damage_m2']
+        summary.damage_hist = np.array(data['damage_hist'], dtype=np.int64)
+        summary.test_min = data['test_min']
+        summary.test_max = data['test_max']
+        return summary
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : sweep.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import os
+
+
+def load_sweep_weapons(weapons_yaml):
+    """Load (PlayerWeapon, Craftsmanship) pairs from a YAML list of weapons.
+
+    Each entry uses the PlayerWeapon.to_dict layout, plus an optional
+    craftsmanship name.
+    """
+    import yaml
+    from .items import Craftsmanship
+    from .weapons import get_weapon_registry
+
+    registry = get_weapon_registry()
+    with open(weapons_yaml) as fp:
+        data = yaml.safe_load(fp)
+
+    weapons = []
+    for entry in data:
+        craftsmanship = Craftsmanship[entry.pop('craftsmanship', 'Common')]
+        weapons.append((registry.from_dict(entry), craftsmanship))
+    return weapons
+
+
+def action_combinations(weapon_instance, target_range):
+    """Every set of up to two COMBAT_ACTIONS the weapon can perform at target_range.
+
+    Yields tuples of action names.
+    """
+    from .combat import COMBAT_ACTIONS, validate_attack
+
+    names = sorted(COMBAT_ACTIONS)
+    for n_actions in range(3):
+        for combo in itertools.combinations(names, n_actions):
+            try:
+                validate_attack(weapon_instance,
+                                [COMBAT_ACTIONS[name] for name in combo],
+                                target_range)
+            except ValueError:
+                continue
+            yield combo
+
+
+def sweep_points(weapons, bs_values, ranges, action_sets=None):
+    """Expand the sweep grid into (weapon, craftsmanship, BS, range, actions) points.
+
+    Points the weapon can't perform (out of range, missing RoF) are dropped.
+    If action_sets is None, every valid action combination is used.
+    """
+    from .combat import COMBAT_ACTIONS, validate_attack
+    from .weapons import PlayerWeaponInstance
+
+    for weapon_model, craftsmanship in weapons:
+        instance = PlayerWeaponInstance(weapon_model, craftsmanship=craftsmanship)
+        for target_range in ranges:
+            if action_sets is None:
+                combos = list(action_combinations(instance, target_range))
+            else:
+                combos = []
+                for combo in action_sets:
+                    try:
+                        validate_attack(instance,
+                                        [COMBAT_ACTIONS[name] for name in combo],
+                                        target_range)
+                    except ValueError:
+                        continue
+                    combos.append(tuple(combo))
+            for BS in bs_values:
+                for combo in combos:
+                    yield weapon_model, craftsmanship, BS, target_range, combo
+
+
+def run_sweep_point(point, N, rng):
+    """Simulate one sweep point with its own DiceRNG stream; returns a result row."""
+    import numpy as np
+
+    from .batch import batch_player_attack
+    from .combat import COMBAT_ACTIONS
+    from .weapons import PlayerWeaponInstance
+
+    weapon_model, craftsmanship, BS, target_range, combo = point
+    instance = PlayerWeaponInstance(weapon_model, craftsmanship=craftsmanship)
+    results = batch_player_attack(instance, BS,
+                                  actions=[COMBAT_ACTIONS[name] for name in combo],
+                                  target_range=target_range, N=N,
+                                  rng=rng)
+    damage = results['damage']
+    damaging = damage[damage > 0]
+
+    return {'weapon': weapon_model.name,
+            'craftsmanship': craftsmanship.name,
+            'BS': BS,
+            'range': target_range,
+            'actions': ', '.join(combo),
+            'test': int(results['test'][0]),
+            'hit_rate': float(results['success'].mean()),
+            'success_rate': float(len(damaging) / N),
+            'mean_damage': float(damage.mean()),
+            'median_damage': float(np.median(damaging)) if len(damaging) else 0.0,
+            'max_damage': int(damage.max()),
+            'N': N,
+            'spawn_key': rng.seed_seq.spawn_key[-1]}
+
+
+def _run_sweep_chunk(chunk, N):
+    return [run_sweep_point(point, N, rng) for point, rng in chunk]
+
+
+def sweep(weapons, bs_values, ranges, action_sets=None, N=10000,
+          seed=None, processes=None, chunk_size=8):
+    """Run a grid of weapon simulations over a process pool.
+
+    Every grid point gets an independent RNG stream spawned from the root
+    seed, so results don't depend on how points are scheduled and a sweep
+    can be replayed from its seed. Returns a tidy DataFrame, one row per point.
+    """
+    import pandas as pd
+
+    from .rng import DiceRNG
+
+    points = list(sweep_points(weapons, bs_values, ranges, action_sets=action_sets))
+    streams = DiceRNG(seed).spawn(len(points))
+    tasks = list(zip(points, streams))
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    if processes == 1:
+        rows = [row for chunk in chunks for row in _run_sweep_chunk(chunk, N)]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            rows = [row for result in executor.map(_run_sweep_chunk, chunks,
+                                                   itertools.repeat(N))
+                    for row in result]
+
+    return pd.DataFrame(rows)
+
+
+def run_sweep(args):
+    weapons = load_sweep_weapons(args.weapons)
+    action_sets = None
+    if args.action_sets is not None:
+        action_sets = [tuple(name.strip() for name in spec.split('+') if name.strip())
+                       for spec in args.action_sets]
+
+    results = sweep(weapons, args.ballistic_skill, args.target_range,
+                    action_sets=action_sets, N=args.n_trials, seed=args.seed,
+                    processes=args.processes)
+
+    if args.output:
+        sep = '\t' if os.path.splitext(args.output)[1] == '.tsv' else ','
+        results.to_csv(args.output, sep=sep, index=False)
+    else:
+        print(results.to_string(index=False))
+
+    return results
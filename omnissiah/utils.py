@@ -7,7 +7,7 @@
 # Date   : 22.02.2021
 
 import argparse
-import collections
+import collections.abc
 from dataclasses import is_dataclass
 from enum import Enum
 from typing import TypeVar, Type, Callable, List, Dict, Any
@@ -16,12 +16,11 @@ import functools
 import logging
 import os
 from pathlib import Path
-import random
 import time
 
-import discord
-from quart import current_app, request, url_for
-from xdg import xdg_data_home
+from xdg import xdg_cache_home, xdg_data_home
+
+from .rng import get_rng
 
 
 __pkg_dir__ = os.path.abspath(os.path.dirname(__file__))
@@ -38,20 +37,20 @@ FAILURE = 'F 🛇'
 SUCCESS = 'S ✅'
 
 
-def d10():
-    return random.randint(1, 10)
+def d10(rng=None):
+    return (rng or get_rng()).d10()
 
 
-def d100():
-    return random.randint(1, 100)
+def d100(rng=None):
+    return (rng or get_rng()).d100()
 
 
-def Nd10(n=1):
-    return [random.randint(1,10) for _ in range(n)]
+def Nd10(n=1, rng=None):
+    return (rng or get_rng()).Nd10(n)
 
 
-def Nd100(n=1):
-    return [random.randint(1,100)  for _ in range(n)]
+def Nd100(n=1, rng=None):
+    return (rng or get_rng()).Nd100(n)
 
 
 def default_database_dir(debug=False):
@@ -68,6 +67,13 @@ def default_log_file(debug=False):
         return xdg_data_home().joinpath('omnissiah', 'debug', 'omnissiah.log')
 
 
+def default_cache_dir(debug=False):
+    if not debug:
+        return xdg_cache_home().joinpath('omnissiah')
+    else:
+        return xdg_cache_home().joinpath('omnissiah', 'debug')
+
+
 def reverse_number(num: int):
     result = 0
     while (num > 0):
@@ -76,32 +82,62 @@ def reverse_number(num: int):
     return result
 
 
-async def fetch_valid_guilds():
-    log = logging.getLogger()
-    start = time.perf_counter()
+# how long a session's valid guilds are trusted before asking Discord again
+VALID_GUILDS_TTL = 10 * 60
+
 
-    user_guilds = current_app.discord.fetch_guilds()
-    user_guilds = set((g.id for g in user_guilds))
-    bot_guilds = list((g for g in current_app.bot.guilds))
+def intersect_guilds(user_guilds, bot):
+    """Map guild id -> name for the user's guilds the bot is also a member of.
 
+    Ids are strings, as they come back from the session cookie.
+    """
     valid = {}
-    for bg in bot_guilds:
-        if bg.id in user_guilds:
-            valid[bg.id] = bg.name
+    for ug in user_guilds:
+        bg = bot.get_guild(ug.id)
+        if bg is not None:
+            valid[str(bg.id)] = bg.name
+    return valid
+
+
+async def fetch_valid_guilds(user_guilds=None, refresh: bool = False):
+    """The guilds shared by the current user and the bot, cached in the session.
+
+    The intersection is reused for VALID_GUILDS_TTL seconds unless refresh
+    is set. user_guilds, if already fetched, saves the call to Discord;
+    otherwise it's fetched in an executor so the event loop isn't blocked.
+    """
+    from quart import current_app, session
+    from quart.utils import run_sync
+
+    log = logging.getLogger()
+    fetched = session.get('valid-guilds-time', 0)
+    if not refresh and 'valid-guilds' in session and time.time() - fetched < VALID_GUILDS_TTL:
+        return session['valid-guilds']
+
+    start = time.perf_counter()
+    if user_guilds is None:
+        user_guilds = await run_sync(current_app.discord.fetch_guilds)()
+    valid = intersect_guilds(user_guilds, current_app.bot)
+    session['valid-guilds'] = valid
+    session['valid-guilds-time'] = time.time()
 
     end = time.perf_counter()
-    log.info(f'fetch_valid_guilds: {end - start}s {valid}')
+    log.debug('fetch_valid_guilds: %.3fs %s', end - start, valid,
+              extra={'event': 'fetch_valid_guilds', 'duration': end - start})
     
     return valid
 
 
 def redirect_url(default='index'):
+    from quart import request, url_for
+
     return request.args.get('next') or \
            request.referrer or \
            url_for(default)
 
 
 def handle_http_exception(func):
+    import discord
 
     @functools.wraps(func)
     async def wrapper(self, ctx, *args, **kwargs):
@@ -117,7 +153,7 @@ def handle_http_exception(func):
 
 def is_iterable(obj):
     return (
-        isinstance(obj, collections.Iterable)
+        isinstance(obj, collections.abc.Iterable)
         and not isinstance(obj, str)
     )
 
@@ -9,11 +9,16 @@
 import collections
 from dataclasses import dataclass, field
 from enum import Enum
+import functools
+import math
+import struct
 from typing import Tuple
+import weakref
 
+from .cache import LRUCache
 from .utils import require_kwargs, reverse_number, d10, d100, Nd10
 from .character import Characteristic
-from .items import Craftsmanship, InstanceMixin, Item
+from .items import Craftsmanship, InstanceMixin, Item, ItemAvailability
 
 from mashumaro import DataClassYAMLMixin
 from mashumaro.config import BaseConfig
@@ -89,6 +94,132 @@ class PlayerWeapon(Item, DataClassYAMLMixin):
     def pretty_damage_type(self):
         return self.damage_type.name[0]
 
+    def to_bytes(self) -> bytes:
+        """Pack into the compact binary layout; see `pack_weapons`."""
+        return _pack_weapon(self)
+
+    @classmethod
+    def from_bytes(cls, data) -> 'PlayerWeapon':
+        return _unpack_weapon(data, 0)[0]
+
+    def __reduce__(self):
+        # pickles, and so transfers to worker processes, as the packed bytes;
+        # a weapon the layout can't hold goes field by field instead
+        try:
+            return (unpack_weapon, (self.to_bytes(),))
+        except ValueError:
+            return (_weapon_from_fields, (dict(self.__dict__),))
+
+
+# Binary layout of a PlayerWeapon, little-endian: format version, enum
+# ordinals, RoF, the numeric stats, then the byte lengths of name,
+# reference and extra, which follow as utf-8. Ordinals are declaration
+# order: only ever append enum members, or bump WEAPON_FORMAT_VERSION.
+WEAPON_FORMAT_VERSION = 1
+_WEAPON_STRUCT = struct.Struct('<BBBBB?HHihhhiddHHH')
+_WEAPONS_COUNT = struct.Struct('<I')
+
+_WEAPON_CLASSES = tuple(WeaponClass)
+_WEAPON_TYPES = tuple(WeaponType)
+_DAMAGE_TYPES = tuple(DamageType)
+_AVAILABILITIES = tuple(ItemAvailability)
+_WEAPON_CLASS_ORDINALS = {member: i for i, member in enumerate(_WEAPON_CLASSES)}
+_WEAPON_TYPE_ORDINALS = {member: i for i, member in enumerate(_WEAPON_TYPES)}
+_DAMAGE_TYPE_ORDINALS = {member: i for i, member in enumerate(_DAMAGE_TYPES)}
+_AVAILABILITY_ORDINALS = {member: i for i, member in enumerate(_AVAILABILITIES)}
+
+
+def _pack_weapon(weapon):
+    name = (weapon.name or '').encode('utf-8')
+    reference = weapon.reference.encode('utf-8')
+    extra = weapon.extra.encode('utf-8')
+    single, semi, auto = weapon.rof
+    try:
+        header = _WEAPON_STRUCT.pack(WEAPON_FORMAT_VERSION,
+                                     _WEAPON_CLASS_ORDINALS[weapon.weapon_class],
+                                     _WEAPON_TYPE_ORDINALS[weapon.weapon_type],
+                                     _DAMAGE_TYPE_ORDINALS[weapon.damage_type],
+                                     # IntEnum, so a plain int finds its member too
+                                     _AVAILABILITY_ORDINALS[weapon.availability],
+                                     single, semi, auto,
+                                     weapon.weapon_range, weapon.damage_roll,
+                                     weapon.damage_bonus, weapon.pen, weapon.clip,
+                                     math.nan if weapon.reload_time is None else weapon.reload_time,
+                                     math.nan if weapon.mass is None else weapon.mass,
+                                     len(name), len(reference), len(extra))
+    except KeyError as e:
+        raise ValueError(f'{weapon.name} does not fit the binary weapon layout: '
+                         f'no ordinal for {e.args[0]!r}')
+    except struct.error as e:
+        raise ValueError(f'{weapon.name} does not fit the binary weapon layout: {e}')
+    return b''.join((header, name, reference, extra))
+
+
+def _unpack_weapon(buf, offset):
+    (version, weapon_class, weapon_type, damage_type, availability,
+     single, semi, auto, weapon_range, damage_roll, damage_bonus, pen, clip,
+     reload_time, mass,
+     n_name, n_reference, n_extra) = _WEAPON_STRUCT.unpack_from(buf, offset)
+    if version != WEAPON_FORMAT_VERSION:
+        raise ValueError(f'Unknown weapon format version: {version}')
+
+    offset += _WEAPON_STRUCT.size
+    name = str(buf[offset:offset + n_name], 'utf-8')
+    offset += n_name
+    reference = str(buf[offset:offset + n_reference], 'utf-8')
+    offset += n_reference
+    extra = str(buf[offset:offset + n_extra], 'utf-8')
+    offset += n_extra
+
+    # the fields are already validated, so skip the keyword-only, frozen
+    # __init__ and fill the instance directly
+    weapon = object.__new__(PlayerWeapon)
+    weapon.__dict__.update(name=name,
+                           availability=_AVAILABILITIES[availability],
+                           mass=None if mass != mass else mass,
+                           weapon_class=_WEAPON_CLASSES[weapon_class],
+                           weapon_type=_WEAPON_TYPES[weapon_type],
+                           weapon_range=weapon_range,
+                           rof=(single, semi, auto),
+                           damage_roll=damage_roll,
+                           damage_bonus=damage_bonus,
+                           damage_type=_DAMAGE_TYPES[damage_type],
+                           pen=pen,
+                           clip=clip,
+                           reload_time=None if reload_time != reload_time else reload_time,
+                           reference=reference,
+                           extra=extra)
+    return weapon, offset
+
+
+def _weapon_from_fields(fields):
+    weapon = object.__new__(PlayerWeapon)
+    weapon.__dict__.update(fields)
+    return weapon
+
+
+def unpack_weapon(data) -> PlayerWeapon:
+    """The PlayerWeapon packed in data, interned in the weapon registry."""
+    return get_weapon_registry().from_bytes(data)
+
+
+def pack_weapons(weapons) -> bytes:
+    """Pack a sequence of PlayerWeapons: a count, then each weapon's bytes."""
+    weapons = list(weapons)
+    return b''.join([_WEAPONS_COUNT.pack(len(weapons))] +
+                    [_pack_weapon(weapon) for weapon in weapons])
+
+
+def unpack_weapons(data) -> list:
+    """The PlayerWeapons packed by `pack_weapons`."""
+    n_weapons, = _WEAPONS_COUNT.unpack_from(data, 0)
+    offset = _WEAPONS_COUNT.size
+    weapons = []
+    for _ in range(n_weapons):
+        weapon, offset = _unpack_weapon(data, offset)
+        weapons.append(weapon)
+    return weapons
+
 
 @require_kwargs
 @dataclass(frozen=True)
@@ -97,19 +228,51 @@ class PlayerWeaponUpgrade(Item):
 
 
 class PlayerWeaponInstance(InstanceMixin):
+    """A weapon in hand: a PlayerWeapon model plus its craftsmanship.
+
+    The model is frozen, so the stats the attack code reads are flattened
+    onto the instance once here instead of resolved through the model on
+    every attack: test characteristic, RoF caps and range bands.
+    """
+
+    __slots__ = ('weapon_model', 'test_characteristic', 'upgrades',
+                 'name', 'weapon_class', 'range', 'damage_roll', 'damage_bonus',
+                 'rof_single', 'rof_semi', 'rof_auto', 'single_hits_max',
+                 'melee_or_thrown', 'short_range', 'long_range', 'extreme_range',
+                 'attack_plans')
 
     def __init__(self, weapon_model: PlayerWeapon, *,
                        craftsmanship: Craftsmanship,
                        upgrades = None,
                        quantity: int = 1):
 
+        profile = get_weapon_registry().profile(weapon_model)
+        weapon_model = profile.weapon_model
         self.weapon_model = weapon_model
         self.test_characteristic = Characteristic.WeaponSkill \
             if self.weapon_model.weapon_class == WeaponClass.Melee \
             else Characteristic.BallisticSkill
 
         self.upgrades = [] if upgrades is None else upgrades
-        
+
+        self.name = weapon_model.name
+        self.weapon_class = weapon_model.weapon_class
+        self.range = weapon_model.weapon_range
+        self.damage_roll = weapon_model.damage_roll
+        self.damage_bonus = weapon_model.damage_bonus
+        self.rof_single, self.rof_semi, self.rof_auto = weapon_model.rof
+        # hits cap without a burst action
+        self.single_hits_max = 1 if self.weapon_class == WeaponClass.Melee \
+                               else int(self.rof_single)
+        # no range modifiers, and the characteristic bonus adds to damage
+        self.melee_or_thrown = self.weapon_class in (WeaponClass.Melee, WeaponClass.Thrown)
+        self.short_range = profile.short_range
+        self.long_range = profile.long_range
+        self.extreme_range = profile.extreme_range
+        # combat.AttackPlan by action set, filled in by combat.instance_attack_plan;
+        # plans only depend on the model, so every instance of it shares them
+        self.attack_plans = profile.attack_plans
+
         super().__init__(craftsmanship=craftsmanship,
                          quantity=quantity)
 
@@ -117,42 +280,113 @@ class PlayerWeaponInstance(InstanceMixin):
         return f'<{self.name} {self.damage_roll}d10+{self.damage_bonus}{self.pretty_damage_type} {self.pretty_rof} {self.range}m>'
 
     @property
-    def weapon_class(self):
-        return self.weapon_model.weapon_class
-
-    @property
-    def range(self):
-        return self.weapon_model.weapon_range
+    def pretty_rof(self):
+        return self.weapon_model.pretty_rof
 
     @property
-    def name(self):
-        return self.weapon_model.name
+    def pretty_damage_type(self):
+        return self.weapon_model.pretty_damage_type
 
-    @property
-    def damage_bonus(self):
-        return self.weapon_model.damage_bonus
 
-    @property
-    def damage_roll(self):
-        return self.weapon_model.damage_roll
+class WeaponProfile:
+    """Precomputations for one distinct weapon model, shared by all its uses.
 
-    @property
-    def rof_single(self):
-        return self.weapon_model.rof[0]
+    The range band thresholds are set up front; the per-hit damage
+    distributions are computed on first use.
+    """
 
-    @property
-    def rof_semi(self):
-        return self.weapon_model.rof[1]
+    __slots__ = ('weapon_model', 'short_range', 'long_range', 'extreme_range',
+                 'attack_plans', '_hit_damage_pmfs', '__weakref__')
 
-    @property
-    def pretty_rof(self):
-        return self.weapon_model.pretty_rof
+    def __init__(self, weapon_model: PlayerWeapon):
+        self.weapon_model = weapon_model
+        try:
+            self.short_range = weapon_model.weapon_range / 2
+            self.long_range = weapon_model.weapon_range * 2
+            self.extreme_range = weapon_model.weapon_range * 3
+        except TypeError:
+            # an uninterned model with no usable range; it can be held and
+            # shown, and its attacks fail validation
+            self.short_range = self.long_range = self.extreme_range = None
+        self.attack_plans = {}
+        self._hit_damage_pmfs = {}
+
+    def hit_damage_pmf(self, degrees: int, test: int):
+        """`exact.hit_damage_pmf` for this weapon, memoized by degrees and test."""
+        key = (degrees, test)
+        try:
+            return self._hit_damage_pmfs[key]
+        except KeyError:
+            pass
+        from .exact import fury_pmf, hit_damage_pmf
+
+        pmf = hit_damage_pmf(self.weapon_model.damage_roll, self.weapon_model.damage_bonus,
+                             degrees, fury_pmf(test))
+        self._hit_damage_pmfs[key] = pmf
+        return pmf
+
+
+class WeaponRegistry:
+    """Interns PlayerWeapons by content, each with its WeaponProfile.
+
+    Equal models resolve to one shared instance, so memory and
+    precomputation scale with the number of distinct weapons rather than
+    the number of requests. The packed bytes of a model are its key; the
+    least recently used profiles are dropped past maxsize. The interned
+    models are also found by identity, without packing them again. A model
+    the binary layout can't hold gets a profile of its own, uninterned.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.profiles = LRUCache(maxsize=maxsize)
+        # id(interned model) -> its profile, for as long as the LRU keeps it;
+        # the profile holds the model, so the id can't be reused meanwhile
+        self._by_identity = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def _profile(self, key, weapon_model=None):
+        profile = self.profiles.get(key)
+        if profile is None:
+            if weapon_model is None:
+                weapon_model = _unpack_weapon(key, 0)[0]
+            profile = WeaponProfile(weapon_model)
+            self.profiles.put(key, profile)
+            self._by_identity[id(profile.weapon_model)] = profile
+        return profile
+
+    def profile(self, weapon_model: PlayerWeapon) -> WeaponProfile:
+        profile = self._by_identity.get(id(weapon_model))
+        if profile is not None and profile.weapon_model is weapon_model:
+            return profile
+        try:
+            key = weapon_model.to_bytes()
+        except ValueError:
+            return WeaponProfile(weapon_model)
+        return self._profile(key, weapon_model)
+
+    def intern(self, weapon_model: PlayerWeapon) -> PlayerWeapon:
+        """The shared instance equal to weapon_model."""
+        return self.profile(weapon_model).weapon_model
+
+    def from_bytes(self, data) -> PlayerWeapon:
+        """Like `PlayerWeapon.from_bytes`, but skips decoding known weapons."""
+        return self._profile(bytes(data)).weapon_model
+
+    def from_dict(self, data) -> PlayerWeapon:
+        return self.intern(PlayerWeapon.from_dict(data))
+
+    def clear(self):
+        self.profiles.clear()
+        self._by_identity.clear()
 
     @property
-    def pretty_damage_type(self):
-        return self.weapon_model.pretty_damage_type
+    def stats(self):
+        return self.profiles.stats
 
-    @property
-    def rof_auto(self):
-        return self.weapon_model.rof[2]
 
+@functools.lru_cache(maxsize=None)
+def get_weapon_registry():
+    """The process-wide weapon registry."""
+    return WeaponRegistry()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : workers.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+
+
+class SimulationRejected(RuntimeError):
+    """Raised when the pool is saturated or a user is at their job limit."""
+
+
+def simulation_job(weapon_model, craftsmanship, BS, target_range, action_names,
+                   N=10000, seed=None, engine='vector', chunk_size=None):
+    """Run `simulate.simulate_attack_summary` in a worker process.
+
+    Actions go by name: CombatActions are compared by identity, so
+    unpickled copies wouldn't match the worker's COMBAT_ACTIONS.
+    """
+    from .combat import COMBAT_ACTIONS
+    from .simulate import simulate_attack_summary
+    from .weapons import PlayerWeaponInstance
+
+    instance = PlayerWeaponInstance(weapon_model, craftsmanship=craftsmanship)
+    actions = [COMBAT_ACTIONS[name] for name in action_names]
+    return simulate_attack_summary(instance, BS, target_range, actions, N=N,
+                                   engine=engine, seed=seed, chunk_size=chunk_size)
+
+
+class SimulationPool:
+    """A process pool for CPU-bound combat work, awaitable from the event loop.
+
+    Keeps simulations off the loop shared by Quart and the discord bot.
+    At most max_pending jobs are queued or running at once, and at most
+    per_user_limit of them for any one user; past that, `run` raises
+    SimulationRejected rather than queueing without bound. Cancelling
+    the awaiting task cancels the job if it hasn't started.
+    """
+
+    def __init__(self, max_workers=None, max_pending: int = 16, per_user_limit: int = 2):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.per_user_limit = per_user_limit
+        self.log = logging.getLogger('omnissiah.workers')
+
+        self._executor = None
+        self._futures = defaultdict(set)
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    @property
+    def running(self):
+        return self._executor is not None
+
+    @property
+    def pending(self):
+        return sum(len(futures) for futures in self._futures.values())
+
+    def user_pending(self, user):
+        return len(self._futures.get(user, ()))
+
+    def start(self):
+        if self._executor is None:
+            # spawn, not fork: the parent has an event loop and driver threads
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            self.log.info(f'Started simulation pool: {self.max_workers or "cpu_count"} workers')
+        return self
+
+    def shutdown(self, wait: bool = False):
+        """Cancel every queued job and stop the pool."""
+        if self._executor is None:
+            return
+        for user in list(self._futures):
+            self.cancel_user(user)
+        self._executor.shutdown(wait=wait)
+        self._executor = None
+        self.log.info(f'Stopped simulation pool: {self.stats}')
+
+    def _reserve(self, user):
+        if self._executor is None:
+            raise RuntimeError('SimulationPool is not running')
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise SimulationRejected('The simulation queue is full, try again shortly.')
+        if self.user_pending(user) >= self.per_user_limit:
+            self.rejected += 1
+            raise SimulationRejected(f'You already have {self.per_user_limit} '
+                                     'simulations running.')
+
+    def _release(self, user, future):
+        futures = self._futures.get(user)
+        if futures is not None:
+            futures.discard(future)
+            if not futures:
+                del self._futures[user]
+
+    async def run(self, fn, *args, user=None, **kwargs):
+        """Run fn(*args, **kwargs) in the pool and await its result.
+
+        fn and its arguments must be picklable. Raises SimulationRejected
+        if the job would exceed the queue or per-user limits.
+        """
+        self._reserve(user)
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._futures[user].add(future)
+        self.submitted += 1
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancelled() and future.cancel():
+                self.cancelled += 1
+            raise
+        finally:
+            self._release(user, future)
+        self.completed += 1
+        return result
+
+    def cancel_user(self, user):
+        """Cancel a user's queued jobs; returns how many were cancelled.
+
+        Jobs already running in a worker can't be interrupted and run to
+        completion; long work should be split into several jobs.
+        """
+        n_cancelled = 0
+        for future in list(self._futures.get(user, ())):
+            if future.cancel():
+                n_cancelled += 1
+        self.cancelled += n_cancelled
+        return n_cancelled
+
+    @property
+    def stats(self):
+        return {'pending': self.pending,
+                'max_pending': self.max_pending,
+                'per_user_limit': self.per_user_limit,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'cancelled': self.cancelled}
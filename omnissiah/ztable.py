@@ -6,28 +6,33 @@
 # Author : Camille Scott <camille.scott.w@gmail.com>
 # Date   : 22.02.2021
 
+import bisect
 from collections import OrderedDict
+import functools
 import glob
+import hashlib
 import os
-import typing
+import pickle
 
-import dice
 import yaml
 
-from discord import Embed
-from discord.ext import commands
-from disputils import BotEmbedPaginator
+from .rng import get_rng, parse_dice
+from .utils import __pkg_dir__, default_cache_dir
 
-from .logging import LoggingMixin
-from zardoz.rolls import SimpleRollConvert
-from .utils import __pkg_dir__
+
+# tables spanning fewer rolls than this get a dense lookup list
+DENSE_TABLE_SIZE = 1024
+# bump when RollTable's compiled layout changes to invalidate old caches
+TABLE_CACHE_VERSION = 1
+
+YAMLLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
 
 class RollTable:
 
     def __init__(self, table_yaml):
         with open(table_yaml) as fp:
-            data = yaml.safe_load(fp)
+            data = yaml.load(fp, Loader=YAMLLoader)
 
         self.full_name = data['full_name']
         self.slug = data['slug']
@@ -35,19 +40,55 @@ class RollTable:
         self.book = data['book']
         self.die = data['die']
         self.rolls = data['rolls']
-    
-    
-    def get(self, roll):
-        for option in self.rolls:
+        self._compile()
+
+    def _compile(self):
+        """Build the lookup index, rejecting gaps, overlaps and short coverage."""
+        options = sorted(self.rolls, key=lambda option: option['range'][0])
+        self._lowers, self._uppers, self._entries = [], [], []
+        for option in options:
             lower, upper = option['range']
+            if lower > upper:
+                raise ValueError(f'{self.slug}: bad range {option["range"]}')
+            if self._uppers and lower <= self._uppers[-1]:
+                raise ValueError(f'{self.slug}: {option["range"]} overlaps '\
+                                 f'[{self._lowers[-1]}, {self._uppers[-1]}]')
+            if self._uppers and lower > self._uppers[-1] + 1:
+                raise ValueError(f'{self.slug}: gap between {self._uppers[-1]} and {lower}')
             name = '' if not option['name'] else option['name'].strip()
-            if lower <= roll <= upper:
-                return name, ' '.join(option['effect'].split())
+            effect = ' '.join((option['effect'] or '').split())
+            self._lowers.append(lower)
+            self._uppers.append(upper)
+            self._entries.append((name, effect))
+
+        n_dice, sides, modifier = parse_dice(self.die)
+        if not self._entries or self._lowers[0] > n_dice + modifier \
+           or self._uppers[-1] < n_dice * sides + modifier:
+            raise ValueError(f'{self.slug}: entries do not cover {self.die}')
+
+        # small tables get a dense roll -> entry index
+        self._min = self._lowers[0]
+        if self._uppers[-1] - self._min < DENSE_TABLE_SIZE:
+            self._dense = []
+            for idx, (lower, upper) in enumerate(zip(self._lowers, self._uppers)):
+                self._dense.extend([idx] * (upper - lower + 1))
+        else:
+            self._dense = None
+
+    def get(self, roll):
+        if self._dense is not None:
+            idx = roll - self._min
+            if 0 <= idx < len(self._dense):
+                return self._entries[self._dense[idx]]
+        else:
+            idx = bisect.bisect_right(self._lowers, roll) - 1
+            if idx >= 0 and roll <= self._uppers[idx]:
+                return self._entries[idx]
 
         raise ValueError(f'No entry for {roll}')
 
-    def roll(self, modifers = None):
-        rolled_val = int(dice.roll(self.die))
+    def roll(self, modifers = None, rng=None):
+        rolled_val = (rng or get_rng()).roll_expr(self.die)
         name, effect = self.get(rolled_val)
 
         return rolled_val, name, effect
@@ -73,81 +114,76 @@ class RollTable:
         yield result
 
 
-def load_crit_tables(log=None):
-    
-    files = glob.glob(os.path.join(__pkg_dir__, 'gamedata', 'tables', '*.yaml'))
-    tables = {}
-    for file_path in files:
-        table = RollTable(file_path)
-        tables[table.slug] = table
-    return OrderedDict(sorted(tables.items(), key=lambda tup: tup[0]))
-
-
-TABLES = load_crit_tables()
-
+def table_files():
+    return sorted(glob.glob(os.path.join(__pkg_dir__, 'gamedata', 'tables', '*.yaml')))
 
-class TableConvert(commands.Converter):
 
-    async def convert(self, ctx, argument):
+def table_cache_key(files):
+    """Key for the compiled table cache: changes when any table file does."""
+    digest = hashlib.sha1(f'v{TABLE_CACHE_VERSION}'.encode())
+    for file_path in files:
+        stat = os.stat(file_path)
+        digest.update(f'{os.path.basename(file_path)}:{stat.st_mtime_ns}:{stat.st_size};'.encode())
+    return digest.hexdigest()
+
+
+def load_crit_tables(log=None, cache_dir=None, use_cache=True):
+    """Load every table in gamedata/tables, keyed by slug.
+
+    Compiled tables are pickled to cache_dir (default: the XDG cache dir),
+    keyed by the table files' names, mtimes and sizes, so later loads skip
+    parsing the YAML.
+    """
+    files = table_files()
+    cache_path = None
+    if use_cache:
+        if cache_dir is None:
+            from . import __testing__
+            cache_dir = default_cache_dir(debug=__testing__)
+        cache_path = os.path.join(cache_dir, f'tables-{table_cache_key(files)}.pickle')
         try:
-            table = TABLES[argument]
-        except KeyError:
-            raise commands.BadArgument(f'{argument} is not a valid table.')
-        return table
-
-
-class TableCommands(commands.Cog, LoggingMixin):
-
-    def __init__(self, bot, db):
-        self.bot = bot
-        self.db = db
-        super().__init__()
-
-        self.log.info(f'Loaded tables: {TABLES}')
-
-    @commands.group(name='table', help='Roll on a table.')
-    async def table(self, ctx):
-        if ctx.invoked_subcommand is not None:
-            return
-
-    @table.command(name='get', help='Get or roll a table entry.')
-    async def table_get(self, ctx,
-                           table: TableConvert = None,
-                           val: typing.Union[int, SimpleRollConvert] = None,
-                           *, cmd=''):
+            with open(cache_path, 'rb') as fp:
+                return pickle.load(fp)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            if log is not None:
+                log.warning(f'Ignoring bad table cache {cache_path}: {e}')
 
-        if table is None:
-            header = '**Available Tables:**'
-            body = []
-            for slug, table in TABLES.items():
-                body.append(f'`{slug:15}` {table.full_name} ({table.game}, {table.book})')
-            body = '\n'.join(body)
-            await ctx.message.reply(f'{header}\n{body}')
-
-            self.log.info(f'/ztable: {table.slug}, {val}')
-            return
+    tables = {}
+    for file_path in files:
+        table = RollTable(file_path)
+        tables[table.slug] = table
+    tables = OrderedDict(sorted(tables.items(), key=lambda tup: tup[0]))
 
+    if cache_path is not None:
         try:
-            if val is None:
-                val, name, effect = table.roll()
-                result = f'{table.die} ⤳ {val}'
-            else:
-                name, effect = table.get(int(val))
-                result = f'{val}'
-        except ValueError:
-            await ctx.message.reply(f'Bad table value. Perils be upon ye.')
-        else:
-            msg = [f'**Roll:** {result}',
-                   f'**Table:** {table.full_name} ({table.game}, {table.book})']
-            if name:
-                msg.append(f'**Name:** {name}')
-            msg.append(f'**Effect:** {effect}')
-
-            await ctx.message.reply('\n'.join(msg))
-
-    @table.command(name='show', help='Show the given table.')
-    async def table_show(self, ctx, table: TableConvert):
-        chunks = [Embed(title=f'{table.full_name} ({table.game}, {table.book})',
-                        description=d) for d in table.paginate()]
-        paginator = BotEmbedPaginator(ctx, chunks)
-        await paginator.run()
+            os.makedirs(cache_dir, exist_ok=True)
+            for stale in glob.glob(os.path.join(cache_dir, 'tables-*.pickle')):
+                os.remove(stale)
+            tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as fp:
+                pickle.dump(tables, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            if log is not None:
+                log.warning(f'Could not write table cache {cache_path}: {e}')
+
+    return tables
+
+
+@functools.lru_cache(maxsize=None)
+def get_tables():
+    """The game tables, loaded on first use."""
+    return load_crit_tables()
+
+
+def __getattr__(name):
+    # TABLES used to be loaded at import; keep it as a lazy alias
+    if name == 'TABLES':
+        return get_tables()
+    # the bot cog lives in .cogs so the CLI doesn't import discord
+    if name in ('TableConvert', 'TableCommands'):
+        from . import cogs
+        return getattr(cogs, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
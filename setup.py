@@ -14,6 +14,7 @@ requirements = ['discord.py',
                 'dice',
                 'pyyaml',
                 'xdg',
+                'numpy',
                 'aiofiles',
                 'aiosql',
                 'aiosqlite']
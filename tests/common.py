@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : common.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import dataclasses
+
+from omnissiah.items import Craftsmanship, ItemAvailability
+from omnissiah.weapons import (DamageType, PlayerWeapon, PlayerWeaponInstance,
+                               WeaponClass, WeaponType)
+
+
+def make_weapon(**fields):
+    """A bolter-ish weapon that supports every firing mode, with fields overridden."""
+    weapon = PlayerWeapon(name='Godwyn-Deaz Bolter',
+                          availability=ItemAvailability.Rare,
+                          mass=7.0,
+                          weapon_class=WeaponClass.Basic,
+                          weapon_type=WeaponType.Bolt,
+                          weapon_range=100,
+                          rof=(True, 2, 4),
+                          damage_roll=1,
+                          damage_bonus=5,
+                          damage_type=DamageType.Explosive,
+                          pen=4,
+                          clip=24,
+                          reload_time=1.0)
+    return dataclasses.replace(weapon, **fields)
+
+
+def make_instance(**fields):
+    return PlayerWeaponInstance(make_weapon(**fields), craftsmanship=Craftsmanship.Common)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_batch.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import numpy as np
+import pytest
+
+from omnissiah.batch import batch_player_attack
+from omnissiah.combat import COMBAT_ACTIONS, player_attack
+from omnissiah.rng import DiceRNG
+from omnissiah.weapons import WeaponClass
+
+from .common import make_instance
+
+
+SCALAR_TRIALS = 20000
+VECTOR_TRIALS = 100000
+# differences allowed between the engines, in standard errors
+TOLERANCE = 5
+
+# (weapon fields, BS or WS, actions, target range)
+ATTACKS = {
+    'semi': ({}, 45, ['Semi Auto Burst'], 30),
+    'full auto aimed': ({}, 40, ['Full Auto Burst', 'Aim Half'], 30),
+    'melee all out': ({'weapon_class': WeaponClass.Melee, 'rof': (True, 0, 0), 'weapon_range': 1},
+                      40, ['All Out Attack'], 1),
+    'extreme range': ({}, 50, ['Standard Attack'], 310),
+}
+
+
+def scalar_results(instance, char_val, actions, target_range, seed):
+    rng = DiceRNG(seed)
+    damage, success = [], []
+    for _ in range(SCALAR_TRIALS):
+        status, ctx = player_attack(instance, char_val, actions=actions,
+                                    target_range=target_range, rng=rng)
+        damage.append(ctx.total_damage if status else 0)
+        success.append(status)
+    return np.array(damage), np.array(success, dtype=float)
+
+
+def assert_same_mean(a, b):
+    se = np.sqrt(a.var() / len(a) + b.var() / len(b))
+    assert abs(a.mean() - b.mean()) <= TOLERANCE * se + 1e-9
+
+
+@pytest.mark.parametrize('attack', ATTACKS)
+def test_vector_engine_matches_scalar(attack):
+    fields, char_val, names, target_range = ATTACKS[attack]
+    instance = make_instance(**fields)
+    actions = [COMBAT_ACTIONS[name] for name in names]
+
+    damage, success = scalar_results(instance, char_val, actions, target_range, seed=1)
+    result = batch_player_attack(instance, char_val, actions=actions, target_range=target_range,
+                                 N=VECTOR_TRIALS, rng=DiceRNG(2))
+
+    assert_same_mean(damage, result['damage'])
+    assert_same_mean(success, result['success'].astype(float))
+
+
+def test_vector_engine_replays_seed():
+    instance = make_instance()
+    actions = [COMBAT_ACTIONS['Full Auto Burst']]
+    first, second = (batch_player_attack(instance, 45, actions=actions, target_range=30,
+                                         N=5000, rng=DiceRNG(7), chunk_size=1000)
+                     for _ in range(2))
+    for key in first:
+        np.testing.assert_array_equal(first[key], second[key])
+    other = batch_player_attack(instance, 45, actions=actions, target_range=30,
+                                N=5000, rng=DiceRNG(8))
+    assert not np.array_equal(first['damage'], other['damage'])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_bulk.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import io
+import json
+
+import pytest
+
+from omnissiah.bulk import iter_json_array, iter_yaml_sequence, parse_weapons, validate_weapon_entry
+
+from .common import make_weapon
+
+
+ENTRIES = [{'name': 'A', 'rof': [True, 2, 4]},
+           {'name': 'B "quoted", [bracketed]', 'nested': {'list': [1, 2, {'x': None}]}},
+           [1, 2, 3],
+           'a string with , and ]',
+           12345,
+           None]
+
+
+def json_entries(text, chunk_size=64):
+    return list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, 1 << 16])
+def test_json_array_across_chunks(chunk_size):
+    text = json.dumps(ENTRIES, indent=2)
+    assert json_entries(text, chunk_size) == ENTRIES
+
+
+@pytest.mark.parametrize('text, expected', [('[]', []),
+                                            ('  [ ]  ', []),
+                                            ('[1]', [1]),
+                                            ('[ {} , {} ]', [{}, {}]),
+                                            ('[10,20]', [10, 20])])
+def test_json_array_forms(text, expected):
+    assert json_entries(text, chunk_size=1) == expected
+
+
+@pytest.mark.parametrize('text', ['', '[', '[{"name": "A"}', '[{"name": "A"}, {"name":', '[1, 2,'])
+def test_json_array_truncated(text):
+    with pytest.raises(ValueError):
+        json_entries(text, chunk_size=3)
+
+
+def test_json_array_truncated_keeps_earlier_entries():
+    entries = iter_json_array(io.StringIO('[{"name": "A"}, {"name": "B"}, {"na'), chunk_size=4)
+    assert next(entries) == {'name': 'A'}
+    assert next(entries) == {'name': 'B'}
+    with pytest.raises(ValueError):
+        next(entries)
+
+
+@pytest.mark.parametrize('text', ['{"name": "A"}', '"weapons"', 'name: A'])
+def test_json_array_not_an_array(text):
+    with pytest.raises(ValueError, match='Expected a JSON array'):
+        json_entries(text)
+
+
+@pytest.mark.parametrize('text', ['[,{}]', '[{},,{}]', '[{},]', '[,]', '[{} {}]', '[1 2]'])
+def test_json_array_one_comma_between_elements(text):
+    with pytest.raises(ValueError):
+        json_entries(text, chunk_size=1)
+    with pytest.raises(ValueError):
+        json_entries(text)
+
+
+def test_yaml_multi_document_stream():
+    text = ('- name: A\n'
+            '- name: B\n'
+            '---\n'
+            'name: C\n'
+            '---\n'
+            '- name: D\n'
+            '  rof: [true, 2, 4]\n')
+    assert list(iter_yaml_sequence(io.StringIO(text))) == [{'name': 'A'}, {'name': 'B'}, {'name': 'C'},
+                                                           {'name': 'D', 'rof': [True, 2, 4]}]
+
+
+def test_yaml_empty_and_invalid():
+    assert list(iter_yaml_sequence(io.StringIO(''))) == []
+    with pytest.raises(ValueError, match='Invalid YAML'):
+        list(iter_yaml_sequence(io.StringIO('- name: A\n- [unclosed\n')))
+
+
+def test_validate_weapon_entry():
+    weapon = make_weapon()
+    assert validate_weapon_entry(json.loads(json.dumps(weapon.to_dict()))) == weapon
+
+
+@pytest.mark.parametrize('changes, message', [({'name': ''}, 'name'),
+                                              ({'weapon_range': 0}, 'weapon_range'),
+                                              ({'damage_roll': 0}, 'damage_roll'),
+                                              ({'clip': 'lots'}, ''),
+                                              ({'rof': [True, 2]}, 'rof'),
+                                              ({'rof': [True, -1, 4]}, 'rof'),
+                                              ({'damage_type': 'Psychic'}, ''),
+                                              ({'weapon_range': 2 ** 40}, 'binary weapon layout')])
+def test_validate_weapon_entry_rejects(changes, message):
+    entry = {**json.loads(json.dumps(make_weapon().to_dict())), **changes}
+    with pytest.raises(ValueError, match=message or None):
+        validate_weapon_entry(entry)
+
+
+def test_validate_weapon_entry_needs_mapping():
+    with pytest.raises(ValueError, match='mapping'):
+        validate_weapon_entry(['not', 'a', 'weapon'])
+
+
+def test_parse_weapons():
+    good = json.loads(json.dumps(make_weapon().to_dict()))
+    results = list(parse_weapons([good, {**good, 'damage_roll': 0}, 'junk', good], start=5))
+    assert [number for number, _, _ in results] == [5, 6, 7, 8]
+    assert [weapon is not None for _, weapon, _ in results] == [True, False, False, True]
+    assert [error is not None for _, _, error in results] == [False, True, True, False]
+
+
+def test_parse_weapons_stops_at_malformed_stream():
+    good = json.dumps(make_weapon().to_dict())
+    text = f'[{good}, {good}, {{"name": '
+    results = list(parse_weapons(iter_json_array(io.StringIO(text), chunk_size=16)))
+    assert [(number, error is None) for number, _, error in results] == [(1, True), (2, True), (None, False)]
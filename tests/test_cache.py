@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_cache.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import numpy as np
+import pytest
+
+from omnissiah import cache, simulate
+from omnissiah.__main__ import main
+from omnissiah.cache import LRUCache, SimulationCache, simulation_key
+from omnissiah.combat import COMBAT_ACTIONS
+from omnissiah.items import Craftsmanship
+from omnissiah.stats import AttackSummary
+from omnissiah.weapons import DamageType, WeaponClass, WeaponType
+
+from .common import make_weapon
+
+
+QUERY = dict(craftsmanship=Craftsmanship.Common, BS=45, target_range=30,
+             actions=['Semi Auto Burst', 'Aim Half'], N=10000, seed=None)
+
+
+def key(weapon=None, **changes):
+    query = {**QUERY, **changes}
+    return simulation_key(weapon or make_weapon(), query.pop('craftsmanship'), query.pop('BS'),
+                          query.pop('target_range'), query.pop('actions'), query.pop('N'),
+                          **query)
+
+
+def test_simulation_key_stable():
+    assert key() == key()
+    # fields that don't feed into an attack don't change it
+    assert key(make_weapon(name='Other', mass=1.0, clip=5, reference='p. 1')) == key()
+    # actions by name or by CombatAction, in any order
+    actions = [COMBAT_ACTIONS['Aim Half'], COMBAT_ACTIONS['Semi Auto Burst']]
+    assert key(actions=actions) == key()
+
+
+@pytest.mark.parametrize('weapon', [{'weapon_class': WeaponClass.Pistol},
+                                    {'weapon_type': WeaponType.Las},
+                                    {'weapon_range': 50},
+                                    {'rof': (True, 3, 4)},
+                                    {'damage_roll': 2},
+                                    {'damage_bonus': 4},
+                                    {'damage_type': DamageType.Impact},
+                                    {'pen': 5}])
+def test_simulation_key_changes_with_weapon(weapon):
+    assert key(make_weapon(**weapon)) != key()
+
+
+@pytest.mark.parametrize('changes', [{'craftsmanship': Craftsmanship.Best},
+                                     {'BS': 46},
+                                     {'target_range': 31},
+                                     {'actions': ['Semi Auto Burst']},
+                                     {'N': 10001},
+                                     {'seed': 1},
+                                     {'engine': 'scalar'},
+                                     {'sr_precision': .005}])
+def test_simulation_key_changes_with_query(changes):
+    assert key(**changes) != key()
+
+
+def test_lru_cache_evicts_least_recent():
+    lru = LRUCache(maxsize=2)
+    lru.put('a', 1)
+    lru.put('b', 2)
+    assert lru.get('a') == 1
+    lru.put('c', 3)
+    assert 'b' not in lru
+    assert lru.get('b') is None
+    assert (lru.get('a'), lru.get('c')) == (1, 3)
+    assert lru.stats['hits'] == 3
+    assert lru.stats['misses'] == 1
+
+
+def test_lru_cache_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    lru = LRUCache(ttl=10)
+    lru.put('a', 1)
+    now[0] += 9
+    assert lru.get('a') == 1
+    now[0] += 1
+    assert lru.get('a') is None
+    assert lru.stats['expired'] == 1
+
+
+def make_summary(seed):
+    rng = np.random.default_rng(seed)
+    return AttackSummary().update(rng.integers(0, 30, size=1000))
+
+
+def test_simulation_cache_round_trip(tmp_path):
+    path = tmp_path / 'simulations.sqlite'
+    summary = make_summary(1)
+    first = SimulationCache(path)
+    assert first.get(key()) is None
+    first.put(key(), summary)
+    assert first.get(key()) is summary
+    first.close()
+
+    # a new process finds it on disk, then in memory
+    second = SimulationCache(path)
+    loaded = second.get(key())
+    assert loaded.to_dict() == summary.to_dict()
+    assert second.get(key()) is loaded
+    assert second.stats['disk_hits'] == 1
+    assert second.stats['memory']['hits'] == 1
+
+    second.clear()
+    assert second.get(key()) is None
+    second.close()
+
+
+def test_simulation_cache_get_or_compute(tmp_path):
+    simulations = SimulationCache(tmp_path / 'simulations.sqlite')
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return make_summary(2)
+
+    summary, cached = simulations.get_or_compute(key(), compute)
+    assert not cached
+    again, cached = simulations.get_or_compute(key(), compute)
+    assert cached and again is summary
+    assert len(calls) == 1
+    simulations.close()
+
+
+def test_cli_caches_only_seeded_runs(tmp_path, monkeypatch):
+    simulations = SimulationCache(tmp_path / 'simulations.sqlite')
+    monkeypatch.setattr(cache, 'get_simulation_cache', lambda: simulations)
+    titles = []
+    monkeypatch.setattr(simulate, 'plot_simulation_plottile',
+                        lambda summary, title='', **kwargs: titles.append(title))
+
+    argv = ['simulate', '-N', '2000', '--actions', 'Standard Attack']
+    main(argv)
+    main(argv)
+    assert not any('(cached)' in title for title in titles)
+    assert simulations.stats['memory']['size'] == 0
+
+    main(argv + ['--seed', '5'])
+    main(argv + ['--seed', '5'])
+    assert '(cached)' not in titles[2]
+    assert '(cached)' in titles[3]
+    simulations.close()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_combat.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import pytest
+
+from omnissiah.combat import COMBAT_ACTIONS, validate_attack
+
+from .common import make_instance
+
+
+def test_validate_attack_range():
+    instance = make_instance(weapon_range=100)
+    assert validate_attack(instance, None, 400) == frozenset()
+    with pytest.raises(ValueError, match='cannot fire more than 400m'):
+        validate_attack(instance, None, 401)
+
+
+def test_validate_attack_zero_range():
+    with pytest.raises(ValueError, match='cannot fire more than 0m'):
+        validate_attack(make_instance(weapon_range=0), None, 10)
+
+
+def test_validate_attack_unsupported_mode():
+    instance = make_instance(rof=(True, 0, 0))
+    with pytest.raises(ValueError, match='semi-auto'):
+        validate_attack(instance, COMBAT_ACTIONS['Semi Auto Burst'], 10)
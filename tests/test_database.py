@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_database.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import asyncio
+import dataclasses
+
+import mongomock_motor
+import pytest
+
+from omnissiah import database
+from omnissiah.database import ARMOURY_PLAYER_WEAPONS, ArmouryCache
+from omnissiah.items import ItemAvailability
+from omnissiah.weapons import DamageType, PlayerWeapon, WeaponClass, WeaponType
+
+
+def make_weapon(name='Godwyn-Deaz Bolter'):
+    return PlayerWeapon(name=name,
+                        availability=ItemAvailability.Rare,
+                        mass=7.0,
+                        weapon_class=WeaponClass.Basic,
+                        weapon_type=WeaponType.Bolt,
+                        weapon_range=100,
+                        rof=(True, 2, 4),
+                        damage_roll=1,
+                        damage_bonus=5,
+                        damage_type=DamageType.Explosive,
+                        pen=4,
+                        clip=24,
+                        reload_time=1.0)
+
+
+@pytest.fixture
+def db():
+    return mongomock_motor.AsyncMongoMockClient()['omnissiah-test']
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_ensure_indexes(db):
+    # left over from earlier versions of INDEXES
+    for name, keys in [('user_id_name', [('user_id', 1), ('name', 1)]),
+                       ('user_id_weapon_class_damage_id', [('user_id', 1), ('weapon_class', 1),
+                                                           ('damage_roll', -1)])]:
+        run(db[ARMOURY_PLAYER_WEAPONS].create_index(keys, name=name))
+    run(database.ensure_indexes(db))
+    # a second run finds them all in place
+    run(database.ensure_indexes(db))
+
+    info = run(db[ARMOURY_PLAYER_WEAPONS].index_information())
+    assert set(info) == {'_id_', 'user_id_name_id', 'user_id_damage_id'}
+    assert list(info['user_id_name_id']['key']) == [('user_id', 1), ('name', 1), ('_id', 1)]
+    assert list(info['user_id_damage_id']['key']) == [('user_id', 1), ('damage_roll', -1),
+                                                      ('damage_bonus', -1), ('_id', -1)]
+
+
+def test_page_armoury_player_weapons_all_pages(db):
+    weapons = [dataclasses.replace(make_weapon(f'Gun {i}'), damage_roll=i % 3 + 1) for i in range(7)]
+    run(database.add_armoury_player_weapons(42, weapons, db=db))
+    # written before names were required
+    unnamed = {**make_weapon().to_dict(), 'user_id': 42, 'name': None}
+    run(db[ARMOURY_PLAYER_WEAPONS].insert_many([dict(unnamed), dict(unnamed)]))
+
+    async def all_pages(sort, filters=None):
+        names, after = [], None
+        while True:
+            page, after = await database.page_armoury_player_weapons(42, filters=filters, sort=sort,
+                                                                     after=after, limit=2, db=db)
+            names.extend(weapon.name for weapon, _ in page)
+            if after is None:
+                return names
+
+    assert run(all_pages('name')) == [None, None] + [f'Gun {i}' for i in range(7)]
+    by_damage = run(all_pages('damage'))
+    assert sorted(by_damage, key=str) == sorted([None, None] + [f'Gun {i}' for i in range(7)], key=str)
+    assert by_damage[:2] == ['Gun 5', 'Gun 2']
+    assert run(all_pages('name', {'min_damage': 3})) == ['Gun 2', 'Gun 5']
+
+
+def test_page_cursor_with_missing_name():
+    _id = database.ObjectId()
+    values = database.decode_page_cursor(database.encode_page_cursor({'_id': _id}))
+    assert values == [None, _id]
+    # past a null name comes every named weapon, then later nulls by _id
+    assert database.keyset_filter('name', values) == {'$or': [{'name': {'$ne': None}},
+                                                              {'name': None, '_id': {'$gt': _id}}]}
+
+
+def test_write_armoury_player_weapons_add_and_delete(db):
+    weapons = [make_weapon(f'Gun {i}') for i in range(3)]
+    result = run(database.write_armoury_player_weapons(42, add=weapons, db=db))
+    assert result.inserted_count == 3
+
+    documents = run(db[ARMOURY_PLAYER_WEAPONS].find({'user_id': 42}).to_list(None))
+    ids = {document['name']: document['_id'] for document in documents}
+
+    # one round trip that both adds and deletes
+    result = run(database.write_armoury_player_weapons(42, add=[make_weapon('Gun 3')],
+                                                       delete=[ids['Gun 0'], str(ids['Gun 1'])],
+                                                       db=db))
+    assert result.inserted_count == 1
+    assert result.deleted_count == 2
+
+    names = sorted(document['name'] for document in
+                   run(db[ARMOURY_PLAYER_WEAPONS].find({'user_id': 42}).to_list(None)))
+    assert names == ['Gun 2', 'Gun 3']
+
+
+def test_write_armoury_player_weapons_scoped_to_user(db):
+    run(database.write_armoury_player_weapons(1, add=[make_weapon()], db=db))
+    _id = run(db[ARMOURY_PLAYER_WEAPONS].find_one({'user_id': 1}))['_id']
+
+    result = run(database.write_armoury_player_weapons(2, delete=[_id], db=db))
+    assert result.deleted_count == 0
+    assert run(db[ARMOURY_PLAYER_WEAPONS].count_documents({'user_id': 1})) == 1
+
+
+def test_write_armoury_player_weapons_nothing_to_do(db):
+    assert run(database.write_armoury_player_weapons(42, db=db)) is None
+
+
+def test_query_armoury_player_weapons_round_trip(db):
+    weapon = make_weapon('Zeta')
+    run(database.add_armoury_player_weapons(42, [weapon, make_weapon('Alpha')], db=db))
+
+    async def query():
+        return [weapon async for weapon, _ in database.query_armoury_player_weapons(42, db=db)]
+
+    loaded = run(query())
+    assert [w.name for w in loaded] == ['Alpha', 'Zeta']
+    assert loaded[1] == weapon
+
+
+def test_armoury_cache_miss_then_hit(db):
+    cache = ArmouryCache()
+
+    async def scenario():
+        await database.add_armoury_player_weapons(42, make_weapon(), db=db)
+        first = await cache.get_player_weapons(42, db=db)
+        second = await cache.get_player_weapons('42', db=db)
+        return first, second
+
+    first, second = run(scenario())
+    assert len(first) == 1
+    assert second is first
+    assert cache.stats['misses'] == 1
+    assert cache.stats['hits'] == 1
+
+
+def test_armoury_cache_invalidated_by_writes(db):
+    cache = ArmouryCache()
+
+    async def scenario():
+        assert await cache.get_player_weapons(42, db=db) == ()
+
+        await cache.add_player_weapons(42, [make_weapon('A'), make_weapon('B')], db=db)
+        weapons = await cache.get_player_weapons(42, db=db)
+        assert [w.name for w, _ in weapons] == ['A', 'B']
+
+        await cache.delete_player_weapons(42, weapons[0][1], db=db)
+        weapons = await cache.get_player_weapons(42, db=db)
+        assert [w.name for w, _ in weapons] == ['B']
+        assert await cache.get_player_weapon(42, weapons[0][1], db=db) == weapons[0][0]
+
+    run(scenario())
+    # every write forced a reload; only get_player_weapon was served cached
+    assert cache.stats['misses'] == 3
+    assert cache.stats['hits'] == 1
+
+
+def test_armoury_cache_invalidate_drops_racing_load(db, monkeypatch):
+    cache = ArmouryCache()
+    query = database.query_armoury_player_weapons
+
+    async def scenario():
+        resume = asyncio.Event()
+
+        async def slow_query(*args, **kwargs):
+            rows = [row async for row in query(*args, **kwargs)]
+            await resume.wait()
+            for row in rows:
+                yield row
+
+        monkeypatch.setattr(database, 'query_armoury_player_weapons', slow_query)
+        await database.add_armoury_player_weapons(42, make_weapon('Old'), db=db)
+        loading = asyncio.ensure_future(cache.get_player_weapons(42, db=db))
+        await asyncio.sleep(0.01)
+
+        # a write lands after the load read, before it stores
+        await cache.add_player_weapons(42, make_weapon('New'), db=db)
+        resume.set()
+        stale = await loading
+        monkeypatch.setattr(database, 'query_armoury_player_weapons', query)
+        return stale, await cache.get_player_weapons(42, db=db)
+
+    stale, weapons = run(scenario())
+    assert [w.name for w, _ in stale] == ['Old']
+    assert sorted(w.name for w, _ in weapons) == ['New', 'Old']
+
+
+def test_armoury_cache_keeps_users_apart(db):
+    cache = ArmouryCache()
+
+    async def scenario():
+        await cache.add_player_weapons(1, make_weapon('Mine'), db=db)
+        await cache.add_player_weapons(2, dataclasses.replace(make_weapon(), name='Theirs'), db=db)
+        return (await cache.get_player_weapons(1, db=db),
+                await cache.get_player_weapons(2, db=db))
+
+    mine, theirs = run(scenario())
+    assert [w.name for w, _ in mine] == ['Mine']
+    assert [w.name for w, _ in theirs] == ['Theirs']
+
+
+def test_armoury_cache_keeps_no_state_per_user(db):
+    cache = ArmouryCache(maxsize=8)
+
+    async def scenario():
+        for user_id in range(100):
+            await cache.get_player_weapons(user_id, db=db)
+            cache.invalidate(user_id)
+        # invalidated mid-load
+        loads = [asyncio.ensure_future(cache.get_player_weapons(user_id, db=db))
+                 for user_id in range(100, 110)]
+        await asyncio.sleep(0)
+        for user_id in range(100, 110):
+            cache.invalidate(user_id)
+        await asyncio.gather(*loads)
+        await asyncio.sleep(0)
+
+    run(scenario())
+    assert len(cache.entries) == 0
+    assert not cache._loading
+    assert not cache._stale
+
+
+def test_armoury_cache_pages_keyed_by_filters_sort_and_cursor(db):
+    cache = ArmouryCache()
+    weapons = [dataclasses.replace(make_weapon(f'Gun {i}'), damage_roll=i + 1) for i in range(5)]
+
+    async def scenario():
+        await database.add_armoury_player_weapons(42, weapons, db=db)
+        first, cursor = await cache.get_player_weapon_page(42, limit=2, db=db)
+        assert await cache.get_player_weapon_page('42', limit=2, db=db) == (first, cursor)
+        second, _ = await cache.get_player_weapon_page(42, after=cursor, limit=2, db=db)
+        by_damage, _ = await cache.get_player_weapon_page(42, sort='damage', limit=2, db=db)
+        filtered, _ = await cache.get_player_weapon_page(42, {'weapon_class': 'Basic', 'min_damage': 4},
+                                                         limit=2, db=db)
+        # the order filters are given in doesn't matter
+        again, _ = await cache.get_player_weapon_page(42, {'min_damage': 4, 'weapon_class': 'Basic'},
+                                                      limit=2, db=db)
+        assert again is filtered
+        return first, second, by_damage, filtered
+
+    first, second, by_damage, filtered = run(scenario())
+    assert [w.name for w, _ in first] == ['Gun 0', 'Gun 1']
+    assert [w.name for w, _ in second] == ['Gun 2', 'Gun 3']
+    assert [w.name for w, _ in by_damage] == ['Gun 4', 'Gun 3']
+    assert [w.name for w, _ in filtered] == ['Gun 3', 'Gun 4']
+    assert cache.stats['pages'] == {'users': 1, 'hits': 2, 'misses': 4}
+
+
+def test_armoury_cache_pages_invalidated_by_writes(db):
+    cache = ArmouryCache()
+
+    async def scenario():
+        await cache.add_player_weapons(42, make_weapon('A'), db=db)
+        weapons, _ = await cache.get_player_weapon_page(42, db=db)
+        assert [w.name for w, _ in weapons] == ['A']
+
+        await cache.add_player_weapons(42, make_weapon('B'), db=db)
+        weapons, _ = await cache.get_player_weapon_page(42, db=db)
+        assert [w.name for w, _ in weapons] == ['A', 'B']
+
+        await cache.delete_player_weapons(42, weapons[0][1], db=db)
+        weapons, _ = await cache.get_player_weapon_page(42, db=db)
+        assert [w.name for w, _ in weapons] == ['B']
+
+    run(scenario())
+    assert cache.stats['pages']['hits'] == 0
+    assert cache.stats['pages']['misses'] == 3
+
+
+def test_armoury_cache_invalidate_drops_racing_page_load(db, monkeypatch):
+    cache = ArmouryCache()
+    page = database.page_armoury_player_weapons
+
+    async def scenario():
+        resume = asyncio.Event()
+
+        async def slow_page(*args, **kwargs):
+            result = await page(*args, **kwargs)
+            await resume.wait()
+            return result
+
+        monkeypatch.setattr(database, 'page_armoury_player_weapons', slow_page)
+        await database.add_armoury_player_weapons(42, make_weapon('Old'), db=db)
+        loading = asyncio.ensure_future(cache.get_player_weapon_page(42, db=db))
+        await asyncio.sleep(0.01)
+
+        # a write lands after the page was read, before it's stored
+        await cache.add_player_weapons(42, make_weapon('New'), db=db)
+        resume.set()
+        stale, _ = await loading
+        monkeypatch.setattr(database, 'page_armoury_player_weapons', page)
+        weapons, _ = await cache.get_player_weapon_page(42, db=db)
+        return stale, weapons
+
+    stale, weapons = run(scenario())
+    assert [w.name for w, _ in stale] == ['Old']
+    assert [w.name for w, _ in weapons] == ['New', 'Old']
+
+
+def test_armoury_cache_keeps_pages_per_user(db):
+    cache = ArmouryCache(pages_per_user=2)
+
+    async def scenario():
+        await database.add_armoury_player_weapons(42, make_weapon(), db=db)
+        for sort in ('name', 'damage', 'name'):
+            await cache.get_player_weapon_page(42, sort=sort, db=db)
+        await cache.get_player_weapon_page(42, {'weapon_type': 'Bolt'}, db=db)
+        # the damage page was the least recently viewed
+        await cache.get_player_weapon_page(42, sort='damage', db=db)
+
+    run(scenario())
+    assert len(cache.pages.get(42)) == 2
+    assert cache.stats['pages']['hits'] == 1
+    assert cache.stats['pages']['misses'] == 4
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_exact.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import itertools
+
+import numpy as np
+import pytest
+
+from omnissiah.batch import batch_player_attack
+from omnissiah.combat import COMBAT_ACTIONS
+from omnissiah.exact import attack_distribution, fury_pmf, hit_damage_pmf
+from omnissiah.rng import DiceRNG
+
+from .common import make_instance
+
+
+# (weapon fields, BS, actions, target range)
+ATTACKS = {
+    'standard': ({}, 40, ['Standard Attack'], 30),
+    'semi': ({'damage_roll': 2, 'damage_bonus': 3}, 55, ['Semi Auto Burst'], 30),
+    'full auto, negative bonus': ({'damage_bonus': -4}, 45, ['Full Auto Burst'], 10),
+}
+
+
+@pytest.mark.parametrize('test', [0, 35, 100])
+def test_fury_pmf_sums_to_one(test):
+    pmf = fury_pmf(test)
+    assert pmf.sum() == pytest.approx(1)
+    assert pmf[0] == pytest.approx(1 - test / 100)
+
+
+@pytest.mark.parametrize('n_dice, damage_bonus, degrees, test',
+                         [(1, 0, 0, 0), (1, 5, 3, 40), (2, -8, 6, 80), (3, 2, 11, 100)])
+def test_hit_damage_pmf_sums_to_one(n_dice, damage_bonus, degrees, test):
+    pmf = hit_damage_pmf(n_dice, damage_bonus, degrees, fury_pmf(test))
+    assert pmf.sum() == pytest.approx(1)
+    assert (pmf >= 0).all()
+
+
+@pytest.mark.parametrize('n_dice, damage_bonus, degrees',
+                         [(1, 0, 0), (1, 2, 4), (2, 0, 5), (2, -8, 3)])
+def test_hit_damage_pmf_matches_enumeration(n_dice, damage_bonus, degrees):
+    # without fury: the lowest die is replaced by the DoS when lower
+    expected = np.zeros(10 * n_dice + max(degrees, 10) + max(damage_bonus, 0) + 1)
+    for dice in itertools.product(range(1, 11), repeat=n_dice):
+        dice = sorted(dice)
+        if dice[0] < degrees:
+            dice[0] = degrees
+        expected[max(sum(dice) + damage_bonus, 0)] += .1 ** n_dice
+    pmf = hit_damage_pmf(n_dice, damage_bonus, degrees, fury_pmf(0))
+    np.testing.assert_allclose(np.trim_zeros(pmf, 'b'), np.trim_zeros(expected, 'b'), atol=1e-12)
+
+
+def test_hit_damage_floor():
+    # 1d10-8: a roll of 8 or less does nothing
+    pmf = hit_damage_pmf(1, -8, 0, fury_pmf(0))
+    np.testing.assert_allclose(np.trim_zeros(pmf, 'b'), [.8, .1, .1])
+
+
+@pytest.mark.parametrize('attack', ATTACKS)
+def test_attack_distribution(attack):
+    fields, char_val, names, target_range = ATTACKS[attack]
+    instance = make_instance(**fields)
+    actions = [COMBAT_ACTIONS[name] for name in names]
+
+    dist = attack_distribution(instance, char_val, actions=actions, target_range=target_range)
+    assert dist.hits_pmf.sum() == pytest.approx(1)
+    assert dist.damage_pmf.sum() == pytest.approx(1)
+    assert dist.truncated_mass < 1e-9
+    assert (dist.damage_pmf >= 0).all()
+    # a hit of 0 damage counts as a miss in the damage distribution
+    assert dist.success_rate <= dist.hit_probability + 1e-12
+
+    result = batch_player_attack(instance, char_val, actions=actions, target_range=target_range,
+                                 N=100000, rng=DiceRNG(3))
+    damage = result['damage']
+    assert abs(damage.mean() - dist.mean) <= 5 * np.sqrt(dist.variance / len(damage))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_forms.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+# flask_wtf needs the patch in place before it's first imported
+import quart.flask_patch  # noqa: F401
+
+import asyncio
+
+import pytest
+from quart import Quart
+from werkzeug.datastructures import MultiDict
+
+from omnissiah.forms import MAX_SIMULATION_TRIALS, SimulationForm, WeaponForm
+
+
+WEAPON_DATA = {'weapon_name': 'Godwyn-Deaz Bolter',
+               'weapon_class': 'Basic',
+               'weapon_type': 'Bolt',
+               'damage_type': 'Explosive',
+               'availability': 'Rare',
+               'weapon_range': '100',
+               'rof_single': 'y',
+               'rof_semi': '2',
+               'rof_auto': '4',
+               'damage_roll': '1',
+               'damage_bonus': '5',
+               'penetration': '4',
+               'clip': '24',
+               'reload_time': '1',
+               'mass': '7'}
+
+
+def validate(form_class, data):
+    app = Quart(__name__)
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    async def scenario():
+        async with app.test_request_context('/', method='POST'):
+            form = form_class(formdata=MultiDict(data))
+            return form.validate(), form
+
+    return asyncio.run(scenario())
+
+
+def test_weapon_form_builds_model():
+    valid, form = validate(WeaponForm, WEAPON_DATA)
+    assert valid
+    assert form.get_weapon_model().weapon_range == 100
+
+
+@pytest.mark.parametrize('weapon_range', ['', '0', '-5'])
+def test_weapon_form_needs_positive_range(weapon_range):
+    valid, form = validate(WeaponForm, {**WEAPON_DATA, 'weapon_range': weapon_range})
+    assert not valid
+    assert 'weapon_range' in form.errors
+
+
+@pytest.mark.parametrize('n_trials, ok', [(MAX_SIMULATION_TRIALS, True),
+                                          (MAX_SIMULATION_TRIALS + 1, False)])
+def test_simulation_form_caps_trials(n_trials, ok):
+    data = {f'weapon-{key}': value for key, value in WEAPON_DATA.items()}
+    data.update({'craftsmanship': 'Common', 'actions': 'Standard Attack',
+                 'ballistic_skill': '45', 'target_range': '30', 'n_trials': str(n_trials)})
+    valid, form = validate(SimulationForm, data)
+    assert ('n_trials' not in form.errors) == ok
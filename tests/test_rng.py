@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_rng.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import numpy as np
+import pytest
+
+from omnissiah import rng
+from omnissiah.rng import DiceRNG, parse_dice
+
+
+def test_seed_replays():
+    first, second = DiceRNG(5), DiceRNG(5)
+    assert [first.d100() for _ in range(100)] == [second.d100() for _ in range(100)]
+    assert first.Nd10(50) == second.Nd10(50)
+    assert DiceRNG(6).Nd10(50) != DiceRNG(5).Nd10(50)
+
+    # a stream can be replayed from its seed_seq
+    replay = DiceRNG(first.seed_seq)
+    assert replay.Nd10(50) == DiceRNG(5).Nd10(50)
+
+
+def test_spawn_independent_and_reproducible():
+    parent = DiceRNG(11)
+    children = parent.spawn(3)
+    draws = [child.Nd10(10000) for child in children]
+    assert len({tuple(d) for d in draws}) == 3
+    assert abs(np.corrcoef(draws[0], draws[1])[0, 1]) < .05
+
+    again = [child.Nd10(10000) for child in DiceRNG(11).spawn(3)]
+    assert again == draws
+
+
+def test_buffer_refill_keeps_generator_order():
+    dice = DiceRNG(1, block_size=4)
+    rolled = [dice.roll(10), dice.roll(10)] + dice.rolls(10, 3) + dice.rolls(10, 6)
+
+    generator = np.random.default_rng(np.random.SeedSequence(1))
+    expected = np.concatenate([generator.integers(1, 11, size=size) for size in (4, 4, 6)])
+    assert rolled == expected[:11].tolist()
+    assert dice.rolls(10, 0) == []
+
+
+def test_dice_buffers_are_separate():
+    dice = DiceRNG(2, block_size=16)
+    rolls = [dice.d10() for _ in range(40)] + dice.Nd100(40)
+    assert all(1 <= r <= 10 for r in rolls[:40])
+    assert all(1 <= r <= 100 for r in rolls[40:])
+    assert max(rolls[40:]) > 10
+
+
+@pytest.mark.parametrize('expr, expected', [('1d100', (1, 100, 0)),
+                                            ('d10', (1, 10, 0)),
+                                            ('2d10+3', (2, 10, 3)),
+                                            (' 3 d 6 - 2 ', (3, 6, -2))])
+def test_parse_dice(expr, expected):
+    assert parse_dice(expr) == expected
+
+
+@pytest.mark.parametrize('expr', ['', '10', '2d', 'd10+', '2x6', '1d10*2', 'd-10'])
+def test_parse_dice_rejects(expr):
+    with pytest.raises(ValueError):
+        parse_dice(expr)
+    with pytest.raises(ValueError):
+        DiceRNG(0).roll_expr(expr)
+
+
+def test_roll_expr():
+    dice = DiceRNG(3)
+    totals = [dice.roll_expr('2d10+3') for _ in range(1000)]
+    assert min(totals) >= 5 and max(totals) <= 23
+    assert DiceRNG(3).roll_expr('2d10+3') == totals[0]
+
+
+def test_fork_reseeds_unless_explicitly_seeded(monkeypatch):
+    monkeypatch.setattr(rng, '_RNG', rng.get_rng())
+    monkeypatch.setattr(rng, '_RNG_EXPLICIT', rng._RNG_EXPLICIT)
+
+    seeded = rng.seed(5)
+    rng._reseed_after_fork()
+    assert rng.get_rng() is seeded
+
+    unseeded = rng.seed()
+    rng._reseed_after_fork()
+    assert rng.get_rng() is not unseeded
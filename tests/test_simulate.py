@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_simulate.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import pytest
+
+from omnissiah.combat import COMBAT_ACTIONS
+from omnissiah.simulate import precision_reached, simulate_attack_adaptive
+
+from .common import make_instance
+
+
+ACTIONS = [COMBAT_ACTIONS['Semi Auto Burst']]
+
+
+def half_width(interval):
+    low, high = interval
+    return (high - low) / 2
+
+
+def test_adaptive_stops_at_success_rate_precision():
+    summary = simulate_attack_adaptive(make_instance(), 45, 30, ACTIONS,
+                                       sr_precision=.005, seed=1)
+    assert half_width(summary.success_rate_interval(.95)) <= .005
+    # about z**2 p (1 - p) / .005**2 trials are needed, at most 38416
+    assert 10000 <= summary.n < 60000
+
+
+def test_adaptive_stops_at_damage_precision():
+    summary = simulate_attack_adaptive(make_instance(), 45, 30, ACTIONS,
+                                       damage_precision=.2, confidence=.99, seed=2)
+    assert half_width(summary.mean_interval(.99)) <= .2
+    assert precision_reached(summary, damage_precision=.2, confidence=.99)
+    assert not precision_reached(summary, damage_precision=.01, confidence=.99)
+
+
+def test_adaptive_respects_max_trials():
+    summary = simulate_attack_adaptive(make_instance(), 45, 30, ACTIONS,
+                                       sr_precision=.0001, batch_size=4000,
+                                       max_trials=25000, seed=3)
+    assert summary.n == 25000
+    assert half_width(summary.success_rate_interval(.95)) > .0001
+
+
+def test_adaptive_replays_seed():
+    runs = [simulate_attack_adaptive(make_instance(), 45, 30, ACTIONS,
+                                     sr_precision=.01, seed=4).to_dict()
+            for _ in range(2)]
+    assert runs[0] == runs[1]
+
+
+def test_adaptive_needs_a_target():
+    with pytest.raises(ValueError):
+        simulate_attack_adaptive(make_instance(), 45, 30, ACTIONS)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_stats.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import json
+
+import numpy as np
+import pytest
+
+from omnissiah.stats import AttackSummary
+
+
+def make_trials(seed, n):
+    rng = np.random.default_rng(seed)
+    damage = np.where(rng.random(n) < .4, rng.integers(1, 40, size=n), 0)
+    test = rng.integers(20, 70, size=n)
+    success = (damage > 0) | (rng.random(n) < .1)
+    return damage, test, success
+
+
+def assert_same_summary(a, b):
+    assert a.n == b.n
+    assert a.n_success == b.n_success
+    assert a.n_damaging == b.n_damaging
+    assert a.mean == pytest.approx(b.mean)
+    assert a.variance == pytest.approx(b.variance)
+    np.testing.assert_array_equal(a.damage_hist, b.damage_hist)
+    assert (a.test_min, a.test_max) == (b.test_min, b.test_max)
+
+
+def test_update_matches_numpy():
+    damage, test, success = make_trials(1, 5000)
+    summary = AttackSummary().update(damage, test=test, success=success)
+    assert summary.n == 5000
+    assert summary.mean == pytest.approx(damage.mean())
+    assert summary.variance == pytest.approx(damage.var(ddof=1))
+    assert summary.success_rate == pytest.approx((damage > 0).mean())
+    assert summary.hit_rate == pytest.approx(success.mean())
+    assert summary.max_damage == damage.max()
+    assert (summary.test_min, summary.test_max) == (test.min(), test.max())
+
+
+def test_merge_equals_concatenated():
+    first, second = make_trials(1, 3000), make_trials(2, 7000)
+    merged = AttackSummary().update(first[0], test=first[1], success=first[2])
+    merged.merge(AttackSummary().update(second[0], test=second[1], success=second[2]))
+
+    whole = AttackSummary().update(np.concatenate([first[0], second[0]]),
+                                   test=np.concatenate([first[1], second[1]]),
+                                   success=np.concatenate([first[2], second[2]]))
+    assert_same_summary(merged, whole)
+
+
+def test_chunked_updates_equal_one_update():
+    damage, test, success = make_trials(3, 10000)
+    chunked = AttackSummary()
+    for start in range(0, 10000, 1234):
+        end = start + 1234
+        chunked.update(damage[start:end], test=test[start:end], success=success[start:end])
+    assert_same_summary(chunked, AttackSummary().update(damage, test=test, success=success))
+
+
+def test_merge_empty():
+    damage, test, success = make_trials(4, 100)
+    summary = AttackSummary().update(damage, test=test, success=success)
+    before = summary.to_dict()
+    summary.merge(AttackSummary())
+    assert summary.to_dict() == before
+
+    empty = AttackSummary().merge(summary)
+    assert_same_summary(empty, summary)
+
+
+@pytest.mark.parametrize('q', [.1, .25, .5, .9, .99])
+def test_quantiles_from_histogram(q):
+    damage, _, _ = make_trials(5, 20000)
+    summary = AttackSummary().update(damage)
+    assert summary.quantile(q, damaging_only=False) == np.quantile(damage, q, method='inverted_cdf')
+    damaging = damage[damage > 0]
+    assert summary.quantile(q) == np.quantile(damaging, q, method='inverted_cdf')
+
+
+def test_quantile_without_damage():
+    summary = AttackSummary().update(np.zeros(10, dtype=int))
+    assert summary.median_damage == 0
+    assert summary.max_damage == 0
+
+
+def test_rejects_negative_damage():
+    with pytest.raises(ValueError):
+        AttackSummary().update([3, -1])
+
+
+def test_dict_round_trip():
+    damage, test, success = make_trials(6, 1000)
+    summary = AttackSummary().update(damage, test=test, success=success)
+    data = json.loads(json.dumps(summary.to_dict()))
+    assert_same_summary(AttackSummary.from_dict(data), summary)
+    assert AttackSummary.from_dict(AttackSummary().to_dict()).n == 0
+
+
+def test_success_rate_interval_reference():
+    # Wilson score interval for 50 of 100 at 95%
+    summary = AttackSummary().update(np.repeat([0, 1], 50))
+    low, high = summary.success_rate_interval(.95)
+    assert low == pytest.approx(.4038, abs=1e-4)
+    assert high == pytest.approx(.5962, abs=1e-4)
+    assert AttackSummary().success_rate_interval() == (0.0, 1.0)
+
+
+def test_intervals_narrow_with_trials_and_confidence():
+    damage, _, _ = make_trials(7, 40000)
+    small = AttackSummary().update(damage[:1000])
+    large = AttackSummary().update(damage)
+    for interval in ('success_rate_interval', 'mean_interval'):
+        small_low, small_high = getattr(small, interval)()
+        large_low, large_high = getattr(large, interval)()
+        assert large_high - large_low < small_high - small_low
+        low, high = getattr(large, interval)(.99)
+        assert high - low > large_high - large_low
+
+
+def test_mean_interval():
+    damage, _, _ = make_trials(8, 10000)
+    low, high = AttackSummary().update(damage).mean_interval(.95)
+    half = 1.959964 * damage.std(ddof=1) / np.sqrt(len(damage))
+    assert (low, high) == pytest.approx((damage.mean() - half, damage.mean() + half))
+    assert AttackSummary().update([4]).mean_interval() == (float('-inf'), float('inf'))
+
+
+def test_success_rate_interval_coverage():
+    rng = np.random.default_rng(9)
+    covered = 0
+    for _ in range(2000):
+        summary = AttackSummary().update((rng.random(200) < .3).astype(int))
+        low, high = summary.success_rate_interval(.95)
+        covered += low <= .3 <= high
+    assert .93 <= covered / 2000 <= .97
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# (c) Camille Scott, 2026
+# File   : test_weapons.py
+# License: MIT
+# Author : Camille Scott <camille.scott.w@gmail.com>
+# Date   : 18.10.2026
+
+import pickle
+
+import pytest
+
+from omnissiah.combat import player_attack
+from omnissiah.items import Craftsmanship, ItemAvailability
+from omnissiah.weapons import (WEAPON_FORMAT_VERSION, PlayerWeapon, PlayerWeaponInstance,
+                               WeaponClass, WeaponRegistry, get_weapon_registry,
+                               pack_weapons, unpack_weapons)
+
+from .common import make_instance, make_weapon
+
+
+def test_registry_interns_equal_models():
+    registry = WeaponRegistry()
+    first = registry.intern(make_weapon())
+    assert registry.intern(make_weapon()) is first
+    assert registry.intern(make_weapon(name='Other')) is not first
+    assert len(registry) == 2
+
+
+def test_registry_finds_interned_models_without_packing(monkeypatch):
+    registry = WeaponRegistry()
+    weapon = registry.intern(make_weapon())
+    profile = registry.profile(weapon)
+
+    def to_bytes(self):
+        raise AssertionError('packed an interned model')
+
+    monkeypatch.setattr(PlayerWeapon, 'to_bytes', to_bytes)
+    assert registry.profile(weapon) is profile
+
+
+@pytest.mark.parametrize('fields', [{'weapon_range': None},
+                                    {'weapon_range': 2 ** 40},
+                                    {'availability': 'Shiny'}])
+def test_instances_of_weapons_outside_the_layout(fields):
+    weapon = make_weapon(**fields)
+    with pytest.raises(ValueError):
+        weapon.to_bytes()
+
+    instance = PlayerWeaponInstance(weapon, craftsmanship=Craftsmanship.Common)
+    assert instance.weapon_model is weapon
+    assert get_weapon_registry().intern(weapon) is weapon
+    assert pickle.loads(pickle.dumps(weapon)) == weapon
+
+
+def test_scalar_attack_outside_the_layout():
+    instance = make_instance(weapon_range=2 ** 40)
+    assert player_attack(instance, 50, target_range=10) is not None
+
+
+ROUND_TRIP_WEAPONS = [make_weapon(),
+                      make_weapon(name='Lathe-pattern Ærø “blade”', weapon_class=WeaponClass.Melee,
+                                  rof=(False, 0, 0), reference='Core p. 142', extra='Tearing, Balanced'),
+                      make_weapon(mass=None, reload_time=None, damage_bonus=-3, pen=0),
+                      make_weapon(availability=ItemAvailability.Unique, rof=(True, 65535, 65535),
+                                  weapon_range=2 ** 31 - 1, damage_bonus=-2 ** 15)]
+
+
+@pytest.mark.parametrize('weapon', ROUND_TRIP_WEAPONS)
+def test_bytes_round_trip(weapon):
+    data = weapon.to_bytes()
+    assert PlayerWeapon.from_bytes(data) == weapon
+    assert PlayerWeapon.from_bytes(bytearray(data)) == weapon
+
+
+@pytest.mark.parametrize('weapon', ROUND_TRIP_WEAPONS)
+def test_pickle_round_trip(weapon):
+    loaded = pickle.loads(pickle.dumps(weapon))
+    assert loaded == weapon
+    # unpickled models are interned
+    assert pickle.loads(pickle.dumps(weapon)) is loaded
+
+
+def test_pack_weapons_round_trip():
+    assert unpack_weapons(pack_weapons(ROUND_TRIP_WEAPONS)) == ROUND_TRIP_WEAPONS
+    assert unpack_weapons(pack_weapons([])) == []
+
+
+@pytest.mark.parametrize('fields', [{'weapon_range': 2 ** 31},
+                                    {'weapon_range': -2 ** 31 - 1},
+                                    {'damage_roll': 2 ** 15},
+                                    {'damage_bonus': -2 ** 15 - 1},
+                                    {'pen': 2 ** 15},
+                                    {'clip': 2 ** 31},
+                                    {'rof': (True, -1, 0)},
+                                    {'rof': (True, 0, 2 ** 16)},
+                                    {'weapon_range': None},
+                                    {'damage_type': 'Psychic'}])
+def test_out_of_range_fields(fields):
+    weapon = make_weapon(**fields)
+    with pytest.raises(ValueError, match='does not fit the binary weapon layout'):
+        weapon.to_bytes()
+    with pytest.raises(ValueError, match='does not fit the binary weapon layout'):
+        pack_weapons([make_weapon(), weapon])
+
+
+def test_unknown_format_version():
+    data = bytearray(make_weapon().to_bytes())
+    data[0] = WEAPON_FORMAT_VERSION + 1
+    with pytest.raises(ValueError, match='Unknown weapon format version'):
+        PlayerWeapon.from_bytes(data)